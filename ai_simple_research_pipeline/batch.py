@@ -0,0 +1,236 @@
+"""Run the pipeline over many project directories in one process.
+
+    python -m ai_simple_research_pipeline.batch 'projects/*' --concurrency 4 --llm-concurrency 16
+
+Projects run concurrently on one event loop, at most ``--concurrency`` at a
+time, and share one budget of ``--llm-concurrency`` concurrent LLM calls (cache
+hits do not use it). Each project behaves like a CLI run of all flows: flows
+whose manifest still matches are skipped unless ``--resume false``, and the LLM
+usage of the project is saved to its ``run_metrics/run_metrics.json``. A failing
+project is logged and reported but does not stop the others.
+
+Flow options are given like on the CLI (``--mode full``, ``--core-model ...``)
+and apply to every project. At the end an aggregate report (throughput, project
+latency percentiles, LLM calls, tokens and cost) is logged and, with
+``--output``, written as JSON. The exit status is 1 if any project failed.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import statistics
+import sys
+import time
+import traceback
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from ai_pipeline_core import disable_run_logger, get_pipeline_logger, prefect_test_harness
+from pydantic import ValidationError
+
+from ai_simple_research_pipeline.documents.flow import UserInputDocument
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions, parse_option_value
+from ai_simple_research_pipeline.http_client import http_client_scope
+from ai_simple_research_pipeline.llm_cache import llm_cache, llm_slots
+from ai_simple_research_pipeline.rate_limit import rate_limiter
+from ai_simple_research_pipeline.research_pipeline import run_flows
+from ai_simple_research_pipeline.settings import settings
+from ai_simple_research_pipeline.telemetry import RunLedger, use_ledger
+
+logger = get_pipeline_logger(__name__)
+
+DEFAULT_LLM_CONCURRENCY = 16
+
+
+@dataclass(slots=True)
+class ProjectResult:
+    """Outcome of one project of the batch."""
+
+    directory: str
+    status: str = "pending"  # "completed" | "up_to_date" | "failed"
+    wall_seconds: float = 0.0
+    flows_run: int = 0
+    flows_skipped: int = 0
+    llm_calls: int = 0
+    cached_llm_calls: int = 0
+    tokens: int = 0
+    cost: float = 0.0
+    error: str | None = None
+
+
+def expand_projects(patterns: list[str]) -> list[str]:
+    """Project directories matching ``patterns``, in order and without duplicates.
+
+    Glob matches without a ``user_input`` directory are ignored; plain paths
+    and storage URIs are kept as given.
+    """
+    projects: dict[str, None] = {}
+    for pattern in patterns:
+        if not glob.has_magic(pattern):
+            projects[pattern] = None
+            continue
+        for match in sorted(glob.glob(pattern)):
+            if (Path(match) / UserInputDocument.canonical_name()).is_dir():
+                projects[match] = None
+    return list(projects)
+
+
+async def run_project(directory: str, flow_options: ProjectFlowOptions) -> ProjectResult:
+    """Run every flow on one project directory, recording its LLM usage separately."""
+    result = ProjectResult(directory)
+    project_name = Path(directory.rstrip("/")).name
+    ledger = RunLedger()
+    started = time.perf_counter()
+    with use_ledger(ledger):
+        try:
+            run = await run_flows(project_name, directory, flow_options)
+            result.flows_run, result.flows_skipped = run.flows_run, run.flows_skipped
+            result.status = "completed" if result.flows_run else "up_to_date"
+        except Exception as e:
+            result.status = "failed"
+            result.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Project {directory} failed: {result.error}")
+            logger.debug(traceback.format_exc())
+        if ledger.records:
+            try:
+                await ledger.save(directory)
+            except Exception as e:
+                logger.warning(f"Could not save run metrics of {directory}: {e}")
+
+    result.wall_seconds = round(time.perf_counter() - started, 3)
+    totals = ledger.metrics().totals
+    result.llm_calls = totals.calls
+    result.cached_llm_calls = totals.cached_calls
+    result.tokens = totals.prompt_tokens + totals.completion_tokens
+    result.cost = totals.cost
+    logger.info(
+        f"Project {directory}: {result.status} in {result.wall_seconds:.1f}s "
+        f"({result.flows_run} flows run, {result.flows_skipped} skipped)"
+    )
+    return result
+
+
+async def run_batch(
+    directories: list[str], flow_options: ProjectFlowOptions, concurrency: int
+) -> list[ProjectResult]:
+    """Run ``directories`` with at most ``concurrency`` projects in progress at a time.
+
+    All projects share one pooled HTTP client.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def guarded(directory: str) -> ProjectResult:
+        async with semaphore:
+            return await run_project(directory, flow_options)
+
+    async with http_client_scope():
+        return list(await asyncio.gather(*(guarded(d) for d in directories)))
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[round(q * 100) - 1]
+
+
+def summarize(results: list[ProjectResult], wall_seconds: float) -> dict[str, Any]:
+    """Aggregate throughput, latency and LLM usage of a batch."""
+    latencies = [r.wall_seconds for r in results if r.status != "failed"]
+    llm_calls = sum(r.llm_calls for r in results)
+    return {
+        "projects": len(results),
+        "completed": sum(r.status == "completed" for r in results),
+        "up_to_date": sum(r.status == "up_to_date" for r in results),
+        "failed": sum(r.status == "failed" for r in results),
+        "wall_seconds": round(wall_seconds, 3),
+        "projects_per_hour": round(len(results) / wall_seconds * 3600, 2) if wall_seconds else 0.0,
+        "project_seconds_p50": round(_percentile(latencies, 0.5), 3),
+        "project_seconds_p95": round(_percentile(latencies, 0.95), 3),
+        "project_seconds_max": max(latencies, default=0.0),
+        "llm_calls": llm_calls,
+        "cached_llm_calls": sum(r.cached_llm_calls for r in results),
+        "llm_calls_per_second": round(llm_calls / wall_seconds, 3) if wall_seconds else 0.0,
+        "tokens": sum(r.tokens for r in results),
+        "cost": round(sum(r.cost for r in results), 6),
+    }
+
+
+def _report(results: list[ProjectResult], summary: dict[str, Any]) -> str:
+    width = max((len(r.directory) for r in results), default=7) + 2
+    lines = [f"{'project':<{width}}{'status':>12}{'seconds':>10}{'llm calls':>11}{'cost':>10}"]
+    for r in results:
+        lines.append(
+            f"{r.directory:<{width}}{r.status:>12}{r.wall_seconds:>10.1f}"
+            f"{r.llm_calls:>11}{r.cost:>10.4f}"
+        )
+    lines.append(
+        f"{summary['projects']} projects ({summary['completed']} completed, "
+        f"{summary['up_to_date']} up to date, {summary['failed']} failed) in "
+        f"{summary['wall_seconds']:.1f}s: {summary['projects_per_hour']} projects/hour, "
+        f"p50 {summary['project_seconds_p50']:.1f}s, p95 {summary['project_seconds_p95']:.1f}s, "
+        f"{summary['llm_calls']} LLM calls ({summary['cached_llm_calls']} cached), "
+        f"{summary['tokens']} tokens, ${summary['cost']:.4f}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the pipeline over many project directories in one process."
+    )
+    parser.add_argument("projects", nargs="+", help="project directories or globs")
+    parser.add_argument("--concurrency", type=int, default=4, help="projects run at once")
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=settings.llm_max_concurrency or DEFAULT_LLM_CONCURRENCY,
+        help="concurrent LLM calls across all projects (0 = unlimited)",
+    )
+    parser.add_argument("--output", type=Path, help="write the batch report as JSON")
+    for name in ProjectFlowOptions.model_fields:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=argparse.SUPPRESS)
+    args = vars(parser.parse_args())
+    patterns = args.pop("projects")
+    concurrency = args.pop("concurrency")
+    llm_slots.limit = args.pop("llm_concurrency")
+    output = args.pop("output")
+    try:
+        flow_options = ProjectFlowOptions(**{k: parse_option_value(v) for k, v in args.items()})
+    except ValidationError as e:
+        parser.error(str(e))
+
+    directories = expand_projects(patterns)
+    if not directories:
+        parser.error(f"no project directories match {' '.join(patterns)}")
+    logger.info(
+        f"Running {len(directories)} projects in {flow_options.mode} mode, {concurrency} at a "
+        f"time, with at most {llm_slots.limit or 'unlimited'} concurrent LLM calls"
+    )
+
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        if not settings.prefect_api_url:
+            stack.enter_context(prefect_test_harness())
+            stack.enter_context(disable_run_logger())
+        results = asyncio.run(run_batch(directories, flow_options, concurrency))
+    summary = summarize(results, time.perf_counter() - started)
+
+    logger.info(f"Batch report:\n{_report(results, summary)}")
+    llm_cache.log_summary()
+    rate_limiter.log_summary()
+    if output:
+        report = {
+            "summary": summary,
+            "projects": [asdict(r) for r in results],
+            "rate_limits": {model: asdict(s) for model, s in rate_limiter.stats().items()},
+        }
+        output.write_text(json.dumps(report, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
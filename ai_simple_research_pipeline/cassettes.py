@@ -0,0 +1,111 @@
+"""Record and replay of LLM calls ("cassettes") for reproducible runs and benchmarks.
+
+``cached_generate`` / ``cached_generate_structured`` pass every LLM round-trip
+through ``llm_cassette``, keyed by the same content-addressed key as the LLM
+cache. Set ``LLM_CASSETTE_MODE``:
+
+* ``record`` - make the real call and append the response and its latency to
+  the cassette at ``LLM_CASSETTE_PATH`` (JSON Lines; a key recorded twice keeps
+  the last entry)
+* ``replay`` - never call the model; serve the recorded response after the
+  recorded latency multiplied by ``LLM_CASSETTE_LATENCY_SCALE`` (``0`` = no delay).
+  A call missing from the cassette raises ``CassetteMissError``.
+
+Calls answered by the LLM cache never reach the cassette, so disable the cache
+(``LLM_CACHE_ENABLED=false``) when recording or replaying a whole run.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from ai_pipeline_core import get_pipeline_logger
+
+from ai_simple_research_pipeline.settings import settings
+
+logger = get_pipeline_logger(__name__)
+
+CassetteMode = Literal["off", "record", "replay"]
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for an LLM call that was never recorded."""
+
+
+@dataclass(slots=True)
+class CassetteEntry:
+    key: str
+    model: str
+    latency_seconds: float
+    payload: dict[str, Any]
+
+
+class LLMCassette:
+    """Records LLM payloads with their latency to a JSON Lines file, or replays them."""
+
+    def __init__(self, path: str | Path, mode: CassetteMode = "off", latency_scale: float = 1.0):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self._entries: dict[str, CassetteEntry] | None = None
+        self._lock = threading.Lock()  # serializes appends from to_thread workers
+
+    def _load(self) -> dict[str, CassetteEntry]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                with self.path.open(encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = CassetteEntry(**json.loads(line))
+                            self._entries[entry.key] = entry
+                logger.info(f"Loaded {len(self._entries)} LLM cassette entries from {self.path}")
+        return self._entries
+
+    def _append(self, entry: CassetteEntry) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(entry), separators=(",", ":")) + "\n")
+            self._load()[entry.key] = entry
+
+    async def play(
+        self, key: str, model: str, compute: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        """Return the payload of one LLM call according to the cassette mode."""
+        if self.mode == "replay":
+            entry = (await asyncio.to_thread(self._load)).get(key)
+            if entry is None:
+                raise CassetteMissError(
+                    f"LLM call to {model} ({key[:12]}) is not in cassette {self.path}; "
+                    "record it with LLM_CASSETTE_MODE=record"
+                )
+            delay = entry.latency_seconds * self.latency_scale
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.replayed += 1
+            return entry.payload
+
+        if self.mode != "record":
+            return await compute()
+
+        started = time.perf_counter()
+        payload = await compute()
+        entry = CassetteEntry(key, model, round(time.perf_counter() - started, 4), payload)
+        await asyncio.to_thread(self._append, entry)
+        self.recorded += 1
+        return payload
+
+
+llm_cassette = LLMCassette(
+    path=settings.llm_cassette_path,
+    mode=settings.llm_cassette_mode,
+    latency_scale=settings.llm_cassette_latency_scale,
+)
@@ -1,21 +1,119 @@
 """CLI entry point for the AI Simple Research Pipeline."""
 
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+
+from ai_pipeline_core import get_pipeline_logger
 from ai_pipeline_core.simple_runner import run_cli
+from pydantic import ValidationError
 
-from .flow_options import ProjectFlowOptions
+from .flow_options import ProjectFlowOptions, parse_option_value
 from .flows import FLOWS
+from .llm_cache import llm_cache
+from .manifest import is_flow_up_to_date, load_stored_documents, record_flow_manifest
+from .rate_limit import rate_limiter
+from .telemetry import run_ledger
 
 TRACE_NAME = (__package__ or __name__).split(".")[0].replace("_", "-")
 
+logger = get_pipeline_logger(__name__)
+
+
+@dataclass(slots=True)
+class _ResumePlan:
+    working_directory: str
+    flow_options: ProjectFlowOptions
+    start: int | None
+    end: int | None
+
+
+def _parse_resume_plan(argv: list[str]) -> _ResumePlan | None:
+    """Read the working directory, flow range and options that run_cli will use.
+
+    Only the arguments relevant to manifests are parsed; anything else is left
+    to run_cli, which remains responsible for validation and error messages.
+    Invalid flow options are logged and give no plan, so nothing is skipped.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("working_directory", nargs="?")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    for name in ProjectFlowOptions.model_fields:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args(argv)
+    values = vars(args)
+    working_directory = values.pop("working_directory")
+    start = values.pop("start")
+    end = values.pop("end")
+    if not working_directory:
+        return None
+    try:
+        flow_options = ProjectFlowOptions(**{k: parse_option_value(v) for k, v in values.items()})
+    except ValidationError as e:
+        logger.warning(f"Not checking manifests: invalid flow options ({e})")
+        return None
+    return _ResumePlan(working_directory, flow_options, start, end)
+
+
+async def _first_stale_flow(plan: _ResumePlan) -> int | None:
+    """Return the 1-based index of the first flow whose manifest no longer matches storage.
+
+    Only flows up to ``plan.end`` are checked; None means they are all up to date.
+    """
+    stored = await load_stored_documents(plan.working_directory)
+    for idx, flow in enumerate(FLOWS[: plan.end], start=1):
+        if not await is_flow_up_to_date(flow, plan.working_directory, plan.flow_options, stored):
+            return idx
+        logger.info(f"Flow {idx} of {len(FLOWS)}: {flow.name} is up to date")
+    return None
+
+
+async def _record_manifests(plan: _ResumePlan, start: int, end: int) -> None:
+    stored = await load_stored_documents(plan.working_directory)
+    for flow in FLOWS[start - 1 : end]:
+        await record_flow_manifest(flow, plan.working_directory, plan.flow_options, stored)
+
 
 def main():
-    """Main CLI entry point."""
+    """Main CLI entry point.
+
+    Unless ``--resume false`` or an explicit ``--start`` is given, flows whose
+    recorded manifest still matches the project directory are skipped by starting
+    at the first stale flow. Flows after it run again, but unchanged LLM calls
+    are served from the LLM cache. The LLM usage of the run is saved to
+    ``run_metrics/run_metrics.json`` in the project directory.
+    """
+    run_ledger.reset()
+    plan = _parse_resume_plan(sys.argv[1:])
+    if plan:
+        profile = plan.flow_options.profile().model_dump_json()
+        logger.info(f"Running in {plan.flow_options.mode} mode: {profile}")
+    start = plan.start if plan and plan.start else 1
+    if plan and plan.start is None and plan.flow_options.resume:
+        stale = asyncio.run(_first_stale_flow(plan))
+        if stale is None:
+            logger.info("All flows to run are up to date; nothing to run")
+            return
+        start = stale
+        if start > 1:
+            logger.info(f"Resuming from flow {start} of {len(FLOWS)}")
+            sys.argv.extend(["--start", str(start)])
+
     run_cli(
         flows=FLOWS,
         options_cls=ProjectFlowOptions,
         trace_name=TRACE_NAME,
     )
 
+    if plan:
+        asyncio.run(_record_manifests(plan, start, plan.end or len(FLOWS)))
+        asyncio.run(run_ledger.save(plan.working_directory))
+    llm_cache.log_summary()
+    rate_limiter.log_summary()
+    run_ledger.log_summary()
+
 
 if __name__ == "__main__":
     main()
@@ -2,16 +2,22 @@
 
 from .flow import (
     FinalReportDocument,
+    FlowManifestDocument,
     InitialSummaryDocument,
+    RetrievalIndexDocument,
     ReviewFindingDocument,
+    RunMetricsDocument,
     StandardizedFileDocument,
     UserInputDocument,
 )
 
 __all__ = [
     "FinalReportDocument",
+    "FlowManifestDocument",
     "InitialSummaryDocument",
+    "RetrievalIndexDocument",
     "ReviewFindingDocument",
+    "RunMetricsDocument",
     "StandardizedFileDocument",
     "UserInputDocument",
 ]
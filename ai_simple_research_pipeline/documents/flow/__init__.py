@@ -2,14 +2,20 @@
 
 from .final_report_document import FinalReportDocument
 from .findings_document import ReviewFindingDocument
+from .flow_manifest_document import FlowManifestDocument
 from .initial_summary_document import InitialSummaryDocument
+from .retrieval_index_document import RetrievalIndexDocument
+from .run_metrics_document import RunMetricsDocument
 from .standardized_file_document import StandardizedFileDocument
 from .user_input_document import UserInputDocument
 
 __all__ = [
     "FinalReportDocument",
+    "FlowManifestDocument",
     "InitialSummaryDocument",
+    "RetrievalIndexDocument",
     "ReviewFindingDocument",
+    "RunMetricsDocument",
     "StandardizedFileDocument",
     "UserInputDocument",
 ]
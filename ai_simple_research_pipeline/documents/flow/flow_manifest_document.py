@@ -0,0 +1,9 @@
+from ai_pipeline_core import FlowDocument
+
+
+class FlowManifestDocument(FlowDocument):
+    """Record of the inputs, options and outputs of the last completed run of a flow.
+
+    One `{flow_name}.json` per flow; used by the runners to skip flows whose
+    inputs have not changed since that run.
+    """
@@ -0,0 +1,14 @@
+from enum import StrEnum
+
+from ai_pipeline_core import FlowDocument
+
+
+class RetrievalIndexDocument(FlowDocument):
+    """BM25 index over the heading chunks of the standardized Markdown files.
+
+    Written next to the standardized files whenever they are saved; used by the
+    review and report flows to send only relevant passages as context.
+    """
+
+    class FILES(StrEnum):
+        INDEX = "retrieval_index.json"
@@ -0,0 +1,13 @@
+from enum import StrEnum
+
+from ai_pipeline_core import FlowDocument
+
+
+class RunMetricsDocument(FlowDocument):
+    """Per-task LLM token, cost and latency ledger of the last pipeline run.
+
+    Written by the runners at the end of every run; not an input of any flow.
+    """
+
+    class FILES(StrEnum):
+        METRICS = "run_metrics.json"
@@ -1,32 +1,156 @@
-from typing import Literal
+import json
+from typing import Any, Literal
 
 from ai_pipeline_core import FlowOptions, ModelName
-from pydantic import Field
+from pydantic import BaseModel, Field, model_validator
+
+from ai_simple_research_pipeline.profiles import MODE_PROFILES, Mode, ModeProfile
+
+
+class OutputTarget(BaseModel):
+    """Upload destination for one output document, with optional extra PUT headers.
+
+    ``content_md5`` adds a ``Content-MD5`` header so the target can verify the
+    body. It is off by default: a V2-signed URL covers Content-MD5 in its
+    signature, so the header is only accepted when the URL was signed with it.
+    """
+
+    url: str
+    headers: dict[str, str] = Field(default_factory=dict)
+    content_md5: bool = False
 
 
 class ProjectFlowOptions(FlowOptions):
-    """Project-specific flow configuration for startup analysis pipeline."""
+    """Project-specific flow configuration for startup analysis pipeline.
 
-    mode: Literal["test", "quick", "full"] = Field(default="quick")
+    ``mode`` selects a profile from ``MODE_PROFILES`` that supplies the defaults
+    of the options it covers; field defaults below match the ``quick`` profile.
+    """
+
+    mode: Mode = Field(default="quick")
 
     core_model: ModelName = Field(default="gemini-2.5-flash")
     small_model: ModelName = Field(default="gemini-2.5-flash-lite")
 
+    resume: bool = Field(
+        default=True,
+        description="Skip flows whose recorded input manifest still matches the stored documents",
+    )
+
+    max_input_chars: int = Field(
+        default=0,
+        ge=0,
+        description="Truncate text input files to this many characters (0 = no limit)",
+    )
+
+    standardization_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum number of input documents standardized concurrently",
+    )
+
+    findings_map_reduce_threshold: int = Field(
+        default=400_000,
+        ge=0,
+        description=(
+            "Total size in bytes of standardized documents above which findings are "
+            "extracted per file with small_model and merged with core_model (0 = always)"
+        ),
+    )
+    review_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum number of standardized files reviewed concurrently in map-reduce mode",
+    )
+
+    retrieval_token_budget: int = Field(
+        default=0,
+        ge=0,
+        description=(
+            "Estimated tokens of standardized Markdown retrieved (BM25) per review or report "
+            "call instead of sending whole files (0 = send whole files)"
+        ),
+    )
+    retrieval_top_k: int = Field(
+        default=8,
+        ge=1,
+        description="Chunks retrieved per question or report section when retrieval is enabled",
+    )
+
+    report_mode: Literal["single", "sectioned"] = Field(
+        default="single",
+        description=(
+            "'single' writes the full report in one call; 'sectioned' plans an outline and "
+            "writes its sections concurrently"
+        ),
+    )
+    descriptions: bool = Field(
+        default=True,
+        description="Generate the short and long project descriptions in the summary flow",
+    )
+    full_report: bool = Field(
+        default=True, description="Generate the full report (the short report is always generated)"
+    )
+
     # bellow 2 fields are for GCS signed urls
     input_documents_urls: list[str] = Field(
         default=[], description="List of input documents (http urls) to use for the pipeline"
     )
-    output_documents_urls: dict[str, str] = Field(
+    output_documents_urls: dict[str, str | OutputTarget] = Field(
         default={},
         description=(
             "Map output file name -> either a signed URL string or "
-            "a dict {'url': str, 'headers': dict[str,str]} for header overrides"
+            "a dict {'url': str, 'headers': dict[str,str], 'content_md5': bool} for header "
+            "overrides and an opt-in Content-MD5 header"
         ),
     )
 
     report_webhook_url: str = Field(
         default="", description="Webhook URL to send the report and other files to"
     )
+    report_webhook_mode: Literal["inline", "reference"] = Field(
+        default="inline",
+        description=(
+            "'inline' embeds document contents in the report webhook; 'reference' sends "
+            "name, size, sha256 and storage URL of each document instead"
+        ),
+    )
+    report_webhook_gzip: bool = Field(
+        default=False, description="Gzip the report webhook body (Content-Encoding: gzip)"
+    )
     status_webhook_url: str = Field(
         default="", description="Webhook URL to send the status of prefect flow runs to"
     )
+    status_webhook_batch: bool = Field(
+        default=False,
+        description="POST bursts of status updates together as {'statuses': [...]}",
+    )
+
+    @model_validator(mode="before")
+    @classmethod
+    def _apply_mode_profile(cls, data: Any) -> Any:
+        if not isinstance(data, dict):
+            return data
+        profile = MODE_PROFILES.get(data.get("mode", "quick"))
+        if profile is None:
+            return data  # field validation reports the unknown mode
+        return {**profile.model_dump(), **data}
+
+    def profile(self) -> ModeProfile:
+        """The effective profile: the mode's defaults with any explicit overrides."""
+        return ModeProfile(**{name: getattr(self, name) for name in ModeProfile.model_fields})
+
+    def output_target(self, name: str) -> OutputTarget | None:
+        """Return the upload destination configured for output file ``name``, if any."""
+        target = self.output_documents_urls.get(name)
+        if isinstance(target, str):
+            return OutputTarget(url=target) if target else None
+        return target
+
+
+def parse_option_value(value: str) -> Any:
+    """Parse a command-line flow option value as JSON, or keep it as a plain string."""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
@@ -7,16 +7,30 @@ from ai_simple_research_pipeline.documents.flow import (
     UserInputDocument,
 )
 from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.manifest import delete_stale_outputs
+from ai_simple_research_pipeline.pdf_extraction import expand_pdf
+from ai_simple_research_pipeline.profiles import truncate_input
 
 from .tasks import create_long_description, create_short_description, create_summary
 
 
 class SummaryFlowConfig(FlowConfig):
-    """Configuration for summary flow."""
+    """Configuration for summary flow.
+
+    Saving deletes stored summary documents the flow no longer produces, such as
+    the descriptions after a run with ``descriptions=False``.
+    """
 
     INPUT_DOCUMENT_TYPES = [UserInputDocument]
     OUTPUT_DOCUMENT_TYPE = InitialSummaryDocument
 
+    @classmethod
+    async def save_documents(
+        cls, uri: str, documents: DocumentList, *, validate_output_type: bool = True
+    ) -> None:
+        await super().save_documents(uri, documents, validate_output_type=validate_output_type)
+        await delete_stale_outputs(uri, InitialSummaryDocument, documents)
+
 
 @pipeline_flow(config=SummaryFlowConfig)
 async def summary_flow(
@@ -24,9 +38,20 @@ async def summary_flow(
     documents: DocumentList,
     flow_options: ProjectFlowOptions,
 ) -> DocumentList:
-    """Process documents through summary flow."""
+    """Process documents through summary flow.
+
+    PDF inputs are sent as their locally extracted text plus images of the pages
+    without a text layer (see ``pdf_extraction``). Text inputs longer than
+    ``flow_options.max_input_chars`` are truncated. The short and long
+    descriptions are only generated with ``flow_options.descriptions``.
+    """
     # Get input documents
-    inputs = documents.filter_by(UserInputDocument)
+    expanded = await asyncio.gather(
+        *[expand_pdf(doc) for doc in documents.filter_by(UserInputDocument)]
+    )
+    inputs = DocumentList(
+        [truncate_input(part, flow_options.max_input_chars) for parts in expanded for part in parts]
+    )
 
     # First create the initial summary
     summary = await create_summary(
@@ -35,6 +60,9 @@ async def summary_flow(
         project_name=project_name,
     )
 
+    if not flow_options.descriptions:
+        return SummaryFlowConfig.create_and_validate_output([summary])
+
     # Then generate descriptions in parallel
     short_desc, long_desc = await asyncio.gather(
         create_short_description(
@@ -4,11 +4,11 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 
 from ai_simple_research_pipeline.documents.flow import InitialSummaryDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -23,7 +23,7 @@ async def create_long_description(summary: Document, model: ModelName) -> Initia
     context = AIMessages([summary])
     messages = AIMessages([prompt])
 
-    result = await llm.generate(
+    content = await cached_generate(
         model=model,
         context=context,
         messages=messages,
@@ -31,5 +31,5 @@ async def create_long_description(summary: Document, model: ModelName) -> Initia
 
     return InitialSummaryDocument.create(
         name=InitialSummaryDocument.FILES.LONG_DESCRIPTION,
-        content=result.content,
+        content=content,
     )
@@ -4,12 +4,12 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 from pydantic import BaseModel, ConfigDict, Field
 
 from ai_simple_research_pipeline.documents.flow import InitialSummaryDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -52,7 +52,7 @@ async def create_summary(
     context = AIMessages(list(documents))
     messages = AIMessages([prompt])
 
-    result = await llm.generate_structured(
+    summary = await cached_generate_structured(
         model,
         InitialSummary,
         context=context,
@@ -61,5 +61,5 @@ async def create_summary(
 
     return InitialSummaryDocument.create(
         name=InitialSummaryDocument.FILES.INITIAL_SUMMARY,
-        content=result.parsed,
+        content=summary,
     )
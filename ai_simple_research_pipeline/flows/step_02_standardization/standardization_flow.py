@@ -1,23 +1,142 @@
 import asyncio
 
-from ai_pipeline_core import DocumentList, FlowConfig, pipeline_flow
+from ai_pipeline_core import (
+    Document,
+    DocumentList,
+    FlowConfig,
+    get_pipeline_logger,
+    pipeline_flow,
+)
+from ai_pipeline_core.storage import Storage
 
 from ai_simple_research_pipeline.documents.flow import (
+    FlowManifestDocument,
     InitialSummaryDocument,
     StandardizedFileDocument,
     UserInputDocument,
 )
 from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.manifest import delete_stale_outputs, options_fingerprint
+from ai_simple_research_pipeline.pdf_extraction import expand_pdf
+from ai_simple_research_pipeline.profiles import truncate_input
+from ai_simple_research_pipeline.retrieval import BM25Index
 
 from .tasks import extract_metadata, standardize_content
+from .tasks.extract_metadata import StandardizedFileMetadata, slugify
+
+logger = get_pipeline_logger(__name__)
+
+# Options that change what the standardization of one file produces
+STANDARDIZATION_OPTIONS = {"mode", "small_model", "max_input_chars"}
+
+
+class _PreviousOutputsConfig(FlowConfig):
+    """Loads the standardized files written by the previous run."""
+
+    INPUT_DOCUMENT_TYPES = [StandardizedFileDocument]
+    OUTPUT_DOCUMENT_TYPE = FlowManifestDocument
 
 
 class StandardizationFlowConfig(FlowConfig):
-    """Configuration for standardization flow."""
+    """Configuration for standardization flow.
+
+    Loading also returns the previous run's StandardizedFileDocuments so the flow
+    can carry over outputs of unchanged files. Saving deletes outputs whose
+    source file no longer exists and rewrites the retrieval index over the saved
+    Markdown files. ``missing_outputs`` names the files that failed, so the run
+    does not record a manifest that would skip them next time.
+    """
 
     INPUT_DOCUMENT_TYPES = [UserInputDocument, InitialSummaryDocument]
     OUTPUT_DOCUMENT_TYPE = StandardizedFileDocument
 
+    @classmethod
+    async def load_documents(cls, uri: str) -> DocumentList:
+        documents = await super().load_documents(uri)
+        previous = await _PreviousOutputsConfig.load_documents(uri)
+        return DocumentList([*documents, *previous])
+
+    @classmethod
+    async def save_documents(
+        cls, uri: str, documents: DocumentList, *, validate_output_type: bool = True
+    ) -> None:
+        await super().save_documents(uri, documents, validate_output_type=validate_output_type)
+        storage = await Storage.from_uri(uri)
+        index = BM25Index.build(documents).to_document()
+        await storage.with_base(index.canonical_name()).write_bytes(index.name, index.content)
+        await delete_stale_outputs(uri, StandardizedFileDocument, documents)
+
+    @classmethod
+    def missing_outputs(cls, documents: DocumentList) -> list[str]:
+        """Names of user files in ``documents`` without both standardized outputs."""
+        outputs = {doc.name for doc in documents.filter_by(StandardizedFileDocument)}
+        return [
+            doc.name
+            for doc in documents.filter_by(UserInputDocument)
+            if not {f"{slugify(doc.name)}.yaml", f"{slugify(doc.name)}.md"} <= outputs
+        ]
+
+
+def _previous_outputs(
+    document: Document, previous: DocumentList, flow_options: ProjectFlowOptions
+) -> list[StandardizedFileDocument] | None:
+    """Return the previous outputs for ``document`` if they are still valid.
+
+    They are valid if they were made from the same bytes, with the same model
+    and the same standardization options.
+    """
+    slug = slugify(document.name)
+    by_name = {doc.name: doc for doc in previous if isinstance(doc, StandardizedFileDocument)}
+    metadata_doc = by_name.get(f"{slug}.yaml")
+    content_doc = by_name.get(f"{slug}.md")
+    if metadata_doc is None or content_doc is None:
+        return None
+    try:
+        metadata = metadata_doc.as_pydantic_model(StandardizedFileMetadata)
+    except ValueError:  # written before source hashes were recorded
+        return None
+    if (
+        metadata.source_sha256 != document.sha256
+        or metadata.model != flow_options.small_model
+        or metadata.options_fingerprint
+        != options_fingerprint(flow_options, STANDARDIZATION_OPTIONS)
+    ):
+        return None
+    return [metadata_doc, content_doc]
+
+
+async def _standardize_document(
+    document: Document,
+    initial_summary: Document,
+    flow_options: ProjectFlowOptions,
+    project_name: str,
+    semaphore: asyncio.Semaphore,
+) -> list[StandardizedFileDocument]:
+    """Extract metadata and standardize content for one document, bounded by the semaphore."""
+    async with semaphore:
+        parts = [
+            truncate_input(part, flow_options.max_input_chars)
+            for part in await expand_pdf(document)
+        ]
+        metadata, content = await asyncio.gather(
+            extract_metadata(
+                document=document,
+                initial_summary=initial_summary,
+                parts=parts,
+                options_fingerprint=options_fingerprint(flow_options, STANDARDIZATION_OPTIONS),
+                model=flow_options.small_model,
+                project_name=project_name,
+            ),
+            standardize_content(
+                document=document,
+                metadata=initial_summary,  # Use initial summary as context for now
+                parts=parts,
+                model=flow_options.small_model,
+                project_name=project_name,
+            ),
+        )
+    return [metadata, content]
+
 
 @pipeline_flow(config=StandardizationFlowConfig)
 async def standardization_flow(
@@ -29,6 +148,21 @@ async def standardization_flow(
     standardized English Markdown with YAML front-matter containing metadata
     and improved summaries.
 
+    Files are processed concurrently, at most
+    ``flow_options.standardization_concurrency`` at a time. Output order follows
+    input order, and a file that fails is logged and skipped so it does not
+    discard the others; the flow only fails if every file fails.
+
+    Files whose sha256 matches the ``source_sha256`` recorded in their previous
+    ``.yaml`` output, made with the same ``small_model`` and standardization
+    options (``STANDARDIZATION_OPTIONS``), are not processed again; their
+    previous outputs are carried over. Outputs of removed files are dropped (and
+    deleted on save). Text files longer than ``flow_options.max_input_chars``
+    are truncated first, so the recorded hash is that of the truncated input.
+    PDFs are sent to the model as their locally extracted text plus images of
+    the pages without a text layer (see ``pdf_extraction``); the recorded hash
+    is still that of the PDF.
+
     Args:
         project_name: Project identifier
         documents: Input documents (user files and initial summary)
@@ -38,28 +172,43 @@ async def standardization_flow(
         DocumentList containing StandardizedFileDocument instances
     """
     # Get input documents
-    inputs = documents.filter_by(UserInputDocument)
+    inputs = [
+        truncate_input(doc, flow_options.max_input_chars)
+        for doc in documents.filter_by(UserInputDocument)
+    ]
     initial_summary = documents.get_by(InitialSummaryDocument.FILES.INITIAL_SUMMARY)
+    previous = documents.filter_by(StandardizedFileDocument)
+
+    carried = {doc.name: _previous_outputs(doc, previous, flow_options) for doc in inputs}
+    pending = [doc for doc in inputs if carried[doc.name] is None]
+    logger.info(
+        f"Standardizing {len(pending)} new or changed files, "
+        f"reusing {len(inputs) - len(pending)} unchanged"
+    )
+
+    # Schedule all files at once; the semaphore bounds in-flight LLM work
+    semaphore = asyncio.Semaphore(flow_options.standardization_concurrency)
+    outcomes = await asyncio.gather(
+        *[
+            _standardize_document(doc, initial_summary, flow_options, project_name, semaphore)
+            for doc in pending
+        ],
+        return_exceptions=True,
+    )
+    processed = dict(zip([doc.name for doc in pending], outcomes))
 
-    # Process all files in parallel batches
     results: list[StandardizedFileDocument] = []
+    failures: list[BaseException] = []
     for doc in inputs:
-        # Extract metadata and standardize content in parallel for each document
-        metadata, content = await asyncio.gather(
-            extract_metadata(
-                document=doc,
-                initial_summary=initial_summary,
-                model=flow_options.small_model,
-                project_name=project_name,
-            ),
-            standardize_content(
-                document=doc,
-                metadata=initial_summary,  # Use initial summary as context for now
-                model=flow_options.small_model,
-                project_name=project_name,
-            ),
-        )
-        results.extend([metadata, content])
+        outcome = carried[doc.name] or processed[doc.name]
+        if isinstance(outcome, BaseException):
+            logger.error(f"Standardization failed for {doc.name}: {outcome!r}")
+            failures.append(outcome)
+            continue
+        results.extend(outcome)
+
+    if failures and not results:
+        raise failures[0]
 
     # Return validated output
     return StandardizationFlowConfig.create_and_validate_output(results)
@@ -7,12 +7,12 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 from pydantic import BaseModel, ConfigDict, Field
 
 from ai_simple_research_pipeline.documents.flow import StandardizedFileDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -45,12 +45,28 @@ class DocumentMetadata(BaseModel):
     provenance_notes: str = Field(description="Brief explanation of how document was processed")
 
 
+class StandardizedFileMetadata(DocumentMetadata):
+    """Metadata stored in the YAML output, tagged with how it was produced.
+
+    The source file hash, model and options fingerprint let later runs detect
+    unchanged source files and reuse their outputs.
+    """
+
+    source_sha256: str = Field(description="sha256 of the source user file")
+    model: str = Field(default="", description="Model that standardized the file")
+    options_fingerprint: str = Field(
+        default="", description="Fingerprint of the standardization options used"
+    )
+
+
 @pipeline_task
 async def extract_metadata(
     document: Document,
     initial_summary: Document,
     model: ModelName,
     project_name: str,
+    parts: list[Document] | None = None,
+    options_fingerprint: str = "",
 ) -> StandardizedFileDocument:
     """Extract structured metadata from a document.
 
@@ -59,6 +75,10 @@ async def extract_metadata(
         initial_summary: Initial project summary for context
         model: Model to use for extraction
         project_name: Project name for context
+        parts: What to send to the model in place of ``document``, e.g. the
+            extracted text and page images of a PDF; defaults to ``document``
+        options_fingerprint: Fingerprint of the standardization options, recorded
+            in the output so later runs only reuse it under the same options
 
     Returns:
         StandardizedFileDocument containing YAML metadata
@@ -70,11 +90,11 @@ async def extract_metadata(
     )
 
     # Use initial summary as static context for caching
-    context = AIMessages([initial_summary, document])
+    context = AIMessages([initial_summary, *(parts or [document])])
     messages = AIMessages([prompt])
 
     # Extract structured metadata
-    result = await llm.generate_structured(
+    metadata = await cached_generate_structured(
         model,
         DocumentMetadata,
         context=context,
@@ -88,7 +108,12 @@ async def extract_metadata(
     # Create metadata document
     metadata_doc = StandardizedFileDocument.create(
         name=yaml_name,
-        content=result.parsed,
+        content=StandardizedFileMetadata(
+            **metadata.model_dump(),
+            source_sha256=document.sha256,
+            model=model,
+            options_fingerprint=options_fingerprint,
+        ),
     )
 
     logger.debug(f"Extracted metadata for {document.name} -> {yaml_name}")
@@ -7,11 +7,11 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 
 from ai_simple_research_pipeline.documents.flow import StandardizedFileDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -30,6 +30,7 @@ async def standardize_content(
     metadata: Document,
     model: ModelName,
     project_name: str,
+    parts: list[Document] | None = None,
 ) -> StandardizedFileDocument:
     """Convert document content to clean English Markdown.
 
@@ -38,6 +39,8 @@ async def standardize_content(
         metadata: Extracted metadata for context
         model: Model to use for conversion
         project_name: Project name for context
+        parts: What to send to the model in place of ``document``, e.g. the
+            extracted text and page images of a PDF; defaults to ``document``
 
     Returns:
         StandardizedFileDocument containing clean Markdown content
@@ -49,11 +52,11 @@ async def standardize_content(
     )
 
     # Use metadata as context for consistency
-    context = AIMessages([metadata, document])
+    context = AIMessages([metadata, *(parts or [document])])
     messages = AIMessages([prompt])
 
     # Generate standardized Markdown
-    result = await llm.generate(
+    content = await cached_generate(
         model=model,
         context=context,
         messages=messages,
@@ -66,7 +69,7 @@ async def standardize_content(
     # Create content document
     content_doc = StandardizedFileDocument.create(
         name=md_name,
-        content=result.content,
+        content=content,
     )
 
     logger.debug(f"Standardized content for {document.name} -> {md_name}")
@@ -7,7 +7,6 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 
@@ -15,6 +14,7 @@ from ai_simple_research_pipeline.documents.flow import (
     InitialSummaryDocument,
     StandardizedFileDocument,
 )
+from ai_simple_research_pipeline.llm_cache import cached_generate
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -75,7 +75,7 @@ async def standardize_files(
         messages = AIMessages([doc, prompt])
 
         # Generate standardized Markdown with context caching
-        res = await llm.generate(
+        content = await cached_generate(
             model=model,
             context=static_context,  # Static, cacheable
             messages=messages,  # Dynamic per file
@@ -85,7 +85,7 @@ async def standardize_files(
         out_name = f"{slugify(doc.name)}.md"
 
         # Create standardized document
-        results.append(StandardizedFileDocument.create(name=out_name, content=res.content))
+        results.append(StandardizedFileDocument.create(name=out_name, content=content))
 
         logger.debug(f"Standardized {doc.name} -> {out_name}")
 
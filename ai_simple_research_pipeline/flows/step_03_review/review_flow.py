@@ -1,19 +1,47 @@
-from ai_pipeline_core import DocumentList, FlowConfig, pipeline_flow
+import asyncio
+from pathlib import Path
+
+from ai_pipeline_core import Document, DocumentList, FlowConfig, get_pipeline_logger, pipeline_flow
 
 from ai_simple_research_pipeline.documents.flow import (
     InitialSummaryDocument,
+    RetrievalIndexDocument,
     ReviewFindingDocument,
     StandardizedFileDocument,
 )
 from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.retrieval import retrieve_documents
+
+from .tasks import extract_candidate_findings, generate_findings, reduce_findings
+from .tasks.extract_candidate_findings import CandidateFindings
 
-from .tasks import generate_findings
+logger = get_pipeline_logger(__name__)
+
+# Retrieval queries covering the category taxonomy, used when retrieval_token_budget is set
+FINDINGS_QUERIES = [
+    "technology architecture platform infrastructure scalability technical debt",
+    "product features roadmap customers use cases differentiation",
+    "market size TAM SAM growth demand segments",
+    "team founders experience hiring key roles advisors",
+    "legal contracts intellectual property patents litigation ownership",
+    "revenue pricing costs burn runway margins funding financials",
+    "go to market sales channels partnerships pipeline acquisition",
+    "competitors competitive landscape alternatives positioning",
+    "security privacy data protection compliance incidents",
+    "regulation regulatory licenses approvals policy risk",
+    "risks challenges dependencies assumptions uncertainty",
+    "traction metrics milestones growth retention",
+]
 
 
 class ReviewFlowConfig(FlowConfig):
     """Configuration for investment review flow."""
 
-    INPUT_DOCUMENT_TYPES = [InitialSummaryDocument, StandardizedFileDocument]
+    INPUT_DOCUMENT_TYPES = [
+        InitialSummaryDocument,
+        StandardizedFileDocument,
+        RetrievalIndexDocument,
+    ]
     OUTPUT_DOCUMENT_TYPE = ReviewFindingDocument
 
 
@@ -26,19 +54,46 @@ async def review_flow(
     """Generate investment findings: risks, opportunities, and questions.
 
     Analyzes standardized documents and initial summary to produce
-    structured findings for investor due diligence.
+    structured findings for investor due diligence. When the standardized
+    documents exceed ``findings_map_reduce_threshold`` bytes, candidates are
+    extracted per file with the small model and merged with the core model,
+    instead of sending every file in a single call. With
+    ``retrieval_token_budget`` set, only the chunks retrieved for the review
+    categories are sent, which usually keeps the review in a single call.
     """
     # Get required inputs
     initial_summary = documents.get_by(InitialSummaryDocument.FILES.INITIAL_SUMMARY)
     standardized_docs = documents.filter_by(StandardizedFileDocument)
+    if flow_options.retrieval_token_budget:
+        standardized_docs = retrieve_documents(
+            documents,
+            FINDINGS_QUERIES,
+            top_k=flow_options.retrieval_top_k,
+            token_budget=flow_options.retrieval_token_budget,
+        )
 
-    # Generate findings using structured output
-    risks_doc, opportunities_doc, questions_doc = await generate_findings(
-        standardized_documents=standardized_docs,
-        initial_summary=initial_summary,
-        model=flow_options.core_model,
-        project_name=project_name,
-    )
+    total_size = sum(doc.size for doc in standardized_docs)
+    if total_size <= flow_options.findings_map_reduce_threshold:
+        # Generate findings using structured output
+        risks_doc, opportunities_doc, questions_doc = await generate_findings(
+            standardized_documents=standardized_docs,
+            initial_summary=initial_summary,
+            model=flow_options.core_model,
+            project_name=project_name,
+        )
+    else:
+        logger.info(
+            f"Standardized documents total {total_size} bytes; generating findings map-reduce"
+        )
+        candidates = await _extract_candidates(
+            standardized_docs, initial_summary, project_name, flow_options
+        )
+        risks_doc, opportunities_doc, questions_doc = await reduce_findings(
+            candidates=candidates,
+            initial_summary=initial_summary,
+            model=flow_options.core_model,
+            project_name=project_name,
+        )
 
     # Return all three finding documents
     return ReviewFlowConfig.create_and_validate_output(
@@ -48,3 +103,43 @@ async def review_flow(
             questions_doc,
         ]
     )
+
+
+async def _extract_candidates(
+    standardized_docs: DocumentList,
+    initial_summary: Document,
+    project_name: str,
+    flow_options: ProjectFlowOptions,
+) -> list[CandidateFindings]:
+    """Map step: extract candidate findings from each standardized file concurrently."""
+    files: dict[str, list[Document]] = {}
+    for doc in standardized_docs:
+        files.setdefault(Path(doc.name).stem, []).append(doc)
+
+    semaphore = asyncio.Semaphore(flow_options.review_concurrency)
+
+    async def extract(file_documents: list[Document]) -> CandidateFindings:
+        async with semaphore:
+            return await extract_candidate_findings(
+                file_documents=DocumentList(file_documents),
+                initial_summary=initial_summary,
+                model=flow_options.small_model,
+                project_name=project_name,
+            )
+
+    outcomes = await asyncio.gather(
+        *(extract(docs) for docs in files.values()), return_exceptions=True
+    )
+
+    candidates: list[CandidateFindings] = []
+    failures: list[BaseException] = []
+    for stem, outcome in zip(files, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Candidate extraction failed for {stem}: {outcome!r}")
+            failures.append(outcome)
+            continue
+        candidates.append(outcome)
+
+    if failures and not candidates:
+        raise failures[0]
+    return candidates
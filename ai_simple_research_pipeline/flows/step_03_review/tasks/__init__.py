@@ -1,5 +1,11 @@
 """Tasks for review flow."""
 
+from .extract_candidate_findings import extract_candidate_findings
 from .generate_findings import generate_findings
+from .reduce_findings import reduce_findings
 
-__all__ = ["generate_findings"]
+__all__ = [
+    "extract_candidate_findings",
+    "generate_findings",
+    "reduce_findings",
+]
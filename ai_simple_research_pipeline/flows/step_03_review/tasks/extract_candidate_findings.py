@@ -0,0 +1,70 @@
+from ai_pipeline_core import (
+    AIMessages,
+    DocumentList,
+    ModelName,
+    PromptManager,
+    get_pipeline_logger,
+    pipeline_task,
+)
+from pydantic import BaseModel, ConfigDict, Field
+
+from ai_simple_research_pipeline.documents.flow import InitialSummaryDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
+
+from .generate_findings import Opportunity, Question, Risk
+
+prompt_manager = PromptManager(__file__)
+logger = get_pipeline_logger(__name__)
+
+
+class CandidateFindings(BaseModel):
+    """Candidate findings supported by a single standardized file."""
+
+    model_config = ConfigDict(frozen=True)
+
+    risks: list[Risk] = Field(default_factory=list, max_length=5)
+    opportunities: list[Opportunity] = Field(default_factory=list, max_length=5)
+    questions: list[Question] = Field(default_factory=list, max_length=5)
+
+
+@pipeline_task
+async def extract_candidate_findings(
+    file_documents: DocumentList,
+    initial_summary: InitialSummaryDocument,
+    model: ModelName,
+    project_name: str,
+) -> CandidateFindings:
+    """Extract candidate risks, opportunities and questions from one standardized file.
+
+    Args:
+        file_documents: The standardized Markdown of one source file with its metadata
+        initial_summary: Project summary for orientation
+        model: Model to use for extraction (the small model)
+        project_name: Project name for context
+
+    Returns:
+        Up to 5 candidates of each kind, citing only this file
+    """
+    file_names = [doc.name for doc in file_documents]
+    prompt = prompt_manager.get(
+        "extract_candidate_findings",
+        project_name=project_name,
+        file_names=file_names,
+    )
+
+    # Summary first so the shared prefix is the same for every file
+    context = AIMessages([initial_summary, *file_documents])
+    messages = AIMessages([prompt])
+
+    candidates = await cached_generate_structured(
+        model,
+        CandidateFindings,
+        context=context,
+        messages=messages,
+    )
+
+    logger.debug(
+        f"Extracted {len(candidates.risks)} risks, {len(candidates.opportunities)} "
+        f"opportunities and {len(candidates.questions)} questions from {', '.join(file_names)}"
+    )
+    return candidates
@@ -7,7 +7,6 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 from pydantic import BaseModel, ConfigDict, Field
@@ -16,6 +15,7 @@ from ai_simple_research_pipeline.documents.flow import (
     InitialSummaryDocument,
     ReviewFindingDocument,
 )
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -128,16 +128,20 @@ async def generate_findings(
     context = AIMessages(list(standardized_documents) + [initial_summary])
     messages = AIMessages([prompt])
 
-    result = await llm.generate_structured(
+    findings = await cached_generate_structured(
         model,
         Findings,
         context=context,
         messages=messages,
     )
 
-    findings = result.parsed
+    return findings_documents(findings)
 
-    # Create three separate documents for each finding type
+
+def findings_documents(
+    findings: Findings,
+) -> tuple[ReviewFindingDocument, ReviewFindingDocument, ReviewFindingDocument]:
+    """Split findings into the risks, opportunities and questions documents."""
     risks_doc = ReviewFindingDocument.create(
         name=ReviewFindingDocument.FILES.RISKS,
         content={"risks": [risk.model_dump() for risk in findings.risks]},
@@ -0,0 +1,97 @@
+import json
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+from ai_pipeline_core import (
+    AIMessages,
+    ModelName,
+    PromptManager,
+    get_pipeline_logger,
+    pipeline_task,
+)
+
+from ai_simple_research_pipeline.documents.flow import (
+    InitialSummaryDocument,
+    ReviewFindingDocument,
+)
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
+
+from .extract_candidate_findings import CandidateFindings
+from .generate_findings import Citation, Findings, Opportunity, Question, Risk, findings_documents
+
+prompt_manager = PromptManager(__file__)
+logger = get_pipeline_logger(__name__)
+
+T = TypeVar("T", Risk, Opportunity, Question)
+
+
+def pool_candidates(items: Sequence[T], key: Callable[[T], str]) -> list[T]:
+    """Candidates with repeats of the same finding merged, keeping the first and all evidence.
+
+    Files of one data room often repeat a claim, so the same finding is extracted
+    from several of them. Repeats are matched on ``key`` ignoring case and spacing.
+    """
+    pooled: dict[str, T] = {}
+    for item in items:
+        normalized = " ".join(key(item).lower().split())
+        first = pooled.get(normalized)
+        if first is None:
+            pooled[normalized] = item
+            continue
+        evidence: list[Citation] = list(dict.fromkeys([*first.evidence, *item.evidence]))
+        pooled[normalized] = first.model_copy(update={"evidence": evidence})
+    return list(pooled.values())
+
+
+@pipeline_task
+async def reduce_findings(
+    candidates: list[CandidateFindings],
+    initial_summary: InitialSummaryDocument,
+    model: ModelName,
+    project_name: str,
+) -> tuple[ReviewFindingDocument, ReviewFindingDocument, ReviewFindingDocument]:
+    """Merge per-file candidate findings into the final 5 risks, opportunities and questions.
+
+    Exact repeats (same title or question) are merged before the call; the
+    model then merges candidates that describe the same issue and ranks them.
+
+    Args:
+        candidates: Candidate findings extracted from each standardized file
+        initial_summary: Project summary for context
+        model: Model to use for ranking and selection (the core model)
+        project_name: Project name for context
+
+    Returns:
+        Risks, opportunities and questions documents
+    """
+    risks = pool_candidates([r for c in candidates for r in c.risks], lambda r: r.title)
+    opportunities = pool_candidates(
+        [o for c in candidates for o in c.opportunities], lambda o: o.title
+    )
+    questions = pool_candidates([q for c in candidates for q in c.questions], lambda q: q.question)
+    pooled = {
+        "risks": [r.model_dump(mode="json") for r in risks],
+        "opportunities": [o.model_dump(mode="json") for o in opportunities],
+        "questions": [q.model_dump(mode="json") for q in questions],
+    }
+    prompt = prompt_manager.get(
+        "reduce_findings",
+        project_name=project_name,
+        candidates=json.dumps(pooled, indent=1),
+    )
+
+    context = AIMessages([initial_summary])
+    messages = AIMessages([prompt])
+
+    findings = await cached_generate_structured(
+        model,
+        Findings,
+        context=context,
+        messages=messages,
+    )
+
+    logger.debug(
+        f"Reduced {sum(len(v) for v in pooled.values())} candidate findings "
+        f"from {len(candidates)} files"
+    )
+    return findings_documents(findings)
@@ -1,60 +1,158 @@
 import asyncio
 
-from ai_pipeline_core import DocumentList, FlowConfig, pipeline_flow
+from ai_pipeline_core import Document, DocumentList, FlowConfig, pipeline_flow
 
 from ai_simple_research_pipeline.documents.flow import (
     FinalReportDocument,
     InitialSummaryDocument,
+    RetrievalIndexDocument,
     ReviewFindingDocument,
     StandardizedFileDocument,
 )
 from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.manifest import delete_stale_outputs
+from ai_simple_research_pipeline.retrieval import load_index, retrieve_documents
 
-from .tasks import write_full_report, write_short_report
+from .tasks import (
+    REPORT_SECTION_QUERIES,
+    plan_report_outline,
+    stitch_report_sections,
+    write_full_report,
+    write_report_section,
+    write_short_report,
+)
 
 
 class ReportFlowConfig(FlowConfig):
-    """Configuration for report generation flow."""
+    """Configuration for report generation flow.
+
+    Saving deletes stored reports the flow no longer produces, such as the full
+    report after a run with ``full_report=False``.
+    """
 
     INPUT_DOCUMENT_TYPES = [
         InitialSummaryDocument,
         StandardizedFileDocument,
+        RetrievalIndexDocument,
         ReviewFindingDocument,
     ]
     OUTPUT_DOCUMENT_TYPE = FinalReportDocument
 
+    @classmethod
+    async def save_documents(
+        cls, uri: str, documents: DocumentList, *, validate_output_type: bool = True
+    ) -> None:
+        await super().save_documents(uri, documents, validate_output_type=validate_output_type)
+        await delete_stale_outputs(uri, FinalReportDocument, documents)
+
 
 @pipeline_flow(config=ReportFlowConfig)
 async def report_flow(
     project_name: str, documents: DocumentList, flow_options: ProjectFlowOptions
 ) -> DocumentList:
-    """Generate comprehensive due-diligence report from all artifacts."""
+    """Generate comprehensive due-diligence report from all artifacts.
+
+    With ``report_mode="sectioned"`` the full report is planned as an outline
+    first and its sections are written concurrently, then stitched in order.
+
+    With ``retrieval_token_budget`` set, the reports are written from the chunks
+    retrieved for the required sections instead of whole files; in sectioned
+    mode each section retrieves its own chunks for its title and brief.
+
+    With ``full_report=False`` (the ``test`` profile) only the short report is written.
+    """
     # Get specific documents
     initial_summary = documents.get_by(InitialSummaryDocument.FILES.INITIAL_SUMMARY)
     standardized_docs = documents.filter_by(StandardizedFileDocument)
+    if flow_options.retrieval_token_budget:
+        standardized_docs = retrieve_documents(
+            documents,
+            REPORT_SECTION_QUERIES,
+            top_k=flow_options.retrieval_top_k,
+            token_budget=flow_options.retrieval_token_budget,
+        )
     risks = documents.get_by(ReviewFindingDocument.FILES.RISKS)
     opportunities = documents.get_by(ReviewFindingDocument.FILES.OPPORTUNITIES)
     questions = documents.get_by(ReviewFindingDocument.FILES.QUESTIONS)
 
-    # Generate reports in parallel
-    full_report, short_report = await asyncio.gather(
-        write_full_report(
+    short_report_task = write_short_report(
+        standardized_documents=standardized_docs,
+        initial_summary=initial_summary,
+        risks=risks,
+        opportunities=opportunities,
+        questions=questions,
+        model=flow_options.core_model,
+    )
+    if not flow_options.full_report:
+        return ReportFlowConfig.create_and_validate_output([await short_report_task])
+
+    if flow_options.report_mode == "sectioned":
+        full_report_task = _write_sectioned_full_report(
+            documents=documents,
             standardized_documents=standardized_docs,
             initial_summary=initial_summary,
             risks=risks,
             opportunities=opportunities,
             questions=questions,
-            model=flow_options.core_model,
             project_name=project_name,
-        ),
-        write_short_report(
+            flow_options=flow_options,
+        )
+    else:
+        full_report_task = write_full_report(
             standardized_documents=standardized_docs,
             initial_summary=initial_summary,
             risks=risks,
             opportunities=opportunities,
             questions=questions,
             model=flow_options.core_model,
-        ),
-    )
+            project_name=project_name,
+        )
+
+    # Generate reports in parallel
+    full_report, short_report = await asyncio.gather(full_report_task, short_report_task)
 
     return ReportFlowConfig.create_and_validate_output([full_report, short_report])
+
+
+async def _write_sectioned_full_report(
+    documents: DocumentList,
+    standardized_documents: DocumentList,
+    initial_summary: Document,
+    risks: Document,
+    opportunities: Document,
+    questions: Document,
+    project_name: str,
+    flow_options: ProjectFlowOptions,
+) -> FinalReportDocument:
+    """Plan the full report outline, write every section concurrently and stitch them."""
+    shared = {
+        "initial_summary": initial_summary,
+        "risks": risks,
+        "opportunities": opportunities,
+        "questions": questions,
+        "model": flow_options.core_model,
+        "project_name": project_name,
+    }
+    outline = await plan_report_outline(standardized_documents=standardized_documents, **shared)
+    index = load_index(documents) if flow_options.retrieval_token_budget else None
+
+    async def write_section(position: int) -> str:
+        section_docs = standardized_documents
+        if flow_options.retrieval_token_budget:
+            section = outline.sections[position]
+            section_docs = retrieve_documents(
+                documents,
+                [f"{section.title}\n{section.brief}"],
+                top_k=flow_options.retrieval_top_k,
+                token_budget=flow_options.retrieval_token_budget,
+                index=index,
+            )
+        return await write_report_section(
+            standardized_documents=section_docs, outline=outline, index=position, **shared
+        )
+
+    bodies = await asyncio.gather(*(write_section(i) for i in range(len(outline.sections))))
+    content = stitch_report_sections(
+        [(section.title, body) for section, body in zip(outline.sections, bodies, strict=True)]
+    )
+    return FinalReportDocument.create(name=FinalReportDocument.FILES.FULL_REPORT, content=content)
@@ -1,6 +1,15 @@
 """Tasks for the report flow."""
 
-from .write_full_report import write_full_report
+from .plan_report_outline import plan_report_outline
+from .write_full_report import REPORT_SECTION_QUERIES, write_full_report
+from .write_report_section import stitch_report_sections, write_report_section
 from .write_short_report import write_short_report
 
-__all__ = ["write_full_report", "write_short_report"]
+__all__ = [
+    "REPORT_SECTION_QUERIES",
+    "plan_report_outline",
+    "stitch_report_sections",
+    "write_full_report",
+    "write_report_section",
+    "write_short_report",
+]
@@ -0,0 +1,80 @@
+from ai_pipeline_core import (
+    AIMessages,
+    Document,
+    DocumentList,
+    ModelName,
+    PromptManager,
+    get_pipeline_logger,
+    pipeline_task,
+)
+from pydantic import BaseModel, ConfigDict, Field
+
+from ai_simple_research_pipeline.llm_cache import cached_generate_structured
+
+prompt_manager = PromptManager(__file__)
+logger = get_pipeline_logger(__name__)
+
+
+class ReportSectionPlan(BaseModel):
+    """One level-2 section of the full report and what it must cover."""
+
+    model_config = ConfigDict(frozen=True)
+
+    title: str = Field(description="Section heading text, without the leading ##")
+    brief: str = Field(
+        description=(
+            "Key points, facts and source files the section covers, and what it leaves "
+            "to other sections"
+        )
+    )
+
+
+class ReportOutline(BaseModel):
+    """Ordered section plan of the full report."""
+
+    model_config = ConfigDict(frozen=True)
+
+    sections: list[ReportSectionPlan] = Field(min_length=1, max_length=15)
+
+
+@pipeline_task
+async def plan_report_outline(
+    standardized_documents: DocumentList,
+    initial_summary: Document,
+    risks: Document,
+    opportunities: Document,
+    questions: Document,
+    model: ModelName,
+    project_name: str,
+) -> ReportOutline:
+    """Plan the sections of the full report so they can be written independently.
+
+    Args:
+        standardized_documents: All standardized source documents
+        initial_summary: Project summary
+        risks: Risks findings document
+        opportunities: Opportunities findings document
+        questions: Investor questions findings document
+        model: Model to use for planning
+        project_name: Project name for context
+
+    Returns:
+        The ordered report outline
+    """
+    prompt = prompt_manager.get("plan_report_outline", project_name=project_name)
+
+    # Same context as the section writers so the provider cache prefix is shared
+    context = AIMessages(
+        list(standardized_documents) + [initial_summary, risks, opportunities, questions]
+    )
+    messages = AIMessages([prompt])
+
+    outline = await cached_generate_structured(
+        model,
+        ReportOutline,
+        context=context,
+        messages=messages,
+    )
+
+    logger.debug(f"Planned {len(outline.sections)} report sections")
+    return outline
@@ -5,15 +5,29 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 
 from ai_simple_research_pipeline.documents.flow import FinalReportDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
 
+# Retrieval queries for the required sections of full_report_sections.jinja2
+REPORT_SECTION_QUERIES = [
+    "executive summary company overview customers why now",
+    "problem solution value proposition differentiation architecture data flows technology",
+    "market size TAM SAM SOM segments go to market competition landscape positioning",
+    "traction metrics milestones customers revenue growth",
+    "business model revenue pricing unit economics costs margins",
+    "team founders roles hiring advisors governance ownership cap table",
+    "risks challenges dependencies",
+    "opportunities expansion upside",
+    "open questions unknowns missing information",
+    "investment outlook scenarios funding valuation thesis",
+]
+
 
 @pipeline_task
 async def write_full_report(
@@ -37,12 +51,10 @@ async def write_full_report(
     messages = AIMessages([prompt])
 
     # Generate full report (15-20 pages) using context/messages split for caching
-    result = await llm.generate(
+    content = await cached_generate(
         model=model,
         context=context,
         messages=messages,
     )
 
-    return FinalReportDocument.create(
-        name=FinalReportDocument.FILES.FULL_REPORT, content=result.content
-    )
+    return FinalReportDocument.create(name=FinalReportDocument.FILES.FULL_REPORT, content=content)
@@ -0,0 +1,108 @@
+import re
+
+from ai_pipeline_core import (
+    AIMessages,
+    Document,
+    DocumentList,
+    ModelName,
+    PromptManager,
+    get_pipeline_logger,
+    pipeline_task,
+)
+
+from ai_simple_research_pipeline.llm_cache import cached_generate
+
+from .plan_report_outline import ReportOutline
+
+prompt_manager = PromptManager(__file__)
+logger = get_pipeline_logger(__name__)
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+# Allowed heading levels per document_formatting_rules.jinja2; sections own level 2
+SECTION_LEVEL = 2
+MAX_LEVEL = 5
+
+
+@pipeline_task
+async def write_report_section(
+    standardized_documents: DocumentList,
+    initial_summary: Document,
+    risks: Document,
+    opportunities: Document,
+    questions: Document,
+    outline: ReportOutline,
+    index: int,
+    model: ModelName,
+    project_name: str,
+) -> str:
+    """Write the body of one full report section from the shared outline.
+
+    Args:
+        standardized_documents: All standardized source documents
+        initial_summary: Project summary
+        risks: Risks findings document
+        opportunities: Opportunities findings document
+        questions: Investor questions findings document
+        outline: Planned report outline
+        index: Position of the section to write in ``outline.sections``
+        model: Model to use for writing
+        project_name: Project name for context
+
+    Returns:
+        Section body in Markdown, without its own ## heading
+    """
+    prompt = prompt_manager.get(
+        "write_report_section",
+        project_name=project_name,
+        sections=outline.sections,
+        section=outline.sections[index],
+    )
+
+    # Identical to plan_report_outline and write_full_report for provider caching
+    context = AIMessages(
+        list(standardized_documents) + [initial_summary, risks, opportunities, questions]
+    )
+    messages = AIMessages([prompt])
+
+    return await cached_generate(
+        model=model,
+        context=context,
+        messages=messages,
+    )
+
+
+def _normalize_section(title: str, body: str) -> str:
+    lines = body.strip().splitlines()
+    # Drop a repeated section heading; the stitcher writes its own
+    if lines and (match := HEADING.match(lines[0])):
+        if match.group(2).strip("*_ ").lower() == title.lower():
+            lines = lines[1:]
+
+    headings: dict[int, re.Match[str]] = {}
+    in_fence = False
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence and (match := HEADING.match(line)):
+            headings[i] = match
+
+    # Shift so the top heading inside the section is one level below the section
+    shift = SECTION_LEVEL + 1 - min(len(m.group(1)) for m in headings.values()) if headings else 0
+    for i, match in headings.items():
+        level = min(max(len(match.group(1)) + shift, SECTION_LEVEL + 1), MAX_LEVEL)
+        lines[i] = f"{'#' * level} {match.group(2)}"
+    return "\n".join(lines).strip()
+
+
+def stitch_report_sections(sections: list[tuple[str, str]]) -> str:
+    """Join ``(title, body)`` sections in order under ## headings.
+
+    Headings inside a section body are shifted so that its top level is ###,
+    and clamped to the ##### limit of the document formatting rules.
+    """
+    parts = []
+    for title, body in sections:
+        content = _normalize_section(title, body)
+        parts.append(f"## {title}\n\n{content}" if content else f"## {title}")
+    return "\n\n".join(parts) + "\n"
@@ -5,11 +5,11 @@ from ai_pipeline_core import (
     ModelName,
     PromptManager,
     get_pipeline_logger,
-    llm,
     pipeline_task,
 )
 
 from ai_simple_research_pipeline.documents.flow import FinalReportDocument
+from ai_simple_research_pipeline.llm_cache import cached_generate
 
 prompt_manager = PromptManager(__file__)
 logger = get_pipeline_logger(__name__)
@@ -36,12 +36,10 @@ async def write_short_report(
     messages = AIMessages([prompt])
 
     # Generate short report using context/messages split for caching
-    result = await llm.generate(
+    content = await cached_generate(
         model=model,
         context=context,
         messages=messages,
     )
 
-    return FinalReportDocument.create(
-        name=FinalReportDocument.FILES.SHORT_REPORT, content=result.content
-    )
+    return FinalReportDocument.create(name=FinalReportDocument.FILES.SHORT_REPORT, content=content)
@@ -0,0 +1,127 @@
+"""Run-scoped, connection-pooled HTTP client for downloads, uploads and webhooks.
+
+``research_pipeline`` opens one pooled ``httpx.AsyncClient`` per run with
+``http_client_scope()``; the delivery tasks borrow it through ``http_client()``
+so signed-URL downloads, uploads and webhook posts reuse keep-alive connections
+instead of paying DNS/TCP/TLS setup per request. Tasks running outside a scope,
+or on another event loop (e.g. submitted to a thread pool), get a one-off client.
+"""
+
+import asyncio
+import importlib.util
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from ai_pipeline_core import get_pipeline_logger
+
+from ai_simple_research_pipeline.settings import settings
+
+logger = get_pipeline_logger(__name__)
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """Counters for requests sent through a pooled client."""
+
+    requests: int = 0
+    errors: int = 0
+    connections_opened: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+
+def _http2_available() -> bool:
+    return settings.http_http2 and importlib.util.find_spec("h2") is not None
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds
+    )
+
+
+class PooledHttpClient:
+    """An ``httpx.AsyncClient`` bound to one event loop, with pool statistics."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.stats = PoolStats()
+        self.http2 = _http2_available()
+        self._started: dict[int, float] = {}
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=_timeout(),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    async def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = self._trace
+        self._started[id(request)] = time.perf_counter()
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        started = self._started.pop(id(response.request), None)
+        self.stats.requests += 1
+        if started is not None:
+            self.stats.total_seconds += time.perf_counter() - started
+        if response.is_error:
+            self.stats.errors += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def log_stats(self) -> None:
+        s = self.stats
+        if not s.requests:
+            return
+        avg_ms = s.total_seconds / s.requests * 1000
+        logger.info(
+            f"HTTP pool ({'HTTP/2' if self.http2 else 'HTTP/1.1'}): {s.requests} requests, "
+            f"{s.connections_opened} connections opened, {s.connections_reused} reused, "
+            f"{s.errors} error responses, {avg_ms:.0f} ms average time to headers"
+        )
+
+
+_current_client: ContextVar[PooledHttpClient | None] = ContextVar(
+    "research_pipeline_http_client", default=None
+)
+
+
+@asynccontextmanager
+async def http_client_scope() -> AsyncGenerator[PooledHttpClient]:
+    """Open a pooled client for the duration of a run and log its statistics at the end."""
+    pooled = PooledHttpClient()
+    token = _current_client.set(pooled)
+    try:
+        yield pooled
+    finally:
+        _current_client.reset(token)
+        await pooled.aclose()
+        pooled.log_stats()
+
+
+@asynccontextmanager
+async def http_client() -> AsyncGenerator[httpx.AsyncClient]:
+    """Yield the run's pooled client, or a one-off client when none is usable here."""
+    pooled = _current_client.get()
+    if pooled is not None and pooled.loop is asyncio.get_running_loop():
+        yield pooled.client
+        return
+    async with httpx.AsyncClient(timeout=_timeout()) as client:
+        yield client
@@ -1,3 +1,4 @@
+import gzip
 import json
 import mimetypes
 import threading
@@ -32,6 +33,7 @@ class _TestHTTPServer(ThreadingHTTPServer):
 
     state: _TestHTTPState
     add_content_disposition: bool
+    add_content_length: bool
 
 
 class _TestHTTPRequestHandler(BaseHTTPRequestHandler):
@@ -51,7 +53,8 @@ class _TestHTTPRequestHandler(BaseHTTPRequestHandler):
         ct = (content_type or "application/octet-stream").split(";")[0]
         self.send_response(200)
         self.send_header("Content-Type", ct)
-        self.send_header("Content-Length", str(len(data)))
+        if server.add_content_length:  # without it the body ends when the connection closes
+            self.send_header("Content-Length", str(len(data)))
         if server.add_content_disposition and filename:
             self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
         self.end_headers()
@@ -96,6 +99,8 @@ class _TestHTTPRequestHandler(BaseHTTPRequestHandler):
         server = cast(_TestHTTPServer, self.server)
         length = int(self.headers.get("Content-Length", "0"))
         body = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
 
         if self.path == "/webhook/status":
             status_data: dict[str, Any]
@@ -170,6 +175,7 @@ def start_test_http_server(
     inputs_dir: str | Path = "test_server_inputs",
     outputs_dir: str | Path = "test_server_outputs",
     add_content_disposition: bool = True,
+    add_content_length: bool = True,
 ) -> tuple[str, _TestHTTPServer, threading.Thread]:
     state = _TestHTTPState(Path(inputs_dir), Path(outputs_dir))
 
@@ -177,6 +183,7 @@ def start_test_http_server(
     # attach state & config to the *server*
     httpd.state = state  # <— critical
     httpd.add_content_disposition = add_content_disposition
+    httpd.add_content_length = add_content_length
 
     t = threading.Thread(target=httpd.serve_forever, name="test-http-server", daemon=True)
     t.start()
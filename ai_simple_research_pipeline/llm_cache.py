@@ -0,0 +1,360 @@
+"""Persistent, content-addressed cache for LLM results.
+
+Task modules call ``cached_generate`` / ``cached_generate_structured`` instead of
+``llm.generate`` / ``llm.generate_structured``. Results are keyed by the model
+name, the output schema and a fingerprint of every context and message item
+(documents by ``sha256``, text by value), so a rerun over byte-identical inputs
+reuses the previous answer instead of paying for it again.
+
+Entries live as JSON files in ``settings.llm_cache_dir`` and are evicted least
+recently used first once the directory grows past ``settings.llm_cache_max_bytes``.
+When ``settings.llm_cache_uri`` is set, entries are also written to that storage
+location and read back from it on a local miss, so caches can be shared between
+workers. Set ``LLM_CACHE_BYPASS=true`` to ignore existing entries (fresh results
+are still written back).
+
+Calls that miss the cache go through ``llm_cassette``, which can record them
+or replay a previous recording (see ``cassettes.py``). Every call, cached or
+not, is recorded in the run's ledger (see ``telemetry.py``). Calls that reach
+the model wait for a slot of ``llm_slots`` when ``settings.llm_max_concurrency``
+(or a runner such as ``batch.py``) sets a limit on concurrent LLM calls, and
+then for the per-model ``rate_limiter`` (see ``rate_limit.py``).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+from ai_pipeline_core import AIMessages, Document, ModelName, get_pipeline_logger, llm
+from ai_pipeline_core.storage import Storage
+from pydantic import BaseModel
+
+from ai_simple_research_pipeline.cassettes import llm_cassette
+from ai_simple_research_pipeline.rate_limit import estimate_prompt_tokens, rate_limiter
+from ai_simple_research_pipeline.settings import settings
+from ai_simple_research_pipeline.telemetry import LLMUsage, current_ledger, response_usage
+
+logger = get_pipeline_logger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters describing cache effectiveness for the current process."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _fingerprint_item(item: Any) -> str:
+    if isinstance(item, Document):
+        return f"doc:{type(item).__name__}:{item.name}:{item.sha256}"
+    if isinstance(item, str):
+        return "text:" + hashlib.sha256(item.encode("utf-8")).hexdigest()
+    # ModelResponse from an earlier turn
+    content = str(getattr(item, "content", item))
+    return "response:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _fingerprint_messages(messages: AIMessages | str | None) -> list[str]:
+    if messages is None:
+        return []
+    if isinstance(messages, str):
+        return [_fingerprint_item(messages)]
+    return [_fingerprint_item(item) for item in messages]
+
+
+def cache_key(
+    model: ModelName,
+    context: AIMessages | None,
+    messages: AIMessages | str,
+    response_format: type[BaseModel] | None = None,
+) -> str:
+    """Return the content-addressed cache key for one LLM call."""
+    schema = response_format.model_json_schema() if response_format else None
+    material = {
+        "version": CACHE_FORMAT_VERSION,
+        "model": model,
+        "schema": schema,
+        "context": _fingerprint_messages(context),
+        "messages": _fingerprint_messages(messages),
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMCache:
+    """Size-bounded LRU cache of LLM results on local disk with an optional storage tier."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int,
+        storage_uri: str = "",
+        enabled: bool = True,
+        bypass: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.storage_uri = storage_uri
+        self.enabled = enabled
+        self.bypass = bypass
+        self.stats = CacheStats()
+        self._index: dict[str, tuple[int, float]] | None = None  # key -> (size, last access)
+        self._storage: Storage | None = None
+        self._inflight: dict[tuple[int, str], asyncio.Future[dict[str, Any]]] = {}
+        self._lock = threading.Lock()  # guards the index across to_thread workers
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> dict[str, tuple[int, float]]:
+        if self._index is None:
+            self._index = {}
+            if self.directory.exists():
+                for path in self.directory.glob("*/*.json"):
+                    stat = path.stat()
+                    self._index[path.stem] = (stat.st_size, stat.st_mtime)
+        return self._index
+
+    def _read_local(self, key: str) -> bytes | None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                data = path.read_bytes()
+                now = time.time()
+                os.utime(path, (now, now))  # mtime doubles as the LRU timestamp across processes
+            except FileNotFoundError:
+                self._load_index().pop(key, None)
+                return None
+            self._load_index()[key] = (len(data), now)
+            return data
+
+    def _write_local(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            self._load_index()[key] = (len(data), time.time())
+            self._evict()
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            self._path(key).unlink(missing_ok=True)
+            del index[key]
+            total -= size
+            self.stats.evictions += 1
+
+    async def _remote(self) -> Storage | None:
+        if not self.storage_uri:
+            return None
+        if self._storage is None:
+            self._storage = await Storage.from_uri(self.storage_uri)
+        return self._storage
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached payload for ``key``, checking local disk then storage."""
+        data = await asyncio.to_thread(self._read_local, key)
+        if data is None:
+            try:
+                remote = await self._remote()
+                if remote and await remote.exists(f"{key}.json"):
+                    data = await remote.read_bytes(f"{key}.json")
+                    await asyncio.to_thread(self._write_local, key, data)
+            except Exception as e:
+                logger.warning(f"LLM cache storage read failed for {key}: {e}")
+                data = None
+        if data is None:
+            return None
+        return json.loads(data)
+
+    async def put(self, key: str, payload: dict[str, Any]) -> None:
+        """Store ``payload`` under ``key`` locally and, if configured, in storage."""
+        data = json.dumps(payload).encode("utf-8")
+        await asyncio.to_thread(self._write_local, key, data)
+        self.stats.writes += 1
+        try:
+            remote = await self._remote()
+            if remote:
+                await remote.write_bytes(f"{key}.json", data)
+        except Exception as e:
+            logger.warning(f"LLM cache storage write failed for {key}: {e}")
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        """Return the cached payload or await ``compute()`` and cache its result.
+
+        Concurrent callers asking for the same key share a single computation.
+        """
+        if not self.enabled:
+            return await compute()
+
+        if not self.bypass:
+            cached = await self.get(key)
+            if cached is not None:
+                self.stats.hits += 1
+                logger.debug(f"LLM cache hit {key[:12]}")
+                return cached
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), key)  # futures cannot be awaited across event loops
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.stats.misses += 1
+        future: asyncio.Future[dict[str, Any]] = loop.create_future()
+        self._inflight[inflight_key] = future
+        try:
+            payload = await compute()
+            await self.put(key, payload)
+            future.set_result(payload)
+            return payload
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[inflight_key]
+
+    def log_summary(self) -> None:
+        """Log hit/miss counters for this process."""
+        if not self.enabled:
+            return
+        s = self.stats
+        logger.info(
+            f"LLM cache: {s.hits} hits, {s.misses} misses ({s.hit_rate:.0%} hit rate), "
+            f"{s.writes} writes, {s.evictions} evictions"
+        )
+
+
+class LLMSlots:
+    """Process-wide limit on concurrent LLM calls; ``limit <= 0`` means unlimited."""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self._semaphores: dict[int, tuple[int, asyncio.Semaphore]] = {}
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncGenerator[None]:
+        if self.limit <= 0:
+            yield
+            return
+        loop_id = id(asyncio.get_running_loop())  # semaphores are bound to one event loop
+        entry = self._semaphores.get(loop_id)
+        if entry is None or entry[0] != self.limit:
+            entry = self._semaphores[loop_id] = (self.limit, asyncio.Semaphore(self.limit))
+        async with entry[1]:
+            yield
+
+
+llm_slots = LLMSlots(settings.llm_max_concurrency)
+
+llm_cache = LLMCache(
+    directory=settings.llm_cache_dir,
+    max_bytes=settings.llm_cache_max_bytes,
+    storage_uri=settings.llm_cache_uri,
+    enabled=settings.llm_cache_enabled,
+    bypass=settings.llm_cache_bypass,
+)
+
+
+async def _generate(
+    key: str,
+    model: ModelName,
+    prompt_tokens: int,
+    compute: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """Serve one LLM call through the cache and cassette and record it in the run ledger.
+
+    ``prompt_tokens`` is the estimated prompt size the rate limiter admits the call with.
+    """
+    called = False
+    wait_seconds = 0.0
+
+    async def call() -> dict[str, Any]:
+        nonlocal called, wait_seconds
+        called = True
+        async with llm_slots.slot(), rate_limiter.request(model, prompt_tokens) as ticket:
+            wait_seconds = ticket.wait_seconds
+            payload = await compute()
+            ticket.usage = LLMUsage.model_validate(payload["usage"])
+        return payload
+
+    started = time.perf_counter()
+    payload = await llm_cache.get_or_compute(key, lambda: llm_cassette.play(key, model, call))
+    usage = LLMUsage.model_validate(payload.get("usage", {}))
+    current_ledger().record(
+        model, usage, time.perf_counter() - started, cached=not called, wait_seconds=wait_seconds
+    )
+    return payload
+
+
+async def cached_generate(
+    model: ModelName,
+    *,
+    context: AIMessages | None = None,
+    messages: AIMessages | str,
+) -> str:
+    """Cached ``llm.generate``; returns the generated text."""
+
+    async def compute() -> dict[str, Any]:
+        response = await llm.generate(model=model, context=context, messages=messages)
+        return {"content": response.content, "usage": response_usage(response).model_dump()}
+
+    key = cache_key(model, context, messages)
+    payload = await _generate(key, model, estimate_prompt_tokens(context, messages), compute)
+    return payload["content"]
+
+
+async def cached_generate_structured(
+    model: ModelName,
+    response_format: type[T],
+    *,
+    context: AIMessages | None = None,
+    messages: AIMessages | str,
+) -> T:
+    """Cached ``llm.generate_structured``; returns the parsed model."""
+
+    async def compute() -> dict[str, Any]:
+        response = await llm.generate_structured(
+            model, response_format, context=context, messages=messages
+        )
+        return {
+            "parsed": response.parsed.model_dump(mode="json"),
+            "usage": response_usage(response).model_dump(),
+        }
+
+    key = cache_key(model, context, messages, response_format)
+    payload = await _generate(key, model, estimate_prompt_tokens(context, messages), compute)
+    return response_format.model_validate(payload["parsed"])
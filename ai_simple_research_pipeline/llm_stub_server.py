@@ -0,0 +1,443 @@
+"""Deterministic OpenAI-compatible stand-in for the LiteLLM proxy.
+
+Point ``OPENAI_BASE_URL`` at this server to run ``research_pipeline`` end to end
+without a real model, e.g. to load-test orchestration, storage and webhooks:
+
+    python -m ai_simple_research_pipeline.llm_stub_server --port 4000 \\
+        --latency lognormal --latency-seconds 0.8 --tokens-per-second 150 --error-rate 0.02
+
+``POST /v1/chat/completions`` answers requests with a ``json_schema`` response
+format with an instance generated from that schema, so ``generate_structured``
+validates (``InitialSummary``, ``DocumentMetadata``, ``Findings``, ...). Other
+requests get Markdown that follows the ``##`` headings named in the prompt.
+Content depends only on the seed and the request body; latency, token-rate
+emulation and injected errors are drawn from a seeded generator.
+``GET /__stats`` returns request, error and token counters.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Literal, cast
+
+from ai_pipeline_core import get_pipeline_logger
+
+logger = get_pipeline_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+MAX_SCHEMA_DEPTH = 12
+
+WORDS = (
+    "platform customers revenue market growth team product pipeline enterprise pricing "
+    "retention adoption partners roadmap infrastructure compliance margin segment traction "
+    "pilot contract expansion integration security runway milestone demand competition"
+).split()
+
+
+@dataclass
+class StubLLMConfig:
+    """Behaviour of the stand-in server."""
+
+    seed: int = 0
+    latency: Literal["fixed", "uniform", "lognormal"] = "fixed"
+    latency_seconds: float = 0.0  # fixed value, uniform mean or lognormal median
+    latency_jitter: float = 0.5  # uniform: +/- fraction of the mean; lognormal: sigma
+    tokens_per_second: float = 0.0  # 0 = return the whole completion at once
+    error_rate: float = 0.0
+    error_statuses: tuple[int, ...] = (429, 500, 503)
+    markdown_paragraphs: int = 3  # per heading in text completions
+
+
+@dataclass
+class StubLLMStats:
+    requests: int = 0
+    structured: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    by_status: dict[str, int] = field(default_factory=dict)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class _Words:
+    """Deterministic filler text drawn from one request's random generator."""
+
+    def __init__(self, rng: random.Random, file_names: list[str]):
+        self.rng = rng
+        self.file_names = file_names
+
+    def words(self, n: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(n))
+
+    def sentence(self, n: int = 12) -> str:
+        text = self.words(n)
+        return text[0].upper() + text[1:] + "."
+
+    def paragraph(self, sentences: int = 4) -> str:
+        return " ".join(self.sentence(self.rng.randint(8, 16)) for _ in range(sentences))
+
+    def for_property(self, name: str, schema: dict[str, Any]) -> str:
+        key = name.lower()
+        fmt = schema.get("format")
+        if fmt == "date" or "date" in key:
+            return f"2025-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}"
+        if fmt == "date-time":
+            return f"2025-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}T12:00:00Z"
+        if fmt == "uri" or key.endswith("url"):
+            return f"https://example.com/{self.words(1)}"
+        if key in {"file", "filename", "original_filename", "name", "source"} and self.file_names:
+            return self.rng.choice(self.file_names)
+        if key in {"id", "slug"}:
+            return f"{self.words(1)}-{self.rng.randint(1, 99)}"
+        if key in {"language", "language_detected", "lang"}:
+            return "en"
+        if "summary" in key or "description" in key:
+            return self.paragraph(3)
+        if key in {"title", "headline"}:
+            return self.words(4).title()
+        return self.sentence(self.rng.randint(6, 14))
+
+
+def instance_for_schema(
+    schema: dict[str, Any],
+    words: _Words,
+    root: dict[str, Any] | None = None,
+    name: str = "",
+    depth: int = 0,
+) -> Any:
+    """Generate a value that validates against a (Pydantic-produced) JSON schema."""
+    root = root if root is not None else schema
+    if depth > MAX_SCHEMA_DEPTH:
+        return None
+    if "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].removeprefix("#/").split("/"):
+            target = target[part]
+        return instance_for_schema(target, words, root, name, depth + 1)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return instance_for_schema(options[0], words, root, name, depth + 1)
+    if "allOf" in schema:
+        return instance_for_schema(schema["allOf"][0], words, root, name, depth + 1)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return words.rng.choice(schema["enum"])
+
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {
+            prop: instance_for_schema(sub, words, root, prop, depth + 1)
+            for prop, sub in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        low = schema.get("minItems", 1)
+        high = schema.get("maxItems", max(low, 3))
+        count = max(low, min(high, 3))
+        items = schema.get("items", {"type": "string"})
+        return [instance_for_schema(items, words, root, name, depth + 1) for _ in range(count)]
+    if kind in {"integer", "number"}:
+        # Stay strictly inside exclusive bounds by a margin
+        margin = 1 if kind == "integer" else 0.01
+        low = schema.get("minimum", schema.get("exclusiveMinimum", -margin) + margin)
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 100 + margin) - margin)
+        if kind == "integer":
+            return words.rng.randint(math.ceil(low), math.floor(high))
+        return min(max(round(words.rng.uniform(low, high), 2), low), high)
+    if kind == "boolean":
+        return words.rng.random() < 0.5
+    if kind == "null":
+        return None
+    text = words.for_property(name, schema)
+    if "maxLength" in schema:
+        text = text[: schema["maxLength"]]
+    return text.ljust(schema.get("minLength", 0), "x")
+
+
+def _message_text(messages: list[dict[str, Any]]) -> str:
+    parts: list[str] = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+    return "\n".join(parts)
+
+
+def markdown_for_prompt(prompt: str, words: _Words, paragraphs: int) -> str:
+    """Markdown with one section per ``##`` heading the last prompt asks for."""
+    headings = [
+        h.strip()
+        for h in re.findall(r"^##\s+(.+)$", prompt, flags=re.MULTILINE)
+        if not h.lower().startswith(("required", "section to write", "report outline"))
+    ]
+    if not headings:
+        return "\n\n".join(words.paragraph() for _ in range(paragraphs)) + "\n"
+    sections = []
+    for heading in dict.fromkeys(headings):
+        body = "\n\n".join(words.paragraph() for _ in range(paragraphs))
+        sections.append(f"## {heading}\n\n{body}")
+    return "\n\n".join(sections) + "\n"
+
+
+def build_completion(body: dict[str, Any], config: StubLLMConfig) -> dict[str, Any]:
+    """Build the deterministic chat completion for one request body."""
+    encoded = json.dumps(body, sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(str(config.seed).encode("utf-8") + encoded).hexdigest()
+    rng = random.Random(digest)
+
+    messages = body.get("messages", [])
+    all_text = _message_text(messages)
+    file_names = sorted(set(re.findall(r"[\w./-]+\.md\b", all_text)))
+    words = _Words(rng, file_names)
+
+    response_format = body.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    if schema is not None:
+        content = json.dumps(instance_for_schema(schema, words))
+    elif response_format.get("type") == "json_object":
+        content = json.dumps({"result": words.sentence()})
+    else:
+        prompt = _message_text(messages[-1:])
+        content = markdown_for_prompt(prompt, words, config.markdown_paragraphs)
+
+    prompt_tokens = estimate_tokens(encoded.decode("utf-8"))
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-stub-{digest[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class _StubLLMServer(ThreadingHTTPServer):
+    """Server holding the stub configuration, its random generator and counters."""
+
+    daemon_threads = True
+    config: StubLLMConfig
+    stats: StubLLMStats
+    rng: random.Random
+    lock: threading.Lock
+
+    def sample_latency(self) -> float:
+        config = self.config
+        with self.lock:
+            if config.latency == "uniform":
+                spread = config.latency_seconds * config.latency_jitter
+                value = self.rng.uniform(
+                    config.latency_seconds - spread, config.latency_seconds + spread
+                )
+            elif config.latency == "lognormal" and config.latency_seconds > 0:
+                value = self.rng.lognormvariate(
+                    math.log(config.latency_seconds), config.latency_jitter
+                )
+            else:
+                value = config.latency_seconds
+        return max(value, 0.0)
+
+    def sample_error(self) -> int | None:
+        with self.lock:
+            if self.config.error_statuses and self.rng.random() < self.config.error_rate:
+                return self.rng.choice(self.config.error_statuses)
+        return None
+
+
+class _StubLLMRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"LLM stub: {format % args}")
+
+    def _send_json(self, obj: dict[str, Any], status: int = 200) -> None:
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, status: int) -> None:
+        server = cast(_StubLLMServer, self.server)
+        with server.lock:
+            server.stats.by_status[str(status)] = server.stats.by_status.get(str(status), 0) + 1
+
+    def do_GET(self) -> None:
+        server = cast(_StubLLMServer, self.server)
+        if self.path.rstrip("/") in {"/v1/models", "/models"}:
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            return
+        if self.path == "/__stats":
+            with server.lock:
+                self._send_json({"config": asdict(server.config), "stats": asdict(server.stats)})
+            return
+        self._send_json({"ok": True, "message": "LLM stub server running"})
+
+    def do_POST(self) -> None:
+        server = cast(_StubLLMServer, self.server)
+        length = int(self.headers.get("Content-Length", "0"))
+        raw = self.rfile.read(length) if length else b""
+        if self.path.rstrip("/") not in {"/v1/chat/completions", "/chat/completions"}:
+            self._send_json({"error": {"message": f"unknown endpoint {self.path}"}}, status=404)
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json({"error": {"message": f"invalid JSON: {e}"}}, status=400)
+            return
+
+        with server.lock:
+            server.stats.requests += 1
+        # Time to first token
+        time.sleep(server.sample_latency())
+
+        status = server.sample_error()
+        if status is not None:
+            with server.lock:
+                server.stats.errors += 1
+            self._count(status)
+            error = {"message": f"injected error {status}", "type": "stub_error", "code": status}
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            data = json.dumps({"error": error}).encode("utf-8")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        completion = build_completion(body, server.config)
+        usage = completion["usage"]
+        with server.lock:
+            server.stats.structured += "response_format" in body
+            server.stats.prompt_tokens += usage["prompt_tokens"]
+            server.stats.completion_tokens += usage["completion_tokens"]
+        self._count(200)
+        if body.get("stream"):
+            self._stream(completion)
+            return
+        if server.config.tokens_per_second > 0:
+            time.sleep(usage["completion_tokens"] / server.config.tokens_per_second)
+        self._send_json(completion)
+
+    def _stream(self, completion: dict[str, Any]) -> None:
+        """Send the completion as SSE chunks paced at ``tokens_per_second``."""
+        server = cast(_StubLLMServer, self.server)
+        content = completion["choices"][0]["message"]["content"]
+        step = CHARS_PER_TOKEN * 8
+        pieces = [content[i : i + step] for i in range(0, len(content), step)] or [""]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        base = {k: completion[k] for k in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+        for i, piece in enumerate(pieces):
+            delta: dict[str, Any] = {"content": piece}
+            if i == 0:
+                delta["role"] = "assistant"
+            chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if server.config.tokens_per_second > 0:
+                time.sleep(estimate_tokens(piece) / server.config.tokens_per_second)
+        final = {
+            **base,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": completion["usage"],
+        }
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+
+
+def start_llm_stub_server(
+    host: str = "127.0.0.1", port: int = 4000, config: StubLLMConfig | None = None
+) -> tuple[str, _StubLLMServer, threading.Thread]:
+    """Start the stand-in server in a daemon thread; ``port=0`` picks a free port."""
+    httpd = _StubLLMServer((host, port), _StubLLMRequestHandler)
+    httpd.config = config or StubLLMConfig()
+    httpd.stats = StubLLMStats()
+    httpd.rng = random.Random(httpd.config.seed)
+    httpd.lock = threading.Lock()
+
+    t = threading.Thread(target=httpd.serve_forever, name="llm-stub-server", daemon=True)
+    t.start()
+    base_url = f"http://{host}:{httpd.server_address[1]}"
+    logger.info(f"LLM stub server running at {base_url}/v1 ({httpd.config})")
+    return base_url, httpd, t
+
+
+def stop_llm_stub_server(server: _StubLLMServer) -> None:
+    """Stop the server started by start_llm_stub_server()."""
+    try:
+        server.shutdown()
+    finally:
+        server.server_close()
+    logger.info(f"LLM stub server stopped: {server.stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--latency-seconds", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--error-statuses",
+        type=lambda v: tuple(int(s) for s in v.split(",")),
+        default=(429, 500, 503),
+    )
+    args = parser.parse_args()
+
+    config = StubLLMConfig(
+        seed=args.seed,
+        latency=args.latency,
+        latency_seconds=args.latency_seconds,
+        latency_jitter=args.latency_jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_statuses=args.error_statuses,
+    )
+    _, server, thread = start_llm_stub_server(args.host, args.port, config)
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        stop_llm_stub_server(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Input-hash manifests that let the runners skip flows whose inputs did not change.
+
+After a flow completes, the runner records a manifest with the ``sha256`` of
+every document the flow consumed, the ``sha256`` of every document it produced
+and a fingerprint of the flow options that influence its outputs. On the next
+run the manifest is rebuilt from what is currently in storage; if it is equal to
+the recorded one, the flow's stored outputs are still valid and the flow is
+skipped. A flow whose config reports inputs without outputs
+(``missing_outputs``, e.g. a standardization file that failed) gets no manifest,
+so the next run retries it.
+
+The same location also records the ``sha256`` of the last document uploaded to
+each output URL, so unchanged outputs are not uploaded again.
+"""
+
+import hashlib
+import json
+from typing import Any
+from urllib.parse import urlsplit
+
+from ai_pipeline_core import Document, DocumentList, FlowConfig, get_pipeline_logger
+from ai_pipeline_core.storage import Storage
+from pydantic import BaseModel, ConfigDict
+
+from ai_simple_research_pipeline.documents.flow import (
+    FinalReportDocument,
+    FlowManifestDocument,
+    InitialSummaryDocument,
+    RetrievalIndexDocument,
+    ReviewFindingDocument,
+    StandardizedFileDocument,
+    UserInputDocument,
+)
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+
+logger = get_pipeline_logger(__name__)
+
+# Options that only affect delivery or scheduling, never the content of flow outputs
+NON_CONTENT_OPTIONS = {
+    "resume",
+    "standardization_concurrency",
+    "review_concurrency",
+    "input_documents_urls",
+    "output_documents_urls",
+    "report_webhook_url",
+    "report_webhook_mode",
+    "report_webhook_gzip",
+    "status_webhook_url",
+    "status_webhook_batch",
+}
+
+UPLOAD_RECORD_NAME = "output_uploads.json"
+
+
+class FlowManifest(BaseModel):
+    """Inputs, options and outputs of one completed flow run."""
+
+    model_config = ConfigDict(frozen=True)
+
+    flow_name: str
+    options_fingerprint: str
+    inputs: dict[str, str]
+    outputs: dict[str, str]
+
+
+class UploadRecord(BaseModel):
+    """``sha256`` of the last document successfully uploaded to each output target."""
+
+    uploads: dict[str, str] = {}
+
+
+class StoredDocumentsConfig(FlowConfig):
+    """Loads every pipeline document type from storage, for manifest checks."""
+
+    INPUT_DOCUMENT_TYPES = [
+        UserInputDocument,
+        InitialSummaryDocument,
+        StandardizedFileDocument,
+        RetrievalIndexDocument,
+        ReviewFindingDocument,
+        FinalReportDocument,
+    ]
+    OUTPUT_DOCUMENT_TYPE = FlowManifestDocument
+
+
+def options_fingerprint(flow_options: ProjectFlowOptions, include: set[str] | None = None) -> str:
+    """Hash the flow options that influence the content of flow outputs.
+
+    With ``include``, only those options are hashed (e.g. the ones one flow reads).
+    """
+    if include is None:
+        data = flow_options.model_dump(mode="json", exclude=NON_CONTENT_OPTIONS)
+    else:
+        data = flow_options.model_dump(mode="json", include=include)
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _hashes(documents: DocumentList) -> dict[str, str]:
+    return {f"{d.canonical_name()}/{d.name}": d.sha256 for d in documents}
+
+
+def compute_manifest(
+    flow: Any, documents: DocumentList, flow_options: ProjectFlowOptions
+) -> FlowManifest:
+    """Build the manifest of ``flow`` from a list holding its inputs and outputs."""
+    input_types = tuple(flow.config.INPUT_DOCUMENT_TYPES)
+    return FlowManifest(
+        flow_name=flow.name,
+        options_fingerprint=options_fingerprint(flow_options),
+        inputs=_hashes(DocumentList([d for d in documents if isinstance(d, input_types)])),
+        outputs=_hashes(documents.filter_by(flow.config.OUTPUT_DOCUMENT_TYPE)),
+    )
+
+
+async def load_stored_documents(documents_uri: str) -> DocumentList:
+    """Load every pipeline document currently in storage."""
+    return await StoredDocumentsConfig.load_documents(documents_uri)
+
+
+async def delete_stale_outputs(
+    documents_uri: str, output_type: type[Document], documents: DocumentList
+) -> list[str]:
+    """Delete stored ``output_type`` documents that are not in ``documents``.
+
+    A flow saves only what it produced, so outputs of an earlier run that the
+    current options no longer produce (e.g. ``full_report.md`` after switching to
+    the ``test`` profile) would otherwise stay in storage, end up in the manifest
+    and be returned, uploaded and reported when the flow is skipped.
+
+    Returns:
+        Names of the deleted documents
+    """
+    storage = await Storage.from_uri(documents_uri)
+    target = storage.with_base(output_type.canonical_name())
+    if not await target.exists(""):
+        return []
+    keep = {doc.name for doc in documents}
+    metadata = (Document.DESCRIPTION_EXTENSION, Document.SOURCES_EXTENSION)
+    objects = await target.list("", recursive=False, include_dirs=False)
+    stale = [o.key for o in objects if not o.key.endswith(metadata) and o.key not in keep]
+    for name in stale:
+        for path in (name, *(f"{name}{extension}" for extension in metadata)):
+            await target.delete(path)
+    if stale:
+        logger.info(f"Deleted {len(stale)} stale {output_type.__name__}s: {', '.join(stale)}")
+    return stale
+
+
+async def _manifest_storage(documents_uri: str) -> Storage:
+    storage = await Storage.from_uri(documents_uri)
+    return storage.with_base(FlowManifestDocument.canonical_name())
+
+
+async def read_manifest(documents_uri: str, flow_name: str) -> FlowManifest | None:
+    """Return the recorded manifest of ``flow_name``, or None if there is none."""
+    storage = await _manifest_storage(documents_uri)
+    name = f"{flow_name}.json"
+    if not await storage.exists(name):
+        return None
+    document = FlowManifestDocument(name=name, content=await storage.read_bytes(name))
+    try:
+        return document.as_pydantic_model(FlowManifest)
+    except ValueError as e:  # pydantic.ValidationError is a ValueError
+        logger.warning(f"Ignoring unreadable manifest {name}: {e}")
+        return None
+
+
+async def write_manifest(documents_uri: str, manifest: FlowManifest) -> None:
+    """Record ``manifest`` for its flow, replacing the previous one."""
+    storage = await _manifest_storage(documents_uri)
+    document = FlowManifestDocument.create(name=f"{manifest.flow_name}.json", content=manifest)
+    await storage.write_bytes(document.name, document.content)
+
+
+async def is_flow_up_to_date(
+    flow: Any,
+    documents_uri: str,
+    flow_options: ProjectFlowOptions,
+    stored: DocumentList | None = None,
+) -> bool:
+    """Check whether the stored outputs of ``flow`` still match its current inputs and options.
+
+    Args:
+        flow: Pipeline flow to check
+        documents_uri: Project storage URI
+        flow_options: Options the flow would run with
+        stored: Documents already loaded from storage, to avoid loading them again
+
+    Returns:
+        True if the recorded manifest equals the one rebuilt from storage
+    """
+    previous = await read_manifest(documents_uri, flow.name)
+    if previous is None or not previous.outputs:
+        return False
+    if stored is None:
+        stored = await load_stored_documents(documents_uri)
+    return compute_manifest(flow, stored, flow_options) == previous
+
+
+async def record_flow_manifest(
+    flow: Any,
+    documents_uri: str,
+    flow_options: ProjectFlowOptions,
+    stored: DocumentList | None = None,
+) -> FlowManifest | None:
+    """Record the manifest of ``flow`` from what is currently in storage.
+
+    If the flow's config has a ``missing_outputs(documents)`` classmethod and it
+    names inputs without outputs, any previous manifest is removed instead and
+    None is returned, so the flow is not considered up to date on the next run.
+    """
+    if stored is None:
+        stored = await load_stored_documents(documents_uri)
+    missing_outputs = getattr(flow.config, "missing_outputs", None)
+    missing: list[str] = missing_outputs(stored) if missing_outputs else []
+    if missing:
+        storage = await _manifest_storage(documents_uri)
+        await storage.delete(f"{flow.name}.json")
+        logger.warning(
+            f"Not recording a manifest for {flow.name}: no outputs for {', '.join(missing)}; "
+            "the next run retries them"
+        )
+        return None
+    manifest = compute_manifest(flow, stored, flow_options)
+    await write_manifest(documents_uri, manifest)
+    return manifest
+
+
+def upload_key(name: str, url: str) -> str:
+    """Identify an upload target independently of its (per-run) URL signature."""
+    parts = urlsplit(url)
+    return f"{name}@{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+async def read_upload_record(documents_uri: str) -> UploadRecord:
+    """Return the digests of the last successful output uploads of this project."""
+    storage = await _manifest_storage(documents_uri)
+    if not await storage.exists(UPLOAD_RECORD_NAME):
+        return UploadRecord()
+    document = FlowManifestDocument(
+        name=UPLOAD_RECORD_NAME, content=await storage.read_bytes(UPLOAD_RECORD_NAME)
+    )
+    try:
+        return document.as_pydantic_model(UploadRecord)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable upload record: {e}")
+        return UploadRecord()
+
+
+async def write_upload_record(documents_uri: str, record: UploadRecord) -> None:
+    """Replace the recorded output upload digests of this project."""
+    storage = await _manifest_storage(documents_uri)
+    document = FlowManifestDocument.create(name=UPLOAD_RECORD_NAME, content=record)
+    await storage.write_bytes(document.name, document.content)
@@ -0,0 +1,181 @@
+"""Local text extraction for PDF inputs.
+
+Raw PDFs sent to the model as binary documents are the largest input-token cost
+of the summary and standardization flows. When ``pymupdf`` is installed
+(``pip install -e ".[pdf]"``), ``expand_pdf`` replaces a PDF input with:
+
+* ``<file>.pdf.md`` - the text of every page with a usable text layer, with
+  page markers, and
+* ``<file>.pdf.page-NNN.jpg`` - one rendered image per page without one
+  (scanned pages, slides made of pictures), at most
+  ``settings.pdf_image_max_side`` pixels on the longer side.
+
+A page counts as text when it has at least ``settings.pdf_min_page_chars``
+mostly readable characters and is not dominated by images. The Markdown part
+names the source file and lists the attached page images, so the model treats
+the parts as one source.
+
+Extractions are cached on disk by the PDF's ``sha256`` and the extraction
+settings (``settings.pdf_extraction_cache_dir``). Without ``pymupdf``, with
+``PDF_EXTRACTION_ENABLED=false`` or when a PDF cannot be read, the PDF is sent
+unchanged.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import string
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from ai_pipeline_core import Document, get_pipeline_logger
+
+from ai_simple_research_pipeline.settings import settings
+
+logger = get_pipeline_logger(__name__)
+
+EXTRACTION_FORMAT_VERSION = 1
+READABLE_RATIO = 0.6  # share of letters, digits and punctuation in a real text layer
+IMAGE_COVERAGE = 0.5  # pages mostly covered by images need more text to count as text
+JPEG_QUALITY = 80
+
+
+@dataclass(slots=True)
+class PdfExtraction:
+    """Text of the text pages and the numbers of the pages rendered as images."""
+
+    pages: int
+    text_pages: list[tuple[int, str]]
+    image_pages: list[int]
+
+
+def pdf_extraction_available() -> bool:
+    return settings.pdf_extraction_enabled and importlib.util.find_spec("pymupdf") is not None
+
+
+def is_text_page(text: str, image_coverage: float, min_chars: int) -> bool:
+    """Whether a page's text layer can stand in for the page itself."""
+    stripped = "".join(text.split())
+    if image_coverage >= IMAGE_COVERAGE:
+        min_chars *= 4  # a caption on a chart or slide picture is not the page's content
+    if len(stripped) < min_chars:
+        return False
+    readable = sum(c.isalnum() or c in string.punctuation for c in stripped)
+    return readable / len(stripped) >= READABLE_RATIO
+
+
+def extract_pdf(
+    content: bytes, min_chars: int, max_side: int
+) -> tuple[PdfExtraction, dict[int, bytes]]:
+    """Classify every page and render the image pages; returns the images by page number."""
+    import pymupdf
+
+    text_pages: list[tuple[int, str]] = []
+    images: dict[int, bytes] = {}
+    with pymupdf.open(stream=content, filetype="pdf") as pdf:
+        for number, page in enumerate(pdf.pages(), start=1):
+            text = page.get_text("text", sort=True).strip()
+            area = abs(page.rect)
+            covered = sum(
+                abs(pymupdf.Rect(info["bbox"]) & page.rect) for info in page.get_image_info()
+            )
+            coverage = min(covered / area, 1.0) if area else 0.0
+            if is_text_page(text, coverage, min_chars):
+                text_pages.append((number, text))
+                continue
+            zoom = max_side / max(page.rect.width, page.rect.height, 1)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            images[number] = pixmap.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+        pages = len(pdf)
+    return PdfExtraction(pages, text_pages, sorted(images)), images
+
+
+def _cache_key(document: Document) -> str:
+    material = (
+        f"{EXTRACTION_FORMAT_VERSION}:{document.sha256}:"
+        f"{settings.pdf_min_page_chars}:{settings.pdf_image_max_side}"
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _load_or_extract(document: Document) -> tuple[PdfExtraction, dict[int, bytes]]:
+    directory = Path(settings.pdf_extraction_cache_dir) / _cache_key(document)
+    manifest = directory / "extraction.json"
+    if manifest.exists():
+        data: dict[str, Any] = json.loads(manifest.read_text(encoding="utf-8"))
+        extraction = PdfExtraction(
+            pages=data["pages"],
+            text_pages=[(n, text) for n, text in data["text_pages"]],
+            image_pages=data["image_pages"],
+        )
+        images = {n: (directory / f"page-{n:03d}.jpg").read_bytes() for n in extraction.image_pages}
+        return extraction, images
+
+    extraction, images = extract_pdf(
+        document.content, settings.pdf_min_page_chars, settings.pdf_image_max_side
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    for n, image in images.items():
+        (directory / f"page-{n:03d}.jpg").write_bytes(image)
+    tmp = manifest.with_suffix(".tmp")
+    tmp.write_text(json.dumps(asdict(extraction)), encoding="utf-8")
+    tmp.replace(manifest)  # written last, so a partial extraction is never read back
+    return extraction, images
+
+
+def _image_name(document: Document, page: int) -> str:
+    return f"{document.name}.page-{page:03d}.jpg"
+
+
+def render_text_part(document: Document, extraction: PdfExtraction) -> str:
+    """Markdown holding the text pages of ``document`` and naming its image pages."""
+    lines = [f"# {document.name} (text extracted locally from {extraction.pages} pages)", ""]
+    if extraction.image_pages:
+        attached = ", ".join(f"`{_image_name(document, n)}`" for n in extraction.image_pages)
+        lines += [
+            f"Pages without a text layer are attached as images: {attached}. "
+            f"Treat this text and those images as the single source file `{document.name}`.",
+            "",
+        ]
+    images = set(extraction.image_pages)
+    text_by_page = dict(extraction.text_pages)
+    for n in range(1, extraction.pages + 1):
+        if n in images:
+            lines += [f"<!-- page {n}: see {_image_name(document, n)} -->", ""]
+        elif n in text_by_page:
+            lines += [f"<!-- page {n} -->", text_by_page[n], ""]
+    return "\n".join(lines).rstrip() + "\n"
+
+
+async def expand_pdf(document: Document) -> list[Document]:
+    """The parts to send to the model in place of ``document``.
+
+    Non-PDF documents, and every document when extraction is unavailable, are
+    returned as ``[document]``. Parts have the same document type as ``document``.
+    """
+    if not document.is_pdf or not pdf_extraction_available():
+        return [document]
+    try:
+        extraction, images = await asyncio.to_thread(_load_or_extract, document)
+    except Exception as e:
+        logger.warning(f"PDF extraction failed for {document.name}, sending it as is: {e}")
+        return [document]
+
+    document_type = type(document)
+    parts: list[Document] = [
+        document_type.create(
+            name=f"{document.name}.md", content=render_text_part(document, extraction)
+        )
+    ]
+    parts += [
+        document_type.create(name=_image_name(document, n), content=images[n])
+        for n in extraction.image_pages
+    ]
+    size = sum(part.size for part in parts)
+    logger.debug(
+        f"Extracted {document.name}: {len(extraction.text_pages)} text pages, "
+        f"{len(extraction.image_pages)} image pages, {document.size} -> {size} bytes"
+    )
+    return parts
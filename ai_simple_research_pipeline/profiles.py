@@ -0,0 +1,82 @@
+"""Execution profiles selected by ``ProjectFlowOptions.mode``.
+
+Each mode maps to one row of ``MODE_PROFILES``. The row supplies the default
+of every option it names: models, input truncation, report mode, concurrency
+and which optional outputs (project descriptions, full report) are generated.
+Options given explicitly (arguments, CLI flags or environment variables) still
+override the profile.
+"""
+
+from typing import Literal
+
+from ai_pipeline_core import Document, ModelName
+from pydantic import BaseModel, ConfigDict
+
+Mode = Literal["test", "quick", "full"]
+
+TRUNCATION_MARKER = "\n\n[... input truncated ...]\n"
+
+
+class ModeProfile(BaseModel):
+    """Option defaults applied for one ``mode``."""
+
+    model_config = ConfigDict(frozen=True)
+
+    core_model: ModelName
+    small_model: ModelName
+    max_input_chars: int  # per text input file; 0 = no limit
+    report_mode: Literal["single", "sectioned"]
+    standardization_concurrency: int
+    review_concurrency: int
+    descriptions: bool
+    full_report: bool
+
+
+MODE_PROFILES: dict[Mode, ModeProfile] = {
+    # Smoke runs: cheapest models, truncated inputs, no descriptions, short report only
+    "test": ModeProfile(
+        core_model="gemini-2.5-flash-lite",
+        small_model="gemini-2.5-flash-lite",
+        max_input_chars=20_000,
+        report_mode="single",
+        standardization_concurrency=4,
+        review_concurrency=4,
+        descriptions=False,
+        full_report=False,
+    ),
+    "quick": ModeProfile(
+        core_model="gemini-2.5-flash",
+        small_model="gemini-2.5-flash-lite",
+        max_input_chars=0,
+        report_mode="single",
+        standardization_concurrency=8,
+        review_concurrency=8,
+        descriptions=True,
+        full_report=True,
+    ),
+    # Strongest models; the full report is written section by section
+    "full": ModeProfile(
+        core_model="gemini-2.5-pro",
+        small_model="gemini-2.5-flash",
+        max_input_chars=0,
+        report_mode="sectioned",
+        standardization_concurrency=8,
+        review_concurrency=8,
+        descriptions=True,
+        full_report=True,
+    ),
+}
+
+
+def truncate_input(document: Document, max_chars: int) -> Document:
+    """Return ``document`` cut to ``max_chars`` characters if it is a longer text file.
+
+    Binary inputs (PDFs, images) are returned unchanged. Truncation is
+    deterministic, so the ``sha256`` of a truncated input is stable across runs.
+    """
+    if not max_chars or not document.is_text:
+        return document
+    text = document.text
+    if len(text) <= max_chars:
+        return document
+    return type(document).create(name=document.name, content=text[:max_chars] + TRUNCATION_MARKER)
@@ -0,0 +1,309 @@
+"""Adaptive, token-aware rate limiter for LLM calls.
+
+Every LLM call that reaches the model (cache hits and cassette replays do not)
+passes through ``rate_limiter``. For each model it keeps a sliding one-minute
+window of granted requests and their tokens and makes a call wait while the
+window is full, so bursts from parallel flows and projects are spread out
+instead of turning into provider 429s and the framework's fixed retry delay.
+
+* Limits come from ``settings.llm_rate_limits``, e.g.
+  ``LLM_RATE_LIMITS='{"gemini-2.5-flash": {"rpm": 1000, "tpm": 4000000}}'``.
+  Models without a configured limit are not held back until the provider
+  answers 429; the limit is then learned from the window at that moment.
+  Once the scale is back at 100%, each successful call raises a learned
+  limit a little, so a limit learned from a quiet moment does not stay low.
+* The size of a request is estimated before sending from its documents and
+  messages, plus the model's average completion length. The estimate is
+  corrected by the observed ratio of actual to estimated prompt tokens, and
+  the window is updated with the actual usage once the response arrives.
+* A rate-limit error (HTTP 429), or a call far slower than the model's usual
+  seconds per output token (the framework retried it internally), halves the
+  model's effective limits and, for errors, pauses the model briefly. A slow
+  call never sets a limit by itself. Every successful call restores a little
+  of the limit.
+
+Queue depth, wait time and throttles per model are available from
+``rate_limiter.stats()``; the wait of each call is also recorded in the run's
+telemetry ledger.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from ai_pipeline_core import AIMessages, Document, get_pipeline_logger
+
+from ai_simple_research_pipeline.settings import settings
+from ai_simple_research_pipeline.telemetry import LLMUsage
+
+logger = get_pipeline_logger(__name__)
+
+WINDOW_SECONDS = 60.0
+CHARS_PER_TOKEN = 4
+PDF_BYTES_PER_TOKEN = 100  # pages are sent as images plus text, far denser than raw bytes
+IMAGE_TOKENS = 1000
+DEFAULT_COMPLETION_TOKENS = 1000
+
+MIN_SCALE = 0.05
+DECREASE_FACTOR = 0.5
+INCREASE_STEP = 0.05
+DECREASE_INTERVAL_SECONDS = 5.0  # concurrent failures of one burst count as one signal
+MAX_COOLDOWN_SECONDS = 60.0
+EMA_ALPHA = 0.2
+
+
+def _ema(current: float | None, value: float) -> float:
+    return value if current is None else current + EMA_ALPHA * (value - current)
+
+
+def _item_tokens(item: Any) -> int:
+    if isinstance(item, Document):
+        if item.is_text:
+            return item.size // CHARS_PER_TOKEN
+        if item.is_pdf:
+            return item.size // PDF_BYTES_PER_TOKEN
+        return IMAGE_TOKENS
+    if isinstance(item, str):
+        return len(item) // CHARS_PER_TOKEN
+    return len(str(getattr(item, "content", item))) // CHARS_PER_TOKEN
+
+
+def estimate_prompt_tokens(context: AIMessages | None, messages: AIMessages | str) -> int:
+    """Rough prompt size of one call, from document sizes and message lengths."""
+    items = [*(context or []), *([messages] if isinstance(messages, str) else messages)]
+    return max(1, sum(_item_tokens(item) for item in items))
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether ``error``, or an exception it was raised from, is an HTTP 429 response.
+
+    The framework raises ``LLMError`` from the provider's error once its retries
+    are exhausted; OpenAI-compatible clients carry ``status_code``, httpx errors a
+    ``response``.
+    """
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        status = getattr(current, "status_code", None)
+        if status is None:
+            status = getattr(getattr(current, "response", None), "status_code", None)
+        if status == 429:
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+@dataclass
+class ModelRateStats:
+    """Counters of one model's limiter, as reported by ``RateLimiter.stats``."""
+
+    requests: int = 0
+    throttles: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    rpm_limit: float = 0.0
+    tpm_limit: float = 0.0
+    scale: float = 1.0
+
+
+@dataclass
+class _ModelState:
+    rpm: float = 0.0  # configured or learned; 0 = not limited
+    tpm: float = 0.0
+    learned: bool = False
+    scale: float = 1.0
+    grants: deque[list[float]] = field(default_factory=deque)  # [granted at, tokens]
+    blocked_until: float = 0.0
+    consecutive_errors: int = 0
+    last_decrease: float = float("-inf")
+    prompt_ratio: float | None = None
+    completion_tokens: float | None = None
+    seconds_per_token: float | None = None
+    stats: ModelRateStats = field(default_factory=ModelRateStats)
+
+    def _prune(self, now: float) -> None:
+        while self.grants and self.grants[0][0] <= now - WINDOW_SECONDS:
+            self.grants.popleft()
+
+    def delay(self, now: float, tokens: float) -> float:
+        """Seconds until a request of ``tokens`` fits in the window; 0 when it fits now."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._prune(now)
+        if not self.grants:
+            return 0.0  # always admit one request, even one larger than the token limit
+        rpm = max(1, int(self.rpm * self.scale)) if self.rpm else 0
+        if rpm and len(self.grants) >= rpm:
+            return self.grants[-rpm][0] + WINDOW_SECONDS - now
+        tpm = self.tpm * self.scale
+        used = sum(tokens for _, tokens in self.grants)
+        if tpm and used + tokens > tpm:
+            for granted_at, granted in self.grants:
+                used -= granted
+                if used + tokens <= tpm:
+                    return granted_at + WINDOW_SECONDS - now
+        return 0.0
+
+    def decrease(self, now: float, learn: bool = False) -> None:
+        if learn and not self.rpm:  # learn a limit from what the provider just refused
+            self._prune(now)
+            self.rpm = max(1.0, float(len(self.grants)))
+            self.tpm = max(1.0, sum(tokens for _, tokens in self.grants))
+            self.learned = True
+        if now - self.last_decrease >= DECREASE_INTERVAL_SECONDS:
+            self.scale = max(MIN_SCALE, self.scale * DECREASE_FACTOR)
+            self.last_decrease = now
+        self.stats.throttles += 1
+
+    def increase(self) -> None:
+        if self.scale < 1.0:
+            self.scale = min(1.0, self.scale + INCREASE_STEP)
+        elif self.learned:  # probe above a limit that was only a snapshot of the window
+            self.rpm += max(1.0, self.rpm * INCREASE_STEP)
+            self.tpm += self.tpm * INCREASE_STEP
+
+
+class RateLimiter:
+    """Per-model requests-per-minute and tokens-per-minute limiter with AIMD adaptation."""
+
+    def __init__(
+        self,
+        limits: dict[str, dict[str, int]] | None = None,
+        stall_seconds: float = 8.0,
+        cooldown_seconds: float = 5.0,
+    ):
+        self.limits = limits or {}
+        self.stall_seconds = stall_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._models: dict[str, _ModelState] = {}
+        self._locks: dict[tuple[int, str], asyncio.Lock] = {}
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            limit = self.limits.get(model, {})
+            state = self._models[model] = _ModelState(
+                rpm=float(limit.get("rpm", 0)), tpm=float(limit.get("tpm", 0))
+            )
+        return state
+
+    def _lock(self, model: str) -> asyncio.Lock:
+        key = (id(asyncio.get_running_loop()), model)  # locks are bound to one event loop
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def estimate(self, model: str, prompt_tokens: int) -> float:
+        """Tokens a request is expected to use, corrected by what the model reported so far."""
+        state = self._state(model)
+        completion = state.completion_tokens or DEFAULT_COMPLETION_TOKENS
+        return prompt_tokens * (state.prompt_ratio or 1.0) + completion
+
+    @asynccontextmanager
+    async def request(self, model: str, prompt_tokens: int) -> AsyncGenerator["RateTicket"]:
+        """Wait until ``model`` has capacity for the request, then let it run.
+
+        Set ``ticket.usage`` inside the block so the window and the estimates
+        are updated with the actual token counts.
+        """
+        state = self._state(model)
+        stats = state.stats
+        ticket = RateTicket(prompt_tokens, self.estimate(model, prompt_tokens))
+
+        started = time.monotonic()
+        stats.queue_depth += 1
+        stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+        try:
+            async with self._lock(model):  # waiters are served in arrival order
+                while (delay := state.delay(time.monotonic(), ticket.tokens)) > 0:
+                    await asyncio.sleep(delay)
+                grant = [time.monotonic(), ticket.tokens]
+                state.grants.append(grant)
+        finally:
+            stats.queue_depth -= 1
+        ticket.wait_seconds = time.monotonic() - started
+        stats.requests += 1
+        stats.wait_seconds += ticket.wait_seconds
+        stats.max_wait_seconds = max(stats.max_wait_seconds, ticket.wait_seconds)
+
+        sent = time.monotonic()
+        try:
+            yield ticket
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self._on_rate_limited(model, state)
+            raise
+        self._on_success(state, ticket, grant, time.monotonic() - sent)
+
+    def _on_rate_limited(self, model: str, state: _ModelState) -> None:
+        now = time.monotonic()
+        state.decrease(now, learn=True)
+        cooldown = self.cooldown_seconds * 2**state.consecutive_errors
+        state.blocked_until = max(state.blocked_until, now + min(cooldown, MAX_COOLDOWN_SECONDS))
+        state.consecutive_errors += 1
+        logger.warning(
+            f"{model} is rate limited; limiting it to {state.scale:.0%} of "
+            f"{state.rpm:.0f} rpm / {state.tpm:.0f} tpm"
+        )
+
+    def _on_success(
+        self, state: _ModelState, ticket: "RateTicket", grant: list[float], latency: float
+    ) -> None:
+        state.consecutive_errors = 0
+        usage = ticket.usage
+        if usage is None or not usage.prompt_tokens:
+            state.increase()
+            return
+        grant[1] = usage.prompt_tokens + usage.completion_tokens
+        state.prompt_ratio = _ema(state.prompt_ratio, usage.prompt_tokens / ticket.prompt_tokens)
+        state.completion_tokens = _ema(state.completion_tokens, usage.completion_tokens)
+
+        output_tokens = max(usage.completion_tokens, 1)
+        expected = (state.seconds_per_token or 0.0) * output_tokens
+        if state.seconds_per_token and latency > 2 * expected + self.stall_seconds:
+            # Retried internally after a 429 or a timeout: back off, but learn no limit from it
+            state.decrease(time.monotonic())
+            return
+        state.seconds_per_token = _ema(state.seconds_per_token, latency / output_tokens)
+        state.increase()
+
+    def stats(self) -> dict[str, ModelRateStats]:
+        for state in self._models.values():
+            state.stats.rpm_limit = state.rpm
+            state.stats.tpm_limit = state.tpm
+            state.stats.scale = round(state.scale, 3)
+        return {model: state.stats for model, state in sorted(self._models.items())}
+
+    def log_summary(self) -> None:
+        """Log requests, waits and throttles per model for this process."""
+        for model, s in self.stats().items():
+            if not s.wait_seconds and not s.throttles:
+                continue
+            logger.info(
+                f"LLM rate limiter {model}: {s.requests} requests, {s.throttles} throttles, "
+                f"waited {s.wait_seconds:.1f}s in total (max {s.max_wait_seconds:.1f}s, "
+                f"max queue {s.max_queue_depth}), now at {s.scale:.0%} of "
+                f"{s.rpm_limit:.0f} rpm / {s.tpm_limit:.0f} tpm"
+            )
+
+
+@dataclass
+class RateTicket:
+    """One admitted request: its estimates, how long it waited and, once known, its usage."""
+
+    prompt_tokens: int
+    tokens: float
+    wait_seconds: float = 0.0
+    usage: LLMUsage | None = None
+
+
+rate_limiter = RateLimiter(
+    limits=settings.llm_rate_limits,
+    stall_seconds=settings.llm_rate_limit_stall_seconds,
+    cooldown_seconds=settings.llm_rate_limit_cooldown_seconds,
+)
@@ -1,10 +1,14 @@
-from __future__ import annotations
-
 import asyncio
+import base64
+import gzip
+import hashlib
+import json
 import random
 import re
 import string
-from dataclasses import dataclass
+import tempfile
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
@@ -12,6 +16,7 @@ from urllib.parse import unquote, urlparse
 
 import httpx
 from ai_pipeline_core import (
+    Document,
     DocumentList,
     FlowDocument,
     get_pipeline_logger,
@@ -25,81 +30,211 @@ from ai_pipeline_core.storage.storage import GcsStorage
 from prefect.client.schemas import State
 from prefect.client.schemas.objects import FlowRun
 from prefect.runtime import deployment, flow_run
+from pydantic import BaseModel
 
 from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
 from ai_simple_research_pipeline.flows import FLOWS
+from ai_simple_research_pipeline.http_client import http_client, http_client_scope
 from ai_simple_research_pipeline.http_server import start_test_http_server, stop_test_http_server
+from ai_simple_research_pipeline.llm_cache import llm_cache
+from ai_simple_research_pipeline.manifest import (
+    UploadRecord,
+    is_flow_up_to_date,
+    load_stored_documents,
+    read_upload_record,
+    record_flow_manifest,
+    upload_key,
+    write_upload_record,
+)
+from ai_simple_research_pipeline.rate_limit import rate_limiter
+from ai_simple_research_pipeline.settings import settings
+from ai_simple_research_pipeline.status_webhooks import StatusDispatcher
+from ai_simple_research_pipeline.telemetry import run_ledger
 
 logger = get_pipeline_logger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-@pipeline_task(
-    retries=3, retry_delay_seconds=60, trace_ignore_inputs=["documents"], trace_level="debug"
-)
-async def send_report_webhook(webhook_url: str, project_name: str, documents: DocumentList):
+
+def _report_document_entry(document: Document, storage: Storage, mode: str) -> dict[str, Any]:
+    if mode == "inline":
+        return document.model_dump(mode="json")
+    return {
+        "name": document.name,
+        "canonical_name": document.canonical_name(),
+        "mime_type": document.mime_type,
+        "size": document.size,
+        "sha256": document.sha256,
+        "url": storage.with_base(document.canonical_name()).url_for(document.name),
+    }
+
+
+async def build_report_webhook_request(
+    project_name: str, documents_uri: str, documents: DocumentList, flow_options: ProjectFlowOptions
+) -> tuple[bytes, dict[str, str]]:
+    """Serialize the report webhook payload once, ready to be POSTed (and retried) as is.
+
+    In ``reference`` mode documents are described by name, size, sha256 and storage
+    URL instead of being inlined; ``report_webhook_gzip`` compresses the body.
+    """
+    storage = await Storage.from_uri(documents_uri)
+    mode = flow_options.report_webhook_mode
     payload = {
         "project_name": project_name,
         "flow_run_id": flow_run.get_id(),
         "deployment_id": deployment.get_id(),
-        "new_documents": [d.model_dump(mode="json") for d in documents],
+        "documents_mode": mode,
+        "profile": {"mode": flow_options.mode, **flow_options.profile().model_dump()},
+        "new_documents": [_report_document_entry(d, storage, mode) for d in documents],
     }
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(webhook_url, json=payload, follow_redirects=True)
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if flow_options.report_webhook_gzip:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+@pipeline_task(retries=3, retry_delay_seconds=60, trace_ignore_inputs=["body"], trace_level="debug")
+async def send_report_webhook(webhook_url: str, body: bytes, headers: dict[str, str]):
+    async with http_client() as client:
+        r = await client.post(webhook_url, content=body, headers=headers, follow_redirects=True)
         r.raise_for_status()
+    logger.info(f"Report webhook delivered ({len(body)} bytes)")
 
 
-@pipeline_task(retries=3, retry_delay_seconds=60, trace_level="debug")
-async def send_prefect_status(webhook_url: str, status: dict[str, Any]):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(webhook_url, json=status, follow_redirects=True)
-        r.raise_for_status()
+class DownloadedFile(BaseModel):
+    """Metadata of an input document downloaded into project storage."""
+
+    name: str
+    size: int
+    sha256: str
+
+
+def _download_filename(url: str, response: httpx.Response) -> str:
+    cd = response.headers.get("Content-Disposition", "")
+    filename: Optional[str] = None
+
+    m = re.search(r"""filename\*\s*=\s*UTF-8''([^;\r\n]+)""", cd, flags=re.I)
+    if m:
+        filename = unquote(m.group(1))
+    else:
+        m = re.search(r'filename\s*=\s*"([^"]+)"', cd, flags=re.I)
+        filename = m.group(1) if m else Path(urlparse(str(response.request.url)).path).name or None
+
+    if not filename:
+        raise ValueError(f"No filename for url={url}, headers={dict(response.headers)}")
+
+    return Path(filename).name  # prevent traversal
+
+
+class _OversizeDownload(BaseModel):
+    """A download stopped because it was larger than the download limit."""
+
+    name: str
+    size: int
+    declared: bool
 
 
 @pipeline_task(retries=3, retry_delay_seconds=60, trace_level="debug")
-async def download_input_document(url: str) -> tuple[str, bytes]:
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(url, follow_redirects=True)
-        r.raise_for_status()
+async def _stream_input_document(
+    url: str, documents: str, canonical_name: str, max_bytes: int
+) -> DownloadedFile | _OversizeDownload:
+    """Stream ``url`` into ``documents/canonical_name`` and return only its metadata.
+
+    The body is hashed while it is spooled to a temporary file (in memory up to
+    ``settings.http_download_spool_bytes``), then read back once to write it to
+    storage, which only takes whole bodies; it is not held in the response and
+    the task result as well. A body above ``max_bytes``, by Content-Length or by
+    the running count, is not read further and is returned as ``_OversizeDownload``.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=settings.http_download_spool_bytes) as spool:
+        async with http_client() as client, client.stream("GET", url, follow_redirects=True) as r:
+            r.raise_for_status()
+            filename = _download_filename(url, r)
+            declared = r.headers.get("Content-Length", "")
+            if declared.isdigit() and int(declared) > max_bytes:
+                return _OversizeDownload(name=filename, size=int(declared), declared=True)
+            async for chunk in r.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    return _OversizeDownload(name=filename, size=size, declared=False)
+                digest.update(chunk)
+                spool.write(chunk)
+
+        spool.seek(0)
+        storage = await Storage.from_uri(documents)
+        await storage.with_base(canonical_name).write_bytes(filename, spool.read())
 
-        cd = r.headers.get("Content-Disposition", "")
-        filename: Optional[str] = None
+    sha256 = base64.b32encode(digest.digest()).decode("ascii").rstrip("=")
+    logger.info(f"Downloaded {filename} ({size} bytes)")
+    return DownloadedFile(name=filename, size=size, sha256=sha256)
 
-        m = re.search(r"""filename\*\s*=\s*UTF-8''([^;\r\n]+)""", cd, flags=re.I)
-        if m:
-            filename = unquote(m.group(1))
-        else:
-            m = re.search(r'filename\s*=\s*"([^"]+)"', cd, flags=re.I)
-            filename = m.group(1) if m else Path(urlparse(str(r.request.url)).path).name or None
 
-        if not filename:
-            raise ValueError(f"No filename for url={url}, headers={dict(r.headers)}")
+async def download_input_document(url: str, documents: str, canonical_name: str) -> DownloadedFile:
+    """Download ``url`` into ``documents/canonical_name`` and return its metadata.
+
+    Raises:
+        ValueError: If the document is larger than ``settings.http_download_max_bytes``.
+            It is raised here, outside the retried task, so an oversize input fails
+            the run at once instead of being downloaded again.
+    """
+    max_bytes = settings.http_download_max_bytes
+    result = await _stream_input_document(url, documents, canonical_name, max_bytes)
+    if isinstance(result, _OversizeDownload):
+        if result.declared:
+            raise ValueError(f"{result.name} is {result.size} bytes, above the {max_bytes} limit")
+        raise ValueError(f"{result.name} exceeds the {max_bytes} byte download limit")
+    return result
 
-        filename = Path(filename).name  # prevent traversal
-        logger.info(f"Downloaded {filename} ({len(r.content)} bytes)")
-        return filename, r.content
+
+async def _iter_chunks(content: bytes) -> AsyncIterator[bytes]:
+    """Slices of ``content`` for a chunked request body, without copying it whole."""
+    view = memoryview(content)
+    for offset in range(0, len(view), UPLOAD_CHUNK_SIZE):
+        yield bytes(view[offset : offset + UPLOAD_CHUNK_SIZE])
 
 
 @pipeline_task(retries=3, retry_delay_seconds=60, trace_level="debug")
-async def upload_output_document(url: str, document: FlowDocument):
-    headers = {"Content-Type": document.mime_type} if document.mime_type else {}
-    async with httpx.AsyncClient(timeout=60) as client:
-        r = await client.put(url, content=document.content, headers=headers)
+async def upload_output_document(
+    url: str,
+    document: FlowDocument,
+    headers: dict[str, str] | None = None,
+    content_md5: bool = False,
+):
+    """PUT ``document`` to ``url``, with ``Content-MD5`` only when ``content_md5`` is set.
+
+    Documents hold their content in memory and project storage can only be read
+    whole, so the body is not streamed from storage. It is sent from the
+    document's content in ``UPLOAD_CHUNK_SIZE`` slices, which avoids another
+    full copy of the body in the request.
+    """
+    content = document.content
+    request_headers = {"Content-Length": str(len(content))}
+    if document.mime_type:
+        request_headers["Content-Type"] = document.mime_type
+    if content_md5:
+        request_headers["Content-MD5"] = base64.b64encode(hashlib.md5(content).digest()).decode()
+    request_headers.update(headers or {})
+    async with http_client() as client:
+        # Chunked body with an explicit length: signed-URL endpoints reject chunked encoding
+        r = await client.put(url, content=_iter_chunks(content), headers=request_headers)
         r.raise_for_status()
+    logger.info(f"Uploaded {document.name} ({len(content)} bytes)")
 
 
 @dataclass(slots=True)
 class StatusWebhookHook:
-    """Ordered, non-blocking status webhook sender for Prefect hooks."""
+    """Prefect state hook that queues status webhooks on the run's dispatcher."""
 
     project_name: str
-    webhook_url: str
+    dispatcher: StatusDispatcher
     step: int
     total_steps: int
-    _chain: Any = None  # internal sequencing
 
     async def __call__(self, _flow, fr: FlowRun, _state: State):
-        if not self.webhook_url:
-            return
         info = fr.model_dump(exclude={"parameters"}, mode="json")
         if "data" in info.get("state", {}):
             del info["state"]["data"]
@@ -119,13 +254,68 @@ class StatusWebhookHook:
             "progress": progress,
             "data": info,
         }
-        logger.info(f"Queueing status webhook -> {self.webhook_url}")
-        self._chain = send_prefect_status.submit(
-            self.webhook_url,
-            payload,
-            return_state=True,
-            wait_for=[self._chain] if self._chain else None,  # enforce order
-        )
+        logger.debug(f"Queueing status webhook -> {self.dispatcher.webhook_url}")
+        self.dispatcher.enqueue(payload)
+
+
+@dataclass(slots=True)
+class FlowsRun:
+    """Outcome of ``run_flows``: how many flows ran or were skipped, and the last outputs."""
+
+    flows_run: int = 0
+    flows_skipped: int = 0
+    outputs: DocumentList = field(default_factory=DocumentList)
+
+
+async def run_flows(
+    project_name: str,
+    documents: str,
+    flow_options: ProjectFlowOptions,
+    *,
+    prepare: Callable[[int, Any], Any] | None = None,
+    on_outputs: Callable[[DocumentList], None] | None = None,
+) -> FlowsRun:
+    """Run every flow of FLOWS on the project at ``documents``, in order.
+
+    With ``flow_options.resume``, flows whose manifest still matches storage are
+    skipped and their stored outputs are used. Each flow that runs has its outputs
+    saved and its manifest recorded.
+
+    Args:
+        project_name: Project name passed to every flow
+        documents: Project storage URI
+        flow_options: Options for every flow
+        prepare: Called with the 1-based index and flow before it runs; returns the
+            flow to call, e.g. with Prefect options applied
+        on_outputs: Called with the outputs of every flow, whether run or skipped
+
+    Returns:
+        The number of flows run and skipped, and the outputs of the last flow
+    """
+    run = FlowsRun()
+    stored = await load_stored_documents(documents)
+    for idx, pipeline_flow in enumerate(FLOWS, start=1):
+        if flow_options.resume and await is_flow_up_to_date(
+            pipeline_flow, documents, flow_options, stored
+        ):
+            logger.info(
+                f"Skipping flow {idx} of {len(FLOWS)}: {pipeline_flow.name} (inputs unchanged)"
+            )
+            run.outputs = stored.filter_by(pipeline_flow.config.OUTPUT_DOCUMENT_TYPE)
+            run.flows_skipped += 1
+        else:
+            logger.info(f"Starting flow {idx} of {len(FLOWS)}: {pipeline_flow.name}")
+            current = await pipeline_flow.config.load_documents(documents)
+            flow_fn = prepare(idx, pipeline_flow) if prepare else pipeline_flow
+            run.outputs = await flow_fn(project_name, current, flow_options)
+            logger.info(f"Flow {pipeline_flow.name} produced {len(run.outputs)} documents")
+            await pipeline_flow.config.save_documents(documents, run.outputs)
+            stored = await load_stored_documents(documents)
+            await record_flow_manifest(pipeline_flow, documents, flow_options, stored)
+            run.flows_run += 1
+        if on_outputs:
+            on_outputs(run.outputs)
+    return run
 
 
 @flow(
@@ -152,62 +342,108 @@ async def prepare_documents(
         doc_types = FLOWS[0].config.get_input_document_types()
         if len(doc_types) != 1:
             raise ValueError("Only one input document type is supported")
-        storage = await Storage.from_uri(documents)
-        target_base = storage.with_base(doc_types[0].canonical_name())
-        results = await asyncio.gather(
-            *[download_input_document(url) for url in input_documents_urls]
+        canonical_name = doc_types[0].canonical_name()
+        await asyncio.gather(
+            *[
+                download_input_document(url, documents, canonical_name)
+                for url in input_documents_urls
+            ]
         )
-        for name, content in results:
-            await target_base.write_bytes(name, content)
     return documents
 
 
+async def _finish_uploads(
+    documents: str, upload_record: UploadRecord, uploads: dict[str, tuple[str, asyncio.Future[Any]]]
+) -> None:
+    """Wait for the started uploads and record the ones that succeeded."""
+    results = await asyncio.gather(*(f for _, f in uploads.values()), return_exceptions=True)
+    for (key, (sha256, _)), result in zip(uploads.items(), results, strict=True):
+        if isinstance(result, BaseException):
+            logger.warning(f"Output upload failed for {key}: {result}")
+        else:
+            upload_record.uploads[key] = sha256
+    if uploads:
+        await write_upload_record(documents, upload_record)
+
+
 @flow(name="research_pipeline", flow_run_name="research_pipeline-{project_name}", log_prints=True)
 @trace(name="research_pipeline")
 async def research_pipeline(project_name: str, documents: str, flow_options: ProjectFlowOptions):
-    status_hooks = []
-    if flow_options.status_webhook_url:
-        status_hooks.append(
-            StatusWebhookHook(project_name, flow_options.status_webhook_url, 0, len(FLOWS))
+    run_ledger.reset()
+    async with (
+        http_client_scope(),
+        StatusDispatcher(
+            flow_options.status_webhook_url, batch=flow_options.status_webhook_batch
+        ) as dispatcher,
+    ):
+        logger.info(
+            f"Running in {flow_options.mode} mode: {flow_options.profile().model_dump_json()}"
         )
+        status_hooks = []
+        if flow_options.status_webhook_url:
+            status_hooks.append(StatusWebhookHook(project_name, dispatcher, 0, len(FLOWS)))
 
-    documents = await prepare_documents.with_options(  # type: ignore
-        on_completion=status_hooks,
-        on_failure=status_hooks,
-        on_cancellation=status_hooks,
-        on_crashed=status_hooks,
-        on_running=status_hooks,
-    )(project_name, documents, flow_options.input_documents_urls)
-    logger.info(f"Documents uri: {documents}")
-
-    new_docs: DocumentList = DocumentList()
-    output_futures = []
-    for idx, pipeline_flow in enumerate(FLOWS, start=1):
-        logger.info(f"Starting flow {idx} of {len(FLOWS)}: {pipeline_flow.name}")
-        for status_hook in status_hooks:
-            status_hook.step = idx
-        current = await pipeline_flow.config.load_documents(documents)
-        pipeline_flow_fn = pipeline_flow.with_options(
-            retries=3,
-            retry_delay_seconds=60,
+        documents = await prepare_documents.with_options(  # type: ignore
             on_completion=status_hooks,
             on_failure=status_hooks,
             on_cancellation=status_hooks,
             on_crashed=status_hooks,
             on_running=status_hooks,
-        )
-        new_docs = await pipeline_flow_fn(project_name, current, flow_options)
-        logger.info(f"Flow {pipeline_flow.name} produced {len(new_docs)} documents")
-        await pipeline_flow.config.save_documents(documents, new_docs)
-        for doc in new_docs:
-            url = flow_options.output_documents_urls.get(doc.name)
-            if url:
-                output_futures.append(upload_output_document.submit(url, doc, return_state=False))
-
-    if flow_options.report_webhook_url:
-        await send_report_webhook(flow_options.report_webhook_url, project_name, new_docs)
-    for future in output_futures:
-        future.result(raise_on_failure=False)
+        )(project_name, documents, flow_options.input_documents_urls)
+        logger.info(f"Documents uri: {documents}")
+
+        upload_record = await read_upload_record(documents)
+        uploads: dict[str, tuple[str, asyncio.Future[Any]]] = {}
+
+        def with_status_hooks(idx: int, pipeline_flow: Any) -> Any:
+            for status_hook in status_hooks:
+                status_hook.step = idx
+            return pipeline_flow.with_options(
+                retries=3,
+                retry_delay_seconds=60,
+                on_completion=status_hooks,
+                on_failure=status_hooks,
+                on_cancellation=status_hooks,
+                on_crashed=status_hooks,
+                on_running=status_hooks,
+            )
+
+        def upload_outputs(new_docs: DocumentList) -> None:
+            for doc in new_docs:
+                target = flow_options.output_target(doc.name)
+                if not target:
+                    continue
+                key = upload_key(doc.name, target.url)
+                if upload_record.uploads.get(key) == doc.sha256:
+                    logger.info(f"Skipping upload of {doc.name} (unchanged since last upload)")
+                    continue
+                # Run on this event loop so uploads share the pooled client
+                upload = upload_output_document(target.url, doc, target.headers, target.content_md5)
+                uploads[key] = (doc.sha256, asyncio.ensure_future(upload))
+
+        # Uploads started before a failure still finish and are recorded
+        try:
+            run = await run_flows(
+                project_name,
+                documents,
+                flow_options,
+                prepare=with_status_hooks,
+                on_outputs=upload_outputs,
+            )
+            new_docs = run.outputs
+
+            if flow_options.report_webhook_url:
+                body, headers = await build_report_webhook_request(
+                    project_name, documents, new_docs, flow_options
+                )
+                await send_report_webhook(flow_options.report_webhook_url, body, headers)
+        finally:
+            await _finish_uploads(documents, upload_record, uploads)
+        await run_ledger.save(documents)
+
+    llm_cache.log_summary()
+    rate_limiter.log_summary()
+    run_ledger.log_summary()
 
 
 if __name__ == "__main__":
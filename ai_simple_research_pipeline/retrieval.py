@@ -0,0 +1,262 @@
+"""Local BM25 retrieval over the standardized Markdown files.
+
+The ``.md`` outputs of ``standardization_flow`` are split into chunks at their
+headings (long sections are split further at paragraph boundaries) and indexed
+with Okapi BM25. The index is saved as ``retrieval_index.json`` next to the
+standardized files and rebuilt in memory when it is missing or stale.
+
+When ``retrieval_token_budget`` is set, the review and report flows replace each
+standardized ``.md`` file in their context with only the chunks retrieved for
+their questions or report sections, up to that many (estimated) tokens. The
+``.yaml`` metadata files are always kept in full.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from ai_pipeline_core import Document, DocumentList, get_pipeline_logger
+
+from ai_simple_research_pipeline.documents.flow import (
+    RetrievalIndexDocument,
+    StandardizedFileDocument,
+)
+
+logger = get_pipeline_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+MAX_CHUNK_CHARS = 2400
+CHARS_PER_TOKEN = 4  # rough estimate, good enough for budgeting context
+
+HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this "
+    "to was were what which who will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords and single characters."""
+    return [t for t in TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    """One heading section (or part of it) of a standardized Markdown file."""
+
+    source: str
+    position: int
+    heading: str
+    text: str
+
+
+def _split_long(text: str) -> list[str]:
+    if len(text) <= MAX_CHUNK_CHARS:
+        return [text]
+    parts: list[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        if current and len(current) + len(paragraph) + 2 > MAX_CHUNK_CHARS:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_markdown(source: str, text: str) -> list[Chunk]:
+    """Split Markdown into chunks at headings, keeping the heading with its body."""
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in text.splitlines():
+        if match := HEADING.match(line):
+            sections.append((match.group(1), [line]))
+        else:
+            sections[-1][1].append(line)
+
+    chunks: list[Chunk] = []
+    for heading, lines in sections:
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+        for part in _split_long(body):
+            chunks.append(Chunk(source, len(chunks), heading, part))
+    return chunks
+
+
+@dataclass
+class BM25Index:
+    """Okapi BM25 index over chunks of standardized Markdown files."""
+
+    sources: dict[str, str]  # file name -> sha256 the chunks were built from
+    chunks: list[Chunk]
+    term_counts: list[dict[str, int]]
+    k1: float = 1.5
+    b: float = 0.75
+    _lengths: list[int] = field(init=False, repr=False)
+    _idf: dict[str, float] = field(init=False, repr=False)
+    _avg_length: float = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._lengths = [sum(counts.values()) for counts in self.term_counts]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        frequencies: Counter[str] = Counter()
+        for counts in self.term_counts:
+            frequencies.update(counts.keys())
+        n = len(self.chunks)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()
+        }
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "BM25Index":
+        """Index the ``.md`` files among ``documents``, in name order."""
+        markdown = sorted((d for d in documents if d.name.endswith(".md")), key=lambda d: d.name)
+        chunks = [c for doc in markdown for c in chunk_markdown(doc.name, doc.text)]
+        return cls(
+            sources={doc.name: doc.sha256 for doc in markdown},
+            chunks=chunks,
+            term_counts=[dict(Counter(tokenize(f"{c.heading}\n{c.text}"))) for c in chunks],
+        )
+
+    def search(self, query: str, k: int) -> list[tuple[float, Chunk]]:
+        """Return the ``k`` best scoring chunks for ``query``, best first."""
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        if not terms or not self._avg_length:
+            return []
+        scored: list[tuple[float, int]] = []
+        for i, counts in enumerate(self.term_counts):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length)
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, i))
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [(score, self.chunks[i]) for score, i in scored[:k]]
+
+    def to_document(self) -> RetrievalIndexDocument:
+        data = {
+            "version": INDEX_FORMAT_VERSION,
+            "sources": self.sources,
+            "chunks": [
+                {
+                    "source": c.source,
+                    "position": c.position,
+                    "heading": c.heading,
+                    "text": c.text,
+                    "terms": counts,
+                }
+                for c, counts in zip(self.chunks, self.term_counts, strict=True)
+            ],
+        }
+        content = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        return RetrievalIndexDocument.create(
+            name=RetrievalIndexDocument.FILES.INDEX, content=content
+        )
+
+    @classmethod
+    def from_document(cls, document: Document) -> "BM25Index | None":
+        """Load a saved index; None if it was written by another format version."""
+        data = json.loads(document.text)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            return None
+        return cls(
+            sources=data["sources"],
+            chunks=[
+                Chunk(c["source"], c["position"], c["heading"], c["text"]) for c in data["chunks"]
+            ],
+            term_counts=[c["terms"] for c in data["chunks"]],
+        )
+
+
+def load_index(documents: DocumentList) -> BM25Index:
+    """Return the saved index if it matches the standardized files in ``documents``.
+
+    Otherwise (no index saved yet, or the files changed since) the index is
+    rebuilt in memory.
+    """
+    standardized = documents.filter_by(StandardizedFileDocument)
+    expected = {d.name: d.sha256 for d in standardized if d.name.endswith(".md")}
+    for document in documents.filter_by(RetrievalIndexDocument):
+        index = BM25Index.from_document(document)
+        if index is not None and index.sources == expected:
+            return index
+    logger.info("Retrieval index missing or stale; rebuilding it in memory")
+    return BM25Index.build(standardized)
+
+
+def select_chunks(
+    index: BM25Index, queries: list[str], top_k: int, token_budget: int
+) -> list[Chunk]:
+    """Pick chunks for ``queries`` round-robin by rank until ``token_budget`` is used.
+
+    Every query contributes its best chunk before any query contributes its
+    second, so one broad query cannot crowd out the others. The result is in
+    file and position order.
+    """
+    rankings = [[chunk for _, chunk in index.search(q, top_k)] for q in queries]
+    selected: dict[tuple[str, int], Chunk] = {}
+    used = 0
+    for rank in range(top_k):
+        for ranking in rankings:
+            if rank >= len(ranking):
+                continue
+            chunk = ranking[rank]
+            key = (chunk.source, chunk.position)
+            if key in selected:
+                continue
+            cost = estimate_tokens(chunk.text)
+            if used + cost > token_budget:
+                continue
+            selected[key] = chunk
+            used += cost
+    return [selected[key] for key in sorted(selected)]
+
+
+def retrieve_documents(
+    documents: DocumentList,
+    queries: list[str],
+    top_k: int,
+    token_budget: int,
+    index: BM25Index | None = None,
+) -> DocumentList:
+    """Standardized documents with each ``.md`` reduced to the chunks relevant to ``queries``.
+
+    Files without a selected chunk are dropped; ``.yaml`` metadata is kept in
+    full. The excerpt documents keep the original file names so citations
+    still point at the standardized file. Pass ``index`` to reuse one loaded
+    with ``load_index`` across several retrievals.
+    """
+    standardized = documents.filter_by(StandardizedFileDocument)
+    if index is None:
+        index = load_index(documents)
+    chunks = select_chunks(index, queries, top_k, token_budget)
+    by_source: dict[str, list[Chunk]] = {}
+    for chunk in chunks:
+        by_source.setdefault(chunk.source, []).append(chunk)
+
+    result: list[Document] = []
+    for doc in standardized:
+        if not doc.name.endswith(".md"):
+            result.append(doc)
+        elif doc.name in by_source:
+            content = "\n\n[...]\n\n".join(c.text for c in by_source[doc.name])
+            result.append(StandardizedFileDocument.create(name=doc.name, content=content))
+
+    logger.debug(
+        f"Retrieved {len(chunks)} chunks (~{sum(estimate_tokens(c.text) for c in chunks)} "
+        f"tokens) from {len(by_source)} files for {len(queries)} queries"
+    )
+    return DocumentList(result)
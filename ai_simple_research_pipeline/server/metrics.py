@@ -0,0 +1,282 @@
+"""In-memory request metrics for the middleware, also exported in Prometheus format.
+
+``MetricsMiddleware`` times every request by method and route template and
+counts responses by status code. Prefect API calls made through the shared
+client are timed by httpx event hooks, by method and path with ids replaced by
+``{id}``. ``run_states`` keeps the last state seen for the most recently looked
+up flow runs. Recording an observation is a few dictionary updates under a
+lock; everything else happens when ``/metrics`` is scraped.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, MutableMapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+# Upper bounds in seconds, Prometheus-style cumulative buckets
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    counts: list[int] = field(default_factory=list)  # per bucket, last slot is +Inf
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bucket bound below which a ``q`` fraction of observations fall.
+
+        Returns None when the quantile lies above the largest bucket.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts, strict=False):
+            seen += n
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        cumulative = 0
+        buckets: dict[str, int] = {}
+        for bound, n in zip((*self.buckets, float("inf")), self.counts, strict=True):
+            cumulative += n
+            buckets["+Inf" if bound == float("inf") else f"{bound:g}"] = cumulative
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "avg_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class EndpointMetrics:
+    """Latency histograms and status counts keyed by ``"<METHOD> <route template>"``."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._statuses: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def observe(self, endpoint: str, seconds: float, status: int | None = None) -> None:
+        with self._lock:
+            self._histograms.setdefault(endpoint, LatencyHistogram()).observe(seconds)
+            if status is not None:
+                key = (endpoint, status)
+                self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {name: h.snapshot() for name, h in sorted(self._histograms.items())}
+
+    def series(self) -> tuple[dict[str, LatencyHistogram], dict[tuple[str, int], int]]:
+        """Copies of the histograms and status counts, for export."""
+        with self._lock:
+            histograms = {
+                name: LatencyHistogram(h.buckets, list(h.counts), h.total, h.count)
+                for name, h in sorted(self._histograms.items())
+            }
+            return histograms, dict(sorted(self._statuses.items()))
+
+
+class RunStateTracker:
+    """Last state type seen for the ``max_runs`` most recently looked up flow runs."""
+
+    def __init__(self, max_runs: int = 1000) -> None:
+        self.max_runs = max_runs
+        self._states: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, flow_run_id: Any, state_type: str | None) -> None:
+        key = str(flow_run_id)
+        with self._lock:
+            self._states[key] = state_type or "UNKNOWN"
+            self._states.move_to_end(key)
+            if len(self._states) > self.max_runs:
+                self._states.popitem(last=False)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            counts: dict[str, int] = {}
+            for state in self._states.values():
+                counts[state] = counts.get(state, 0) + 1
+            return dict(sorted(counts.items()))
+
+
+endpoint_metrics = EndpointMetrics()
+prefect_metrics = EndpointMetrics()
+run_states = RunStateTracker()
+
+
+# ---------- Instrumentation ----------
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+ASGIApp = Callable[
+    [Scope, Callable[[], Awaitable[Message]], Callable[[Message], Awaitable[None]]],
+    Awaitable[None],
+]
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight count of HTTP requests.
+
+    Unlike ``@app.middleware("http")`` it does not wrap the request and response
+    in extra tasks and streams, so it adds no measurable latency per request.
+    Streaming responses (SSE) are timed until the stream closes.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: EndpointMetrics = endpoint_metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Callable[[], Awaitable[Message]],
+        send: Callable[[Message], Awaitable[None]],
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # unless a response starts before an exception
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            # The router stores the matched route in the (shared) scope
+            path = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(f"{scope['method']} {path}", time.perf_counter() - started, status)
+
+
+ID_SEGMENT = re.compile(
+    r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+STARTED_EXTENSION = "metrics_started"
+
+
+def prefect_event_hooks(
+    metrics: EndpointMetrics = prefect_metrics,
+) -> dict[str, list[Callable[..., Awaitable[None]]]]:
+    """httpx event hooks that time Prefect API calls until their response headers arrive."""
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions[STARTED_EXTENSION] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        request = response.request
+        started = request.extensions.get(STARTED_EXTENSION)
+        if started is not None:
+            path = ID_SEGMENT.sub("/{id}", request.url.path)
+            metrics.observe(
+                f"{request.method} {path}", time.perf_counter() - started, response.status_code
+            )
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+# ---------- Prometheus text format ----------
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def _endpoint_series(
+    lines: list[str], prefix: str, path_label: str, metrics: EndpointMetrics, what: str
+) -> None:
+    histograms, statuses = metrics.series()
+    lines += [
+        f"# HELP {prefix}_requests_total {what} by status code.",
+        f"# TYPE {prefix}_requests_total counter",
+    ]
+    for (endpoint, status), n in statuses.items():
+        method, _, path = endpoint.partition(" ")
+        labels = _labels(method=method, **{path_label: path}, status=str(status))
+        lines.append(f"{prefix}_requests_total{labels} {n}")
+
+    name = f"{prefix}_request_duration_seconds"
+    lines += [f"# HELP {name} Latency of {what}.", f"# TYPE {name} histogram"]
+    for endpoint, h in histograms.items():
+        method, _, path = endpoint.partition(" ")
+        base = {"method": method, path_label: path}
+        cumulative = 0
+        for bound, n in zip((*h.buckets, float("inf")), h.counts, strict=True):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{name}_bucket{_labels(**base, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**base)} {h.total:.6f}")
+        lines.append(f"{name}_count{_labels(**base)} {h.count}")
+
+
+def render_prometheus(reconnects: int = 0) -> str:
+    """All middleware metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    _endpoint_series(lines, "middleware_http", "route", endpoint_metrics, "HTTP requests")
+    lines += [
+        "# HELP middleware_http_requests_in_flight HTTP requests being served.",
+        "# TYPE middleware_http_requests_in_flight gauge",
+        f"middleware_http_requests_in_flight {endpoint_metrics.in_flight}",
+    ]
+    _endpoint_series(lines, "middleware_prefect", "path", prefect_metrics, "Prefect API calls")
+    lines += [
+        "# HELP middleware_prefect_client_reconnects_total Prefect client reconnects.",
+        "# TYPE middleware_prefect_client_reconnects_total counter",
+        f"middleware_prefect_client_reconnects_total {reconnects}",
+        "# HELP middleware_flow_runs Recently looked up flow runs by last seen state type.",
+        "# TYPE middleware_flow_runs gauge",
+    ]
+    for state, n in run_states.counts().items():
+        lines.append(f"middleware_flow_runs{_labels(state=state)} {n}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,151 @@
+"""Shared flow run pollers behind the ``/runs/{id}/events`` SSE endpoint.
+
+Each flow run watched by at least one client gets a single poller that reads the
+run and its subflow runs from Prefect and fans changes out to every listener.
+Events carry the same ``step`` / ``total_steps`` / ``progress`` fields as the
+status webhooks sent by ``research_pipeline``. The poller stops when the run
+reaches a terminal state, is deleted or its last listener disconnects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+from ai_pipeline_core import get_pipeline_logger
+from prefect.client.orchestration import PrefectClient
+from prefect.client.schemas.filters import FlowRunFilter, FlowRunFilterParentFlowRunId
+from prefect.client.schemas.objects import FlowRun
+from prefect.exceptions import ObjectNotFound
+
+from ai_simple_research_pipeline.flows import FLOWS
+
+logger = get_pipeline_logger(__name__)
+
+# Subflow name -> pipeline step, matching StatusWebhookHook in research_pipeline
+FLOW_STEPS = {"prepare_documents": 0, **{f.name: i for i, f in enumerate(FLOWS, start=1)}}
+
+ClientFactory = Callable[[], AbstractAsyncContextManager[PrefectClient]]
+
+
+def _is_final(fr: FlowRun) -> bool:
+    return fr.state is not None and fr.state.is_final()
+
+
+def _started(fr: FlowRun) -> datetime:
+    return fr.start_time or fr.expected_start_time or datetime.min.replace(tzinfo=UTC)
+
+
+class _RunPoller:
+    def __init__(self, run_id: UUID, hub: RunEventHub):
+        self.run_id = run_id
+        self.hub = hub
+        self.listeners: set[asyncio.Queue[dict[str, Any] | None]] = set()
+        self.last: dict[str, Any] | None = None
+        self.task: asyncio.Task[None] | None = None
+        self.closing = False
+
+    def broadcast(self, event: dict[str, Any] | None) -> None:
+        for queue in self.listeners:
+            queue.put_nowait(event)
+
+    async def run(self) -> None:
+        errors = 0
+        try:
+            while True:
+                try:
+                    async with self.hub.clients() as client:
+                        event, final = await self.hub.snapshot(client, self.run_id)
+                    errors = 0
+                except ObjectNotFound:
+                    logger.warning(f"Flow run {self.run_id} no longer exists; ending its events")
+                    return
+                except Exception as e:
+                    errors += 1
+                    logger.warning(f"Polling flow run {self.run_id} failed: {e}")
+                    await asyncio.sleep(min(self.hub.interval * 2**errors, 30))
+                    continue
+                if event != self.last:
+                    self.last = event
+                    self.broadcast(event)
+                if final:
+                    return
+                await asyncio.sleep(self.hub.interval)
+        finally:
+            self.closing = True
+            self.broadcast(None)  # end of stream
+            if self.hub.pollers.get(self.run_id) is self:
+                del self.hub.pollers[self.run_id]
+
+
+class RunEventHub:
+    """Registry of one shared poller per watched flow run."""
+
+    def __init__(self, clients: ClientFactory, interval: float):
+        self.clients = clients
+        self.interval = interval
+        self.pollers: dict[UUID, _RunPoller] = {}
+        self._flow_names: dict[UUID, str] = {}
+
+    async def _flow_name(self, client: PrefectClient, flow_id: UUID) -> str:
+        if flow_id not in self._flow_names:
+            self._flow_names[flow_id] = (await client.read_flow(flow_id)).name
+        return self._flow_names[flow_id]
+
+    async def snapshot(self, client: PrefectClient, run_id: UUID) -> tuple[dict[str, Any], bool]:
+        """Build the current progress event of ``run_id`` and whether the run is final."""
+        fr = await client.read_flow_run(run_id)
+        children = await client.read_flow_runs(
+            flow_run_filter=FlowRunFilter(
+                parent_flow_run_id=FlowRunFilterParentFlowRunId(any_=[run_id])
+            )
+        )
+        candidates: list[tuple[int, datetime, FlowRun, str]] = []
+        for child in children:
+            name = await self._flow_name(client, child.flow_id)
+            if name in FLOW_STEPS:
+                candidates.append((FLOW_STEPS[name], _started(child), child, name))
+        # The latest started run of the furthest step (flow retries create new runs)
+        current = max(candidates, key=lambda c: (c[0], c[1]), default=None)
+
+        total_steps = len(FLOWS)
+        if fr.state and fr.state.is_completed():
+            step, done = total_steps, total_steps
+        elif current:
+            step, _, child, _ = current
+            done = step if child.state and child.state.is_completed() else step - 1
+        else:
+            step, done = 0, 0
+        event = {
+            "flow_run_id": str(fr.id),
+            "state_type": fr.state_type.value if fr.state_type else None,
+            "state_name": fr.state_name,
+            "current_flow": current[3] if current else None,
+            "step": step,
+            "total_steps": total_steps,
+            "progress": round(max(min(done / max(total_steps, 1), 1), 0), 2),
+        }
+        return event, _is_final(fr)
+
+    @asynccontextmanager
+    async def subscribe(self, run_id: UUID) -> AsyncGenerator[asyncio.Queue[dict[str, Any] | None]]:
+        """Listen to ``run_id``; the queue yields events and ``None`` once the run is final."""
+        poller = self.pollers.get(run_id)
+        if poller is None or poller.closing:
+            poller = self.pollers[run_id] = _RunPoller(run_id, self)
+            poller.task = asyncio.create_task(poller.run())
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        if poller.last is not None:
+            queue.put_nowait(poller.last)  # late listeners start from the current state
+        poller.listeners.add(queue)
+        try:
+            yield queue
+        finally:
+            poller.listeners.discard(queue)
+            if not poller.listeners and poller.task and not poller.task.done():
+                poller.closing = True
+                poller.task.cancel()
@@ -1,13 +1,44 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
-from typing import Any, Optional
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any, Literal, Optional
 from uuid import UUID
 
+import httpx
+from ai_pipeline_core import get_pipeline_logger
 from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from prefect import get_client
+from prefect.client.orchestration import PrefectClient
+from prefect.client.schemas.filters import (
+    DeploymentFilter,
+    DeploymentFilterId,
+    DeploymentFilterName,
+    FlowRunFilter,
+    FlowRunFilterId,
+    FlowRunFilterIdempotencyKey,
+)
+from prefect.client.schemas.objects import FlowRun
+from prefect.exceptions import ObjectNotFound, PrefectHTTPStatusError
 from pydantic import BaseModel, Field
 
+from .metrics import (
+    MetricsMiddleware,
+    endpoint_metrics,
+    prefect_event_hooks,
+    prefect_metrics,
+    render_prometheus,
+    run_states,
+)
+from .run_events import RunEventHub
+
+logger = get_pipeline_logger(__name__)
+
 # ---------- Auth dependency ----------
 
 API_KEY_ENV = "PREFECT_MIDDLEWARE_API_KEY"
@@ -62,9 +93,240 @@ class TriggerResponse(BaseModel):
     flow_run_id: UUID
 
 
+class RunsQueryRequest(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=500)
+    # Top-level FlowRun fields to return; all fields when omitted. "id" is always included.
+    fields: Optional[list[str]] = None
+
+
+class RunsQueryResponse(BaseModel):
+    runs: list[dict[str, Any]]
+    missing: list[UUID] = Field(default_factory=list)
+
+
+class BatchTriggerItem(BaseModel):
+    index: int
+    # "existing": the idempotency key was already used, flow_run_id is the earlier run
+    status: Literal["created", "existing", "error"]
+    flow_run_id: Optional[UUID] = None
+    idempotency_key: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchTriggerResponse(BaseModel):
+    deployment_id: UUID
+    created: int
+    existing: int
+    failed: int
+    results: list[BatchTriggerItem]
+
+
+# ---------- Deployment name cache ----------
+
+DEPLOYMENT_CACHE_TTL_ENV = "DEPLOYMENT_CACHE_TTL_SECONDS"
+BATCH_CONCURRENCY_ENV = "BATCH_TRIGGER_CONCURRENCY"
+BATCH_MAX_RUNS = 500
+# Prefect answers 422 to reads with a limit above PREFECT_SERVER_API_DEFAULT_LIMIT (default 200)
+PREFECT_READ_LIMIT = 200
+
+
+class DeploymentNameCache:
+    """TTL cache of deployment name -> deployment ids.
+
+    Names are resolved with a filtered ``read_deployments`` lookup, so resolution
+    does not depend on how many deployments exist. Misses are never cached: an
+    unknown name is looked up again on the next request.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, list[UUID]]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _lookup(self, client: PrefectClient, name: str) -> list[UUID]:
+        deployments = await client.read_deployments(
+            deployment_filter=DeploymentFilter(name=DeploymentFilterName(any_=[name])),
+            limit=2,  # enough to detect ambiguity
+        )
+        return [d.id for d in deployments if d.name == name]
+
+    def _fresh(self, name: str) -> tuple[float, list[UUID]] | None:
+        entry = self._entries.get(name)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return None
+        return entry
+
+    async def resolve(self, client: PrefectClient, name: str, *, refresh: bool = False) -> UUID:
+        """Return the id of the deployment named ``name``, raising 404/409 HTTP errors."""
+        entry = None if refresh else self._fresh(name)
+        if entry is None:
+            async with self._locks.setdefault(name, asyncio.Lock()):
+                # Concurrent misses for one name share a single lookup
+                entry = None if refresh else self._fresh(name)
+                if entry is None:
+                    entry = (time.monotonic(), await self._lookup(client, name))
+                    if entry[1]:
+                        self._entries[name] = entry
+                    else:
+                        self._entries.pop(name, None)
+
+        ids = entry[1]
+        if not ids:
+            raise HTTPException(status_code=404, detail=f"Deployment '{name}' not found")
+        if len(ids) > 1:
+            # Extremely rare, but better to be explicit
+            raise HTTPException(
+                status_code=409,
+                detail=f"Multiple deployments named '{name}' found; disambiguate.",
+            )
+        return ids[0]
+
+
+def _is_not_found(exc: Exception) -> bool:
+    if isinstance(exc, ObjectNotFound):
+        return True
+    return isinstance(exc, PrefectHTTPStatusError) and exc.response.status_code == 404
+
+
+deployment_cache = DeploymentNameCache(ttl=float(os.getenv(DEPLOYMENT_CACHE_TTL_ENV, "60")))
+
+
+async def _read_flow_runs_in_chunks(
+    client: PrefectClient,
+    values: list[Any],
+    flow_run_filter: Callable[[list[Any]], FlowRunFilter],
+    deployment_filter: DeploymentFilter | None = None,
+) -> list[FlowRun]:
+    """Read the runs matching ``values`` with one concurrent call per PREFECT_READ_LIMIT values.
+
+    ``flow_run_filter`` builds the filter for one chunk; each value must match at
+    most one run, so a chunk never has more results than its limit.
+    """
+    chunks = [values[i : i + PREFECT_READ_LIMIT] for i in range(0, len(values), PREFECT_READ_LIMIT)]
+    pages = await asyncio.gather(
+        *(
+            client.read_flow_runs(
+                flow_run_filter=flow_run_filter(chunk),
+                deployment_filter=deployment_filter,
+                limit=len(chunk),
+            )
+            for chunk in chunks
+        )
+    )
+    return [run for page in pages for run in page]
+
+
+# ---------- Prefect client ----------
+
+HEALTHCHECK_INTERVAL_ENV = "PREFECT_CLIENT_HEALTHCHECK_SECONDS"
+
+
+class PrefectClientManager:
+    """One long-lived, pooled Prefect client shared by all requests.
+
+    The client is opened in the app lifespan and replaced when a request hits a
+    transport error or the periodic health check fails, so a restarted Prefect
+    server does not require restarting the middleware.
+    """
+
+    def __init__(self) -> None:
+        self._client: PrefectClient | None = None
+        self._lock = asyncio.Lock()
+        self.reconnects = 0
+
+    async def _connect(self) -> PrefectClient:
+        client = get_client(httpx_settings={"event_hooks": prefect_event_hooks()})
+        await client.__aenter__()
+        return client
+
+    async def _close(self, client: PrefectClient) -> None:
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error closing Prefect client: {e}")
+
+    async def start(self) -> None:
+        self._client = await self._connect()
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._close(self._client)
+            self._client = None
+
+    async def _current(self) -> PrefectClient:
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    self._client = await self._connect()
+        return self._client
+
+    async def reconnect(self, stale: PrefectClient | None = None) -> None:
+        """Replace the client, unless another request already replaced ``stale``."""
+        async with self._lock:
+            if stale is not None and self._client is not stale:
+                return
+            old, self._client = self._client, await self._connect()
+            self.reconnects += 1
+        if old is not None:
+            await self._close(old)
+
+    async def healthcheck(self) -> Exception | None:
+        """Check the Prefect API and reconnect once if it is unreachable."""
+        client = await self._current()
+        error = await client.api_healthcheck()
+        if error is None:
+            return None
+        logger.warning(f"Prefect API health check failed ({error}); reconnecting")
+        await self.reconnect(client)
+        return await (await self._current()).api_healthcheck()
+
+    @asynccontextmanager
+    async def client(self) -> AsyncGenerator[PrefectClient]:
+        client = await self._current()
+        try:
+            yield client
+        except httpx.TransportError as e:
+            await self.reconnect(client)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Prefect API unavailable: {e}",
+            ) from e
+
+
+prefect_clients = PrefectClientManager()
+
+RUN_EVENTS_POLL_ENV = "RUN_EVENTS_POLL_SECONDS"
+SSE_KEEPALIVE_SECONDS = 15.0
+
+run_events = RunEventHub(prefect_clients.client, float(os.getenv(RUN_EVENTS_POLL_ENV, "2")))
+
+
+async def _healthcheck_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await prefect_clients.healthcheck()
+        except Exception as e:
+            logger.warning(f"Prefect client health check error: {e}")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
+    await prefect_clients.start()
+    interval = float(os.getenv(HEALTHCHECK_INTERVAL_ENV, "30"))
+    health_task = asyncio.create_task(_healthcheck_loop(interval)) if interval > 0 else None
+    try:
+        yield
+    finally:
+        if health_task is not None:
+            health_task.cancel()
+        await prefect_clients.stop()
+
+
 # ---------- App ----------
 
-app = FastAPI(title="Prefect Middleware", version="1.1.0")
+app = FastAPI(title="Prefect Middleware", version="1.1.0", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, metrics=endpoint_metrics)
 
 
 @app.get("/health")
@@ -77,7 +339,7 @@ async def health() -> dict[str, str]:
 )
 async def list_deployments(limit: int | None = 100) -> list[DeploymentItem]:
     """List deployments (now including their parameters + schema)."""
-    async with get_client() as client:
+    async with prefect_clients.client() as client:
         deployments = await client.read_deployments(limit=limit)
         items: list[DeploymentItem] = []
         for d in deployments:
@@ -107,31 +369,203 @@ async def start_deployment_run(deployment_name: str, body: TriggerRequest) -> Tr
     Trigger a new flow run by *deployment name* (e.g. 'report_flow').
 
     Implementation detail:
-    - We resolve the name by scanning deployments for an exact name match.
-      This avoids requiring '<FLOW_NAME>/<DEPLOYMENT_NAME>' format and works with your
-      current deployment names ('report_flow', 'summary_flow', etc.).
+    - Names are resolved to ids through a TTL cache backed by a filtered Prefect
+      lookup, so a warm trigger is a single Prefect API call. This avoids requiring
+      '<FLOW_NAME>/<DEPLOYMENT_NAME>' format and works with your current deployment
+      names ('report_flow', 'summary_flow', etc.).
+    - If Prefect answers 404 for a cached id (deployment recreated), the name is
+      resolved again and the run is created once more.
     """
-    async with get_client() as client:
-        # Resolve name -> id (exact match on DeploymentResponse.name)
-        deployments = await client.read_deployments(limit=200)
-        matches = [d for d in deployments if d.name == deployment_name]
-        if not matches:
-            raise HTTPException(status_code=404, detail=f"Deployment '{deployment_name}' not found")
-        if len(matches) > 1:
-            # Extremely rare, but better to be explicit
+    async with prefect_clients.client() as client:
+        deployment_id = await deployment_cache.resolve(client, deployment_name)
+        fr = await _create_run_or_refresh(client, deployment_name, deployment_id, body)
+        return TriggerResponse(flow_run_id=fr.id)
+
+
+async def _create_run(client: PrefectClient, deployment_id: UUID, body: TriggerRequest) -> Any:
+    return await client.create_flow_run_from_deployment(
+        deployment_id=deployment_id,
+        parameters=body.parameters or {},
+        tags=body.tags or [],
+        idempotency_key=body.idempotency_key,
+    )
+
+
+async def _create_run_or_refresh(
+    client: PrefectClient, deployment_name: str, deployment_id: UUID, body: TriggerRequest
+) -> Any:
+    try:
+        return await _create_run(client, deployment_id, body)
+    except (ObjectNotFound, PrefectHTTPStatusError) as e:
+        if not _is_not_found(e):
+            raise
+    deployment_id = await deployment_cache.resolve(client, deployment_name, refresh=True)
+    return await _create_run(client, deployment_id, body)
+
+
+async def _used_idempotency_keys(
+    client: PrefectClient, deployment_id: UUID, keys: list[str]
+) -> set[str]:
+    runs = await _read_flow_runs_in_chunks(
+        client,
+        keys,
+        lambda chunk: FlowRunFilter(idempotency_key=FlowRunFilterIdempotencyKey(any_=chunk)),
+        deployment_filter=DeploymentFilter(id=DeploymentFilterId(any_=[deployment_id])),
+    )
+    return {r.idempotency_key for r in runs if r.idempotency_key}
+
+
+@app.post(
+    "/deployments/{deployment_name}/runs:batch",
+    response_model=BatchTriggerResponse,
+    dependencies=[Depends(require_api_key)],
+)
+async def start_deployment_runs_batch(
+    deployment_name: str, body: list[TriggerRequest]
+) -> BatchTriggerResponse:
+    """
+    Trigger many flow runs of one deployment in a single request.
+
+    The deployment is resolved once and runs are created concurrently, at most
+    BATCH_TRIGGER_CONCURRENCY (default 10) at a time. Every item gets its own
+    result: a failing item does not fail the batch. Items whose idempotency key was
+    already used (earlier, or by a previous item of the same batch) are reported as
+    "existing" with the id of the run Prefect returned for that key.
+    """
+    if not body or len(body) > BATCH_MAX_RUNS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch must contain between 1 and {BATCH_MAX_RUNS} runs",
+        )
+    semaphore = asyncio.Semaphore(int(os.getenv(BATCH_CONCURRENCY_ENV, "10")))
+
+    async with prefect_clients.client() as client:
+        deployment_id = await deployment_cache.resolve(client, deployment_name)
+        keys = sorted({r.idempotency_key for r in body if r.idempotency_key})
+        used_keys = await _used_idempotency_keys(client, deployment_id, keys) if keys else set()
+
+        async def trigger(index: int, request: TriggerRequest) -> BatchTriggerItem:
+            key = request.idempotency_key
+            async with semaphore:
+                try:
+                    fr = await _create_run_or_refresh(
+                        client, deployment_name, deployment_id, request
+                    )
+                except HTTPException as e:
+                    return BatchTriggerItem(
+                        index=index, status="error", idempotency_key=key, error=str(e.detail)
+                    )
+                except Exception as e:
+                    return BatchTriggerItem(
+                        index=index, status="error", idempotency_key=key, error=str(e)
+                    )
+            return BatchTriggerItem(
+                index=index, status="created", flow_run_id=fr.id, idempotency_key=key
+            )
+
+        results = await asyncio.gather(*(trigger(i, r) for i, r in enumerate(body)))
+
+    for item in results:  # in request order, so the first use of a key counts as created
+        if item.status != "created" or not item.idempotency_key:
+            continue
+        if item.idempotency_key in used_keys:
+            item.status = "existing"
+        used_keys.add(item.idempotency_key)
+
+    return BatchTriggerResponse(
+        deployment_id=deployment_id,
+        created=sum(r.status == "created" for r in results),
+        existing=sum(r.status == "existing" for r in results),
+        failed=sum(r.status == "error" for r in results),
+        results=results,
+    )
+
+
+@app.post("/runs:query", response_model=RunsQueryResponse, dependencies=[Depends(require_api_key)])
+async def query_runs(body: RunsQueryRequest) -> RunsQueryResponse:
+    """
+    Return many flow runs with one Prefect filter call per 200 ids, optionally projected to
+    `fields` (e.g. ["state_type", "state_name", "start_time", "end_time"]).
+
+    Runs come back in the order of `ids`; unknown ids are listed in `missing`.
+    """
+    include: set[str] | None = None
+    if body.fields is not None:
+        unknown = sorted(set(body.fields) - set(FlowRun.model_fields))
+        if unknown:
             raise HTTPException(
-                status_code=409,
-                detail=f"Multiple deployments named '{deployment_name}' found; disambiguate.",
+                status_code=422,
+                detail=f"Unknown FlowRun fields: {', '.join(unknown)}",
             )
-        deployment = matches[0]
+        include = {"id", *body.fields}
 
-        fr = await client.create_flow_run_from_deployment(
-            deployment_id=deployment.id,
-            parameters=body.parameters or {},
-            tags=body.tags or [],
-            idempotency_key=body.idempotency_key,
+    ids = list(dict.fromkeys(body.ids))
+    async with prefect_clients.client() as client:
+        runs = await _read_flow_runs_in_chunks(
+            client, ids, lambda chunk: FlowRunFilter(id=FlowRunFilterId(any_=chunk))
         )
-        return TriggerResponse(flow_run_id=fr.id)
+    by_id = {fr.id: fr for fr in runs}
+    for fr in runs:
+        run_states.observe(fr.id, fr.state_type.value if fr.state_type else None)
+    return RunsQueryResponse(
+        runs=[by_id[i].model_dump(mode="json", include=include) for i in ids if i in by_id],
+        missing=[i for i in ids if i not in by_id],
+    )
+
+
+@app.get("/runs/{flow_run_id}/events", dependencies=[Depends(require_api_key)])
+async def stream_run_events(flow_run_id: UUID) -> StreamingResponse:
+    """
+    Server-sent events with the state and step progress of a flow run.
+
+    Emits a `status` event with the current state on connect and whenever the
+    state, step or progress changes, then an `end` event once the run reaches a
+    terminal state. All listeners of one run share a single Prefect poller.
+    """
+    async with prefect_clients.client() as client:
+        try:
+            await client.read_flow_run(flow_run_id)
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail=f"Flow run '{flow_run_id}' not found")
+
+    async def events() -> AsyncIterator[str]:
+        async with run_events.subscribe(flow_run_id) as queue:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                run_states.observe(event["flow_run_id"], event["state_type"])
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics/latency", dependencies=[Depends(require_api_key)])
+async def latency_metrics() -> dict[str, Any]:
+    """Per-endpoint and per-Prefect-call latency histograms since the server started."""
+    return {
+        "reconnects": prefect_clients.reconnects,
+        "endpoints": endpoint_metrics.snapshot(),
+        "prefect": prefect_metrics.snapshot(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_api_key)])
+async def prometheus_metrics() -> PlainTextResponse:
+    """Request, Prefect call and flow run state metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        render_prometheus(prefect_clients.reconnects),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 @app.get(
@@ -151,7 +585,8 @@ async def get_run_status(flow_run_id: UUID) -> dict[str, Any]:
 
     We use Prefect's model serialization for a faithful JSON representation.
     """
-    async with get_client() as client:
+    async with prefect_clients.client() as client:
         fr = await client.read_flow_run(flow_run_id)
+        run_states.observe(fr.id, fr.state_type.value if fr.state_type else None)
         # Prefect models provide pydantic serialization compatible with JSON
         return fr.model_dump(mode="json")
@@ -0,0 +1,67 @@
+"""Project-wide runtime settings loaded from environment variables and .env."""
+
+from typing import Literal
+
+from ai_pipeline_core import Settings
+
+
+class ProjectSettings(Settings):
+    """Infrastructure settings for the research pipeline.
+
+    Unlike ProjectFlowOptions, these are not per-run parameters: they describe
+    the process the pipeline runs in (caches, limits) and are read once from the
+    environment, e.g. ``LLM_CACHE_DIR=/data/llm-cache``.
+    """
+
+    # Persistent LLM result cache
+    llm_cache_enabled: bool = True
+    llm_cache_bypass: bool = False
+    llm_cache_dir: str = ".cache/llm"
+    llm_cache_max_bytes: int = 512 * 1024 * 1024
+    llm_cache_uri: str = ""
+
+    # Maximum concurrent LLM calls in this process (0 = unlimited); cache hits do not count
+    llm_max_concurrency: int = 0
+
+    # Adaptive per-model rate limiter (see rate_limit.py), e.g.
+    # LLM_RATE_LIMITS='{"gemini-2.5-flash": {"rpm": 1000, "tpm": 4000000}}'. Models without
+    # limits are only held back after being throttled. A call slower than expected by more than
+    # the stall seconds counts as throttled (the framework retries 429s after a fixed delay).
+    llm_rate_limits: dict[str, dict[str, int]] = {}
+    llm_rate_limit_stall_seconds: float = 8.0
+    llm_rate_limit_cooldown_seconds: float = 5.0
+
+    # LLM call cassettes (see cassettes.py): "record" captures calls, "replay" serves them back
+    llm_cassette_mode: Literal["off", "record", "replay"] = "off"
+    llm_cassette_path: str = ".cache/llm_cassette.jsonl"
+    llm_cassette_latency_scale: float = 1.0
+
+    # Local PDF text extraction (see pdf_extraction.py, needs the pymupdf package): pages with
+    # at least the minimum characters of text are sent as text, other pages as rendered images
+    pdf_extraction_enabled: bool = True
+    pdf_extraction_cache_dir: str = ".cache/pdf"
+    pdf_min_page_chars: int = 200
+    pdf_image_max_side: int = 1024
+
+    # Pooled HTTP client for downloads, uploads and webhooks (HTTP/2 needs the h2 package)
+    http_http2: bool = True
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 10.0
+    # Input downloads above this size are rejected (documents are capped at 25 MB anyway);
+    # bodies above the spool size are buffered on disk instead of in memory while streaming
+    http_download_max_bytes: int = 25 * 1024 * 1024
+    http_download_spool_bytes: int = 4 * 1024 * 1024
+
+    # Status webhook dispatcher: burst window, retry backoff and how long to keep
+    # retrying queued terminal states when the run ends
+    status_webhook_batch_window_seconds: float = 0.5
+    status_webhook_backoff_seconds: float = 1.0
+    status_webhook_max_backoff_seconds: float = 60.0
+    status_webhook_max_attempts: int = 5
+    status_webhook_drain_timeout_seconds: float = 300.0
+
+
+settings = ProjectSettings()
@@ -0,0 +1,166 @@
+"""In-process, ordered and coalescing delivery of status webhooks.
+
+Prefect state hooks hand their payloads to a ``StatusDispatcher`` instead of
+starting a task run per transition. A single worker on the pipeline's event loop
+posts them in order: when several states of the same flow run are waiting, only
+the latest one is sent, a burst can optionally be sent as one batched POST, and
+failed deliveries are retried with exponential backoff without blocking the
+pipeline. Closing the dispatcher drains the queue, retrying terminal states until
+``settings.status_webhook_drain_timeout_seconds`` elapses.
+"""
+
+import asyncio
+import random
+import threading
+from types import TracebackType
+from typing import Any, Self
+
+from ai_pipeline_core import get_pipeline_logger
+
+from ai_simple_research_pipeline.http_client import http_client
+from ai_simple_research_pipeline.settings import settings
+
+logger = get_pipeline_logger(__name__)
+
+TERMINAL_STATE_TYPES = {"COMPLETED", "FAILED", "CANCELLED", "CRASHED"}
+
+
+def is_terminal(payload: dict[str, Any]) -> bool:
+    """Return True if ``payload`` reports a final state of its flow run."""
+    state = payload.get("data", {}).get("state") or {}
+    return state.get("type") in TERMINAL_STATE_TYPES
+
+
+class StatusDispatcher:
+    """Ordered status webhook sender that keeps only the latest state per flow run.
+
+    Args:
+        webhook_url: Receiver URL; an empty URL makes the dispatcher a no-op
+        batch: POST all waiting statuses as ``{"statuses": [...]}`` instead of one by one
+    """
+
+    def __init__(self, webhook_url: str, *, batch: bool = False):
+        self.webhook_url = webhook_url
+        self.batch = batch
+        self.batch_window = settings.status_webhook_batch_window_seconds
+        self.backoff = settings.status_webhook_backoff_seconds
+        self.max_backoff = settings.status_webhook_max_backoff_seconds
+        self.max_attempts = settings.status_webhook_max_attempts
+        self.drain_timeout = settings.status_webhook_drain_timeout_seconds
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._pending: dict[str, dict[str, Any]] = {}  # flow run id -> latest payload
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._closing = False
+
+    async def __aenter__(self) -> Self:
+        if self.webhook_url:
+            self._loop = asyncio.get_running_loop()
+            self._thread_id = threading.get_ident()
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    def enqueue(self, payload: dict[str, Any]) -> None:
+        """Queue ``payload`` for delivery; safe to call from any thread."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if threading.get_ident() == self._thread_id:
+            self._enqueue(payload)
+        else:  # Prefect may run state hooks outside the pipeline's event loop
+            self._loop.call_soon_threadsafe(self._enqueue, payload)
+
+    def _enqueue(self, payload: dict[str, Any]) -> None:
+        key = str(payload.get("flow_run_id", ""))
+        if self._pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._pending[key] = payload  # re-insert so order follows the latest transition
+        assert self._wakeup is not None
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            if self.batch_window and not self._closing:
+                await asyncio.sleep(self.batch_window)  # let a burst of transitions coalesce
+            batch, self._pending = self._pending, {}
+            await self._deliver(batch)
+
+    async def _deliver(self, batch: dict[str, dict[str, Any]]) -> None:
+        groups = [batch] if self.batch else [{key: payload} for key, payload in batch.items()]
+        for index, group in enumerate(groups):
+            if await self._post_with_backoff(group):
+                self.delivered += len(group)
+                continue
+            # Requeue undelivered statuses ahead of newer ones unless superseded meanwhile
+            undelivered = {k: v for g in groups[index:] for k, v in g.items()}
+            kept = {
+                k: v for k, v in undelivered.items() if k not in self._pending and is_terminal(v)
+            }
+            self.dropped += len(undelivered) - len(kept)
+            if len(kept) < len(undelivered):
+                logger.warning(
+                    f"Dropping {len(undelivered) - len(kept)} status webhook(s) "
+                    f"after {self.max_attempts} attempts"
+                )
+            self._pending = {**kept, **self._pending}  # terminal states retry until drained
+            return
+
+    async def _post_with_backoff(self, group: dict[str, dict[str, Any]]) -> bool:
+        payloads = list(group.values())
+        body: Any = {"statuses": payloads} if self.batch else payloads[0]
+        for attempt in range(self.max_attempts):
+            try:
+                await self._post(body)
+                return True
+            except Exception as e:
+                logger.warning(f"Status webhook attempt {attempt + 1} failed: {e}")
+                if attempt + 1 < self.max_attempts:
+                    delay = min(self.backoff * 2**attempt, self.max_backoff)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        return False
+
+    async def _post(self, body: Any) -> None:
+        async with http_client() as client:
+            r = await client.post(self.webhook_url, json=body, follow_redirects=True)
+            r.raise_for_status()
+
+    async def aclose(self) -> None:
+        """Deliver what is still queued, giving up after the drain timeout."""
+        if self._worker is None:
+            return
+        self._closing = True
+        assert self._wakeup is not None
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            logger.warning(
+                f"Gave up delivering {len(self._pending)} status webhook(s) "
+                f"after {self.drain_timeout:.0f}s"
+            )
+        self._worker = None
+        self._loop = None
+        logger.info(
+            f"Status webhooks: {self.delivered} delivered, {self.coalesced} coalesced, "
+            f"{self.dropped} dropped"
+        )
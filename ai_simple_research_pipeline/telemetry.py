@@ -0,0 +1,227 @@
+"""Per-task LLM token, cost and latency ledger for one pipeline run.
+
+``cached_generate`` / ``cached_generate_structured`` record every LLM call in
+``run_ledger`` together with the pipeline task that made it: prompt, completion
+and cached prompt tokens, cost, latency, time spent waiting for the rate limiter
+and how many times the task had been retried. Calls answered by the LLM cache
+or replayed from a cassette are recorded as ``cached``, with the tokens of the
+original call but no cost, so a run shows both what it paid for and what it
+reused.
+
+The runners reset the ledger when a run starts, save it as
+``run_metrics/run_metrics.json`` next to the flow outputs and log a per-task
+summary when the run ends. Calls are recorded in ``current_ledger()``, which is
+``run_ledger`` unless a runner that runs several projects at once (``batch.py``)
+gives each project its own ledger with ``use_ledger``.
+"""
+
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any
+
+from ai_pipeline_core import get_pipeline_logger
+from ai_pipeline_core.storage import Storage
+from prefect.runtime import flow_run, task_run
+from pydantic import BaseModel
+
+from ai_simple_research_pipeline.documents.flow import RunMetricsDocument
+
+logger = get_pipeline_logger(__name__)
+
+COST_HEADER = "x-litellm-response-cost"
+
+
+class LLMUsage(BaseModel):
+    """Token usage and cost of one LLM response."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+
+
+def response_usage(response: Any) -> LLMUsage:
+    """Read token usage and cost from a ``ModelResponse``; missing values count as zero.
+
+    The cost comes from ``usage.cost`` when the proxy reports it there, otherwise
+    from the LiteLLM proxy's response cost header.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return LLMUsage()
+    details = getattr(usage, "prompt_tokens_details", None)
+    cost = getattr(usage, "cost", None)
+    if cost is None:
+        headers = getattr(response, "headers", None) or {}
+        cost = headers.get(COST_HEADER)
+    return LLMUsage(
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0,
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+        cost=float(cost or 0.0),
+    )
+
+
+class LLMCallRecord(LLMUsage):
+    """One LLM call made (or served from cache) on behalf of a pipeline task."""
+
+    task: str
+    task_run_id: str | None = None
+    model: str
+    cached: bool = False
+    latency_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    retries: int = 0
+
+
+class TaskMetrics(BaseModel):
+    """LLM usage of every run of one task (or of the whole run)."""
+
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    retries: int = 0
+
+    @classmethod
+    def aggregate(cls, records: list[LLMCallRecord]) -> "TaskMetrics":
+        # A task run reports its retry count on every call it makes; count it once per run
+        retries: dict[str | None, int] = {}
+        for r in records:
+            retries[r.task_run_id] = max(retries.get(r.task_run_id, 0), r.retries)
+        return cls(
+            calls=len(records),
+            cached_calls=sum(r.cached for r in records),
+            prompt_tokens=sum(r.prompt_tokens for r in records),
+            completion_tokens=sum(r.completion_tokens for r in records),
+            cached_tokens=sum(r.cached_tokens for r in records),
+            cost=round(sum(r.cost for r in records), 6),
+            latency_seconds=round(sum(r.latency_seconds for r in records), 4),
+            max_latency_seconds=max((r.latency_seconds for r in records), default=0.0),
+            wait_seconds=round(sum(r.wait_seconds for r in records), 4),
+            retries=sum(retries.values()),
+        )
+
+
+class RunMetrics(BaseModel):
+    """Content of ``run_metrics.json``."""
+
+    started_at: datetime
+    finished_at: datetime
+    totals: TaskMetrics
+    tasks: dict[str, TaskMetrics]
+    calls: list[LLMCallRecord]
+
+
+def _current_task() -> tuple[str, str | None, int]:
+    """Name, run id and retry count of the task being run; the flow name outside tasks."""
+    name = task_run.task_name
+    if name:
+        return name, task_run.id, max(task_run.run_count - 1, 0)
+    return flow_run.flow_name or "unknown", None, 0
+
+
+class RunLedger:
+    """Collects the LLM calls of the current run, grouped by task."""
+
+    def __init__(self) -> None:
+        self.records: list[LLMCallRecord] = []
+        self.started_at = datetime.now(UTC)
+
+    def reset(self) -> None:
+        """Start a new run; records of the previous one are discarded."""
+        self.records = []
+        self.started_at = datetime.now(UTC)
+
+    def record(
+        self,
+        model: str,
+        usage: LLMUsage,
+        latency_seconds: float,
+        cached: bool,
+        wait_seconds: float = 0.0,
+    ) -> None:
+        task, task_run_id, retries = _current_task()
+        if cached:
+            usage = usage.model_copy(update={"cost": 0.0})  # paid for by an earlier run
+        self.records.append(
+            LLMCallRecord(
+                **usage.model_dump(),
+                task=task,
+                task_run_id=task_run_id,
+                model=model,
+                cached=cached,
+                latency_seconds=round(latency_seconds, 4),
+                wait_seconds=round(wait_seconds, 4),
+                retries=retries,
+            )
+        )
+
+    def metrics(self) -> RunMetrics:
+        by_task: dict[str, list[LLMCallRecord]] = {}
+        for r in self.records:
+            by_task.setdefault(r.task, []).append(r)
+        return RunMetrics(
+            started_at=self.started_at,
+            finished_at=datetime.now(UTC),
+            totals=TaskMetrics.aggregate(self.records),
+            tasks={name: TaskMetrics.aggregate(by_task[name]) for name in sorted(by_task)},
+            calls=self.records,
+        )
+
+    def to_document(self) -> RunMetricsDocument:
+        return RunMetricsDocument.create(
+            name=RunMetricsDocument.FILES.METRICS, content=self.metrics()
+        )
+
+    async def save(self, documents_uri: str) -> None:
+        """Write ``run_metrics.json`` to the project storage, replacing the previous run's."""
+        storage = await Storage.from_uri(documents_uri)
+        document = self.to_document()
+        await storage.with_base(document.canonical_name()).write_bytes(
+            document.name, document.content
+        )
+
+    def log_summary(self) -> None:
+        """Log LLM calls, tokens, cost and latency per task."""
+        if not self.records:
+            return
+        metrics = self.metrics()
+        for name, m in metrics.tasks.items():
+            logger.info(f"LLM usage {name}: {_describe(m)}")
+        logger.info(f"LLM usage total: {_describe(metrics.totals)}")
+
+
+def _describe(m: TaskMetrics) -> str:
+    return (
+        f"{m.calls} calls ({m.cached_calls} cached), {m.prompt_tokens} prompt / "
+        f"{m.completion_tokens} completion / {m.cached_tokens} cached tokens, "
+        f"${m.cost:.4f}, {m.latency_seconds:.1f}s LLM time (max {m.max_latency_seconds:.1f}s, "
+        f"{m.wait_seconds:.1f}s rate limited), {m.retries} retries"
+    )
+
+
+run_ledger = RunLedger()
+_ledger: ContextVar[RunLedger | None] = ContextVar("run_ledger", default=None)
+
+
+def current_ledger() -> RunLedger:
+    """The ledger LLM calls of the current context are recorded in."""
+    return _ledger.get() or run_ledger
+
+
+@contextmanager
+def use_ledger(ledger: RunLedger) -> Generator[RunLedger]:
+    """Record LLM calls made in this context (and tasks started from it) in ``ledger``."""
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
@@ -0,0 +1 @@
+"""Benchmarks of the research pipeline (run with ``python -m benchmarks.<module>``)."""
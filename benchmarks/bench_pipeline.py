@@ -0,0 +1,279 @@
+"""End-to-end benchmark of ``research_pipeline`` over a recorded LLM cassette.
+
+Each repetition runs ``research_pipeline`` on a fresh working directory, the way
+the deployment runs it: the project's ``user_input`` files are downloaded from a
+local test HTTP server, every flow runs (manifests are recorded, ``resume`` is
+off), the reports are uploaded back to that server and the status and report
+webhooks are sent to it. The LLM cache is disabled and every LLM call is
+replayed from the cassette.
+
+Reported for the pipeline (median over repetitions): wall time, CPU time, LLM
+calls, uploads, the growth of the process's peak RSS during the run and the
+process's peak RSS. Per flow and per task: run count and wall time from the
+Prefect flow and task runs.
+
+Record the cassette once against a real LiteLLM proxy, or against the offline
+stand-in (``llm_stub_server.py``) started in-process with ``--stub-llm``. Offline,
+pick a non-gemini ``--model``: the framework counts gemini context tokens with
+tiktoken, which downloads its encoding on first use. Replays must pass the same
+``--model`` as the recording:
+
+    python -m benchmarks.bench_pipeline --record
+    python -m benchmarks.bench_pipeline --record --stub-llm --model stub-model
+
+Then benchmark offline; ``--latency-scale 0`` measures orchestration overhead
+only, ``1`` replays recorded model latency:
+
+    python -m benchmarks.bench_pipeline --latency-scale 0 --repeat 3 --output bench.json
+    python -m benchmarks.bench_pipeline --latency-scale 0 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PROJECT = ROOT / "projects" / "privateai"
+DEFAULT_CASSETTE = ROOT / "benchmarks" / "cassettes" / "privateai.jsonl"
+RUNS_PAGE = 200
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process so far; it never decreases."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes vs KiB
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _run_once(project: Path, flow_options: Any) -> dict[str, float]:
+    from ai_simple_research_pipeline.cassettes import llm_cassette
+    from ai_simple_research_pipeline.documents.flow import (
+        FinalReportDocument,
+        InitialSummaryDocument,
+        UserInputDocument,
+    )
+    from ai_simple_research_pipeline.http_server import (
+        start_test_http_server,
+        stop_test_http_server,
+    )
+    from ai_simple_research_pipeline.research_pipeline import research_pipeline
+
+    inputs = project / UserInputDocument.canonical_name()
+    outputs = [*FinalReportDocument.FILES, *InitialSummaryDocument.FILES]
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        uploads_dir = Path(workdir) / "uploads"
+        _, server, _ = start_test_http_server(port=0, inputs_dir=inputs, outputs_dir=uploads_dir)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        options = flow_options.model_copy(
+            update={
+                "input_documents_urls": [f"{base}/inputs/{p.name}" for p in inputs.iterdir()],
+                "output_documents_urls": {name: f"{base}/outputs/{name}" for name in outputs},
+                "status_webhook_url": f"{base}/webhook/status",
+                "report_webhook_url": f"{base}/webhook/report",
+            }
+        )
+        calls = llm_cassette.recorded + llm_cassette.replayed
+        rss, wall, cpu = _peak_rss_mb(), time.perf_counter(), _cpu_seconds()
+        try:
+            await research_pipeline(project.name, str(Path(workdir) / "documents"), options)
+        finally:
+            stop_test_http_server(server)
+        return {
+            "wall_seconds": time.perf_counter() - wall,
+            "cpu_seconds": _cpu_seconds() - cpu,
+            "llm_calls": llm_cassette.recorded + llm_cassette.replayed - calls,
+            "uploads": sum(1 for name in outputs if (uploads_dir / name).exists()),
+            "peak_rss_growth_mb": _peak_rss_mb() - rss,
+            "process_peak_rss_mb": _peak_rss_mb(),
+        }
+
+
+def _timings(runs: list[tuple[str, Any, Any]]) -> dict[str, dict[str, float]]:
+    seconds: dict[str, list[float]] = {}
+    for name, start, end in runs:
+        if start and end:
+            seconds.setdefault(name, []).append((end - start).total_seconds())
+    return {
+        name: {
+            "runs": len(values),
+            "mean_seconds": statistics.mean(values),
+            "max_seconds": max(values),
+        }
+        for name, values in sorted(seconds.items())
+    }
+
+
+async def _run_timings(since: datetime) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Per-flow and per-task run count and wall time of the Prefect runs since ``since``."""
+    from prefect.client.orchestration import get_client
+    from prefect.client.schemas.filters import (
+        FlowRunFilter,
+        FlowRunFilterStartTime,
+        TaskRunFilter,
+        TaskRunFilterStartTime,
+    )
+
+    flow_runs: list[Any] = []
+    task_runs: list[Any] = []
+    async with get_client() as client:
+        while True:
+            page = await client.read_flow_runs(
+                flow_run_filter=FlowRunFilter(start_time=FlowRunFilterStartTime(after_=since)),
+                offset=len(flow_runs),
+                limit=RUNS_PAGE,
+            )
+            flow_runs.extend(page)
+            if len(page) < RUNS_PAGE:
+                break
+        while True:
+            page = await client.read_task_runs(
+                task_run_filter=TaskRunFilter(start_time=TaskRunFilterStartTime(after_=since)),
+                offset=len(task_runs),
+                limit=RUNS_PAGE,
+            )
+            task_runs.extend(page)
+            if len(page) < RUNS_PAGE:
+                break
+        flow_names = {
+            flow_id: (await client.read_flow(flow_id)).name
+            for flow_id in {r.flow_id for r in flow_runs}
+        }
+    flows = _timings([(flow_names[r.flow_id], r.start_time, r.end_time) for r in flow_runs])
+    tasks = _timings([(r.name.rsplit("-", 1)[0], r.start_time, r.end_time) for r in task_runs])
+    return flows, tasks
+
+
+def _table(results: dict[str, dict[str, float]], columns: list[str]) -> str:
+    width = max(len(name) for name in results) + 2
+    lines = [f"{'':<{width}}" + "".join(f"{c:>21}" for c in columns)]
+    for name, metrics in results.items():
+        lines.append(f"{name:<{width}}" + "".join(f"{metrics[c]:>21.3f}" for c in columns))
+    return "\n".join(lines)
+
+
+def _regressions(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    checks = [
+        ("pipeline", name, metric, current["pipeline"]["research_pipeline"].get(metric))
+        for name, metric in [
+            ("research_pipeline", "wall_seconds"),
+            ("research_pipeline", "cpu_seconds"),
+            ("research_pipeline", "peak_rss_growth_mb"),
+        ]
+    ]
+    checks += [
+        ("flows", name, "mean_seconds", metrics["mean_seconds"])
+        for name, metrics in current["flows"].items()
+    ]
+    found = []
+    for section, name, metric, value in checks:
+        before = baseline.get(section, {}).get(name, {}).get(metric)
+        if before and value is not None and value > before * (1 + tolerance):
+            found.append(f"{section}.{name}.{metric}: {before:.3f} -> {value:.3f}")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of research_pipeline")
+    parser.add_argument("--project", type=Path, default=DEFAULT_PROJECT)
+    parser.add_argument("--cassette", type=Path, default=DEFAULT_CASSETTE)
+    parser.add_argument("--record", action="store_true", help="call the LLM and record calls")
+    parser.add_argument(
+        "--stub-llm", action="store_true", help="record against the in-process LLM stand-in"
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--mode", default="quick", help="flow_options.mode profile to run")
+    parser.add_argument(
+        "--model", help="core and small model; replays need the model of the recording"
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON from --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression ratio")
+    args = parser.parse_args()
+
+    if args.stub_llm and not args.record:
+        parser.error("--stub-llm only applies to --record")
+    if not args.record and not args.cassette.exists():
+        parser.error(
+            f"cassette {args.cassette} not found; record it first with --record "
+            "(add --stub-llm to record offline)"
+        )
+
+    # Settings are read at import time, so configure them before importing the pipeline
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["LLM_CASSETTE_PATH"] = str(args.cassette)
+    os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    stub_port = _free_port() if args.stub_llm else 0
+    if args.stub_llm:
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+        os.environ["OPENAI_API_KEY"] = "stub"
+    if args.record:
+        args.cassette.unlink(missing_ok=True)
+
+    from ai_pipeline_core import disable_run_logger, prefect_test_harness
+
+    from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+    from ai_simple_research_pipeline.llm_stub_server import (
+        start_llm_stub_server,
+        stop_llm_stub_server,
+    )
+
+    models = {"core_model": args.model, "small_model": args.model} if args.model else {}
+    flow_options = ProjectFlowOptions(mode=args.mode, resume=False, **models)
+    stub = start_llm_stub_server(port=stub_port)[1] if args.stub_llm else None
+    started = datetime.now(UTC)
+    try:
+        with prefect_test_harness(), disable_run_logger():
+            runs = [asyncio.run(_run_once(args.project, flow_options)) for _ in range(args.repeat)]
+            flows, tasks = asyncio.run(_run_timings(started))
+    finally:
+        if stub:
+            stop_llm_stub_server(stub)
+
+    pipeline = {
+        "research_pipeline": {
+            metric: statistics.median(r[metric] for r in runs) for metric in runs[0]
+        }
+    }
+    print(f"Pipeline (median of {args.repeat} runs, mode={args.mode}):")
+    print(_table(pipeline, list(runs[0])))
+    print("\nFlows (all runs):")
+    print(_table(flows, ["runs", "mean_seconds", "max_seconds"]))
+    print("\nTasks (all runs):")
+    print(_table(tasks, ["runs", "mean_seconds", "max_seconds"]))
+
+    results = {"pipeline": pipeline, "flows": flows, "tasks": tasks}
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = _regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions over {args.tolerance:.0%}:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"\nNo regressions over {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 """Common test fixtures for pipeline projects."""
 
 import asyncio
+import importlib
+from collections.abc import Iterator
 
 import pytest
 from ai_pipeline_core import disable_run_logger, prefect_test_harness
 
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.llm_cache import llm_cache
+from ai_simple_research_pipeline.llm_stub_server import start_llm_stub_server, stop_llm_stub_server
+
 
 @pytest.fixture(autouse=True, scope="session")
 def prefect_test_fixture():
@@ -52,3 +58,27 @@ def event_loop():
             )
     finally:
         loop.close()
+
+
+@pytest.fixture
+def stub_llm_options(monkeypatch: pytest.MonkeyPatch) -> Iterator[ProjectFlowOptions]:
+    """Send LLM calls to the stand-in server, bypassing the persistent LLM cache.
+
+    Yields flow options whose models the stand-in answers. They are not gemini
+    models, because the framework counts gemini context tokens with tiktoken,
+    which downloads its encoding on first use.
+    """
+    client = importlib.import_module("ai_pipeline_core.llm.client")
+    base_url, server, _ = start_llm_stub_server(port=0)
+    monkeypatch.setattr(
+        client,
+        "settings",
+        client.settings.model_copy(
+            update={"openai_base_url": f"{base_url}/v1", "openai_api_key": "stub"}
+        ),
+    )
+    monkeypatch.setattr(llm_cache, "enabled", False)
+    try:
+        yield ProjectFlowOptions(core_model="stub-model", small_model="stub-model")
+    finally:
+        stop_llm_stub_server(server)
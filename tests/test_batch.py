@@ -0,0 +1,65 @@
+"""Test the multi-project batch runner helpers."""
+
+import importlib
+from pathlib import Path
+
+import pytest
+
+from ai_simple_research_pipeline.batch import (
+    ProjectResult,
+    expand_projects,
+    run_batch,
+    summarize,
+)
+from ai_simple_research_pipeline.documents.flow import InitialSummaryDocument, UserInputDocument
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.flows import summary_flow
+
+
+def test_expand_projects_keeps_order_and_only_globbed_project_directories(tmp_path: Path):
+    """Test that globs match only directories with user input and duplicates are dropped."""
+    for name in ("b", "a"):
+        (tmp_path / name / "user_input").mkdir(parents=True)
+    (tmp_path / "notes").mkdir()
+
+    explicit = str(tmp_path / "b")
+    assert expand_projects([explicit, str(tmp_path / "*")]) == [explicit, str(tmp_path / "a")]
+
+
+def test_summarize_reports_failures_throughput_and_llm_usage():
+    """Test that failed projects are counted but excluded from latency percentiles."""
+    results = [
+        ProjectResult("p1", "completed", wall_seconds=10.0, llm_calls=4, tokens=100, cost=0.5),
+        ProjectResult("p2", "up_to_date", wall_seconds=2.0, llm_calls=2, cached_llm_calls=2),
+        ProjectResult("p3", "failed", wall_seconds=99.0, error="ValueError: boom"),
+    ]
+    summary = summarize(results, wall_seconds=20.0)
+
+    assert (summary["completed"], summary["up_to_date"], summary["failed"]) == (1, 1, 1)
+    assert summary["project_seconds_max"] == 10.0
+    assert summary["projects_per_hour"] == 540.0
+    assert summary["llm_calls"] == 6 and summary["cached_llm_calls"] == 2
+    assert summary["cost"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_projects_like_the_pipeline(
+    stub_llm_options: ProjectFlowOptions, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a second batch run skips the flows whose inputs did not change."""
+    pipeline = importlib.import_module("ai_simple_research_pipeline.research_pipeline")
+    monkeypatch.setattr(pipeline, "FLOWS", [summary_flow])
+    inputs = tmp_path / "acme" / UserInputDocument.canonical_name()
+    inputs.mkdir(parents=True)
+    (inputs / "deck.md").write_text("# Acme\n\nAcme builds widgets.")
+    directories = [str(tmp_path / "acme")]
+
+    [first] = await run_batch(directories, stub_llm_options, concurrency=2)
+    [second] = await run_batch(directories, stub_llm_options, concurrency=2)
+
+    assert (first.status, first.flows_run, first.flows_skipped) == ("completed", 1, 0)
+    assert first.llm_calls > 0
+    summary = tmp_path / "acme" / InitialSummaryDocument.canonical_name()
+    assert sorted(p.name for p in summary.iterdir()) == sorted(InitialSummaryDocument.FILES)
+    assert (second.status, second.flows_run, second.flows_skipped) == ("up_to_date", 0, 1)
+    assert second.llm_calls == 0
@@ -0,0 +1,31 @@
+"""Test LLM call recording and replay."""
+
+from pathlib import Path
+
+import pytest
+
+from ai_simple_research_pipeline.cassettes import CassetteMissError, LLMCassette
+
+
+@pytest.mark.asyncio
+async def test_cassette_records_then_replays_without_calling_the_model(tmp_path: Path):
+    """Test that recorded payloads are replayed and unknown calls are rejected."""
+    path = tmp_path / "cassette.jsonl"
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"content": f"answer {calls}"}
+
+    recorder = LLMCassette(path, mode="record")
+    assert await recorder.play("a" * 64, "model-a", compute) == {"content": "answer 1"}
+    assert await recorder.play("a" * 64, "model-a", compute) == {"content": "answer 2"}
+    assert recorder.recorded == 2
+
+    player = LLMCassette(path, mode="replay", latency_scale=0)
+    assert await player.play("a" * 64, "model-a", compute) == {"content": "answer 2"}
+    assert player.replayed == 1 and calls == 2
+
+    with pytest.raises(CassetteMissError):
+        await player.play("b" * 64, "model-a", compute)
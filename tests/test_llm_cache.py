@@ -0,0 +1,65 @@
+"""Test the persistent LLM result cache."""
+
+from pathlib import Path
+
+import pytest
+from ai_pipeline_core import AIMessages
+from pydantic import BaseModel
+
+from ai_simple_research_pipeline.documents.flow import UserInputDocument
+from ai_simple_research_pipeline.llm_cache import LLMCache, cache_key
+
+
+class _Answer(BaseModel):
+    value: str
+
+
+def test_cache_key_tracks_document_content_model_and_schema():
+    """Test that the key changes with document bytes, model and schema but not object identity."""
+    doc = UserInputDocument.create(name="deck.md", content="v1")
+    same_doc = UserInputDocument.create(name="deck.md", content="v1")
+    changed_doc = UserInputDocument.create(name="deck.md", content="v2")
+
+    base = cache_key("model-a", AIMessages([doc]), "prompt")
+    assert cache_key("model-a", AIMessages([same_doc]), "prompt") == base
+    assert cache_key("model-a", AIMessages([changed_doc]), "prompt") != base
+    assert cache_key("model-b", AIMessages([doc]), "prompt") != base
+    assert cache_key("model-a", AIMessages([doc]), "other prompt") != base
+    assert cache_key("model-a", AIMessages([doc]), "prompt", _Answer) != base
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_misses_and_bypass(tmp_path: Path):
+    """Test that a repeated call is served from disk and bypass forces recomputation."""
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"content": f"answer {calls}"}
+
+    cache = LLMCache(tmp_path, max_bytes=1024 * 1024)
+    assert await cache.get_or_compute("k" * 64, compute) == {"content": "answer 1"}
+    assert await cache.get_or_compute("k" * 64, compute) == {"content": "answer 1"}
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    bypassing = LLMCache(tmp_path, max_bytes=1024 * 1024, bypass=True)
+    assert await bypassing.get_or_compute("k" * 64, compute) == {"content": "answer 2"}
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(tmp_path: Path):
+    """Test that the oldest untouched entry is evicted once the size limit is exceeded."""
+    cache = LLMCache(tmp_path, max_bytes=60)
+    payload = {"content": "x" * 10}  # 25 bytes on disk
+
+    await cache.put("a" * 64, payload)
+    await cache.put("b" * 64, payload)
+    assert await cache.get("a" * 64) == payload  # refresh "a"
+    await cache.put("c" * 64, payload)
+
+    assert await cache.get("b" * 64) is None
+    assert await cache.get("a" * 64) == payload
+    assert await cache.get("c" * 64) == payload
+    assert cache.stats.evictions == 1
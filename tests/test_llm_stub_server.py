@@ -0,0 +1,80 @@
+"""Test the deterministic OpenAI-compatible LLM stand-in server."""
+
+import json
+import urllib.error
+import urllib.request
+from typing import Any
+
+import pytest
+from pydantic import BaseModel, Field
+
+from ai_simple_research_pipeline.llm_stub_server import (
+    StubLLMConfig,
+    start_llm_stub_server,
+    stop_llm_stub_server,
+)
+
+
+class Citation(BaseModel):
+    file: str
+    quote: str
+
+
+class Finding(BaseModel):
+    title: str
+    confidence: float = Field(ge=0, le=1)
+    evidence: list[Citation] = Field(min_length=2)
+
+
+class Findings(BaseModel):
+    risks: list[Finding] = Field(min_length=5, max_length=5)
+
+
+def _complete(base_url: str, body: dict[str, Any]) -> dict[str, Any]:
+    request = urllib.request.Request(
+        f"{base_url}/v1/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.load(response)
+
+
+def test_stub_returns_schema_valid_and_repeatable_completions():
+    """Test that structured requests validate and identical requests get identical answers."""
+    base_url, server, _ = start_llm_stub_server(port=0)
+    try:
+        body = {
+            "model": "gemini-2.5-flash",
+            "messages": [{"role": "user", "content": "Review standardized/deck.md"}],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "Findings", "schema": Findings.model_json_schema()},
+            },
+        }
+        first = _complete(base_url, body)
+        findings = Findings.model_validate_json(first["choices"][0]["message"]["content"])
+        assert findings.risks[0].evidence[0].file == "standardized/deck.md"
+        assert _complete(base_url, body)["choices"] == first["choices"]
+
+        text = _complete(
+            base_url, {"model": "m", "messages": [{"role": "user", "content": "## Team\n## Risks"}]}
+        )
+        content = text["choices"][0]["message"]["content"]
+        assert content.startswith("## Team\n") and "\n## Risks\n" in content
+    finally:
+        stop_llm_stub_server(server)
+
+
+def test_stub_injects_errors():
+    """Test that the configured error rate and statuses are applied."""
+    base_url, server, _ = start_llm_stub_server(
+        port=0, config=StubLLMConfig(error_rate=1.0, error_statuses=(429,))
+    )
+    try:
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _complete(base_url, {"model": "m", "messages": []})
+        assert exc.value.code == 429
+        assert server.stats.errors == 1
+    finally:
+        stop_llm_stub_server(server)
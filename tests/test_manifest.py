@@ -0,0 +1,148 @@
+"""Test flow input-hash manifests."""
+
+import importlib
+from pathlib import Path
+
+import pytest
+from ai_pipeline_core import DocumentList
+
+from ai_simple_research_pipeline.documents.flow import (
+    InitialSummaryDocument,
+    StandardizedFileDocument,
+    UserInputDocument,
+)
+from ai_simple_research_pipeline.flow_options import OutputTarget, ProjectFlowOptions
+from ai_simple_research_pipeline.flows import standardization_flow, summary_flow
+from ai_simple_research_pipeline.manifest import (
+    compute_manifest,
+    load_stored_documents,
+    read_manifest,
+    record_flow_manifest,
+    upload_key,
+)
+
+cli = importlib.import_module("ai_simple_research_pipeline.cli")
+
+
+def _documents(deck: str) -> DocumentList:
+    return DocumentList(
+        [
+            UserInputDocument.create(name="deck.md", content=deck),
+            InitialSummaryDocument.create(
+                name=InitialSummaryDocument.FILES.SHORT_DESCRIPTION, content="short"
+            ),
+        ]
+    )
+
+
+def test_manifest_tracks_inputs_outputs_and_content_options():
+    """Test that the manifest changes with inputs and models but not with delivery options."""
+    options = ProjectFlowOptions()
+    manifest = compute_manifest(summary_flow, _documents("v1"), options)
+
+    assert manifest.inputs == {"user_input/deck.md": _documents("v1")[0].sha256}
+    assert list(manifest.outputs) == ["initial_summary/short_description.md"]
+
+    assert compute_manifest(summary_flow, _documents("v1"), options) == manifest
+    assert compute_manifest(summary_flow, _documents("v2"), options) != manifest
+
+    with_webhook = ProjectFlowOptions(status_webhook_url="http://example.com/status")
+    assert compute_manifest(summary_flow, _documents("v1"), with_webhook) == manifest
+
+    other_model = ProjectFlowOptions(core_model="gpt-5")
+    assert compute_manifest(summary_flow, _documents("v1"), other_model) != manifest
+
+
+@pytest.mark.asyncio
+async def test_manifest_is_not_recorded_while_a_file_lacks_outputs(tmp_path: Path):
+    """Test that a standardization run with a failed file leaves no manifest to skip it with."""
+    options = ProjectFlowOptions()
+    uri = str(tmp_path)
+    deck = UserInputDocument.create(name="deck.md", content="deck")
+    notes = UserInputDocument.create(name="notes.md", content="notes")
+    outputs = [
+        StandardizedFileDocument.create(name=name, content="x")
+        for name in ("deck.yaml", "deck.md", "notes.yaml", "notes.md")
+    ]
+
+    complete = DocumentList([deck, notes, *outputs])
+    manifest = await record_flow_manifest(standardization_flow, uri, options, complete)
+    assert manifest and await read_manifest(uri, manifest.flow_name) == manifest
+
+    notes_failed = DocumentList([deck, notes, *outputs[:2]])
+    assert await record_flow_manifest(standardization_flow, uri, options, notes_failed) is None
+    assert await read_manifest(uri, manifest.flow_name) is None
+
+
+@pytest.mark.asyncio
+async def test_saving_deletes_outputs_the_flow_no_longer_produces(tmp_path: Path):
+    """Test that a summary saved without descriptions removes those of an earlier run."""
+    options = ProjectFlowOptions()
+    uri = str(tmp_path)
+    files = InitialSummaryDocument.FILES
+    summary = InitialSummaryDocument.create(name=files.INITIAL_SUMMARY, content="{}")
+    descriptions = [
+        InitialSummaryDocument.create(name=name, content="text", description="Generated")
+        for name in (files.SHORT_DESCRIPTION, files.LONG_DESCRIPTION)
+    ]
+    config = summary_flow.config
+    await config.save_documents(uri, DocumentList([summary, *descriptions]))
+
+    await config.save_documents(uri, DocumentList([summary]))
+
+    stored = await load_stored_documents(uri)
+    assert [d.name for d in stored.filter_by(InitialSummaryDocument)] == [files.INITIAL_SUMMARY]
+    assert sorted(p.name for p in (tmp_path / summary.canonical_name()).iterdir()) == [
+        files.INITIAL_SUMMARY
+    ]
+    manifest = compute_manifest(summary_flow, stored, options)
+    assert list(manifest.outputs) == [f"initial_summary/{files.INITIAL_SUMMARY}"]
+
+
+@pytest.mark.asyncio
+async def test_resume_checks_only_the_flows_up_to_end(tmp_path: Path):
+    """Test that a run with --end is up to date when the flows it covers are."""
+    options = ProjectFlowOptions()
+    uri = str(tmp_path)
+    inputs = tmp_path / UserInputDocument.canonical_name()
+    inputs.mkdir()
+    (inputs / "deck.md").write_text("deck")
+    summary = InitialSummaryDocument.create(
+        name=InitialSummaryDocument.FILES.INITIAL_SUMMARY, content="{}"
+    )
+    await summary_flow.config.save_documents(uri, DocumentList([summary]))
+    await record_flow_manifest(summary_flow, uri, options)
+
+    assert await cli._first_stale_flow(cli._ResumePlan(uri, options, None, 1)) is None
+    assert await cli._first_stale_flow(cli._ResumePlan(uri, options, None, None)) == 2
+
+
+def test_resume_plan_logs_invalid_flow_options(caplog: pytest.LogCaptureFixture):
+    """Test that options run_cli will reject leave no resume plan, with a warning."""
+    assert cli._parse_resume_plan(["project", "--mode", "nonexistent"]) is None
+    assert "invalid flow options" in caplog.text
+
+    plan = cli._parse_resume_plan(["project", "--end", "2", "--mode", "test"])
+    assert plan and (plan.end, plan.flow_options.mode) == (2, "test")
+
+
+def test_upload_targets_ignore_url_signature():
+    """Test that plain and extended output URLs resolve to upload keys ignoring signatures."""
+    options = ProjectFlowOptions(
+        output_documents_urls={
+            "full_report.md": "https://storage.example.com/b/full_report.md?sig=1",
+            "short_report.md": OutputTarget(
+                url="https://storage.example.com/b/short_report.md?sig=1",
+                headers={"x-goog-meta-run": "1"},
+            ),
+        }
+    )
+    full = options.output_target("full_report.md")
+    short = options.output_target("short_report.md")
+    assert full and short and options.output_target("missing.md") is None
+    assert short.headers == {"x-goog-meta-run": "1"}
+
+    assert upload_key("full_report.md", full.url) == upload_key(
+        "full_report.md", "https://storage.example.com/b/full_report.md?sig=2"
+    )
+    assert upload_key("full_report.md", full.url) != upload_key("short_report.md", short.url)
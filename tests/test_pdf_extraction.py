@@ -0,0 +1,72 @@
+"""Test the local PDF text extraction."""
+
+from pathlib import Path
+
+import pytest
+
+from ai_simple_research_pipeline import pdf_extraction
+from ai_simple_research_pipeline.documents.flow import UserInputDocument
+from ai_simple_research_pipeline.pdf_extraction import PdfExtraction, expand_pdf, is_text_page
+from ai_simple_research_pipeline.settings import settings
+
+PAGE_TEXT = "The protocol settles payments in under two seconds. " * 10
+PDF_BYTES = b"%PDF-1.4\n%fake\n"
+JPEG_BYTES = b"\xff\xd8\xff\xe0fake-jpeg"
+
+
+def test_is_text_page():
+    """Test that only pages with enough readable text are sent as text."""
+    assert is_text_page(PAGE_TEXT, image_coverage=0.0, min_chars=200)
+    assert not is_text_page("Figure 3", image_coverage=0.0, min_chars=200)
+    assert not is_text_page("�\x01\x02" * 200, image_coverage=0.0, min_chars=200)
+    # A page mostly covered by a picture needs more than a caption's worth of text
+    assert not is_text_page(PAGE_TEXT, image_coverage=0.9, min_chars=200)
+
+
+@pytest.mark.asyncio
+async def test_expand_pdf_sends_text_and_image_pages_and_reuses_the_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a PDF becomes one Markdown part plus one image per image page, extracted once."""
+    monkeypatch.setattr(
+        pdf_extraction,
+        "settings",
+        settings.model_copy(update={"pdf_extraction_cache_dir": str(tmp_path)}),
+    )
+    monkeypatch.setattr(pdf_extraction, "pdf_extraction_available", lambda: True)
+    calls: list[bytes] = []
+
+    def fake_extract(
+        content: bytes, min_chars: int, max_side: int
+    ) -> tuple[PdfExtraction, dict[int, bytes]]:
+        calls.append(content)
+        extraction = PdfExtraction(pages=3, text_pages=[(1, "Intro"), (3, "Team")], image_pages=[2])
+        return extraction, {2: JPEG_BYTES}
+
+    monkeypatch.setattr(pdf_extraction, "extract_pdf", fake_extract)
+    document = UserInputDocument.create(name="deck.pdf", content=PDF_BYTES)
+
+    text, image = await expand_pdf(document)
+    again = await expand_pdf(document)
+
+    assert len(calls) == 1  # the second expansion is served from the disk cache
+    assert [part.sha256 for part in again] == [text.sha256, image.sha256]
+    assert isinstance(text, UserInputDocument) and isinstance(image, UserInputDocument)
+    assert text.name == "deck.pdf.md" and image.name == "deck.pdf.page-002.jpg"
+    body = text.text
+    assert "`deck.pdf.page-002.jpg`" in body and "single source file `deck.pdf`" in body
+    assert body.index("<!-- page 1 -->") < body.index("<!-- page 2: see") < body.index("Team")
+    assert image.content == JPEG_BYTES
+
+
+@pytest.mark.asyncio
+async def test_expand_pdf_keeps_other_documents(monkeypatch: pytest.MonkeyPatch):
+    """Test that non-PDF documents, and PDFs when extraction is off, are sent unchanged."""
+    notes = UserInputDocument.create(name="notes.md", content="# Notes")
+    pdf = UserInputDocument.create(name="deck.pdf", content=PDF_BYTES)
+    assert await expand_pdf(notes) == [notes]
+
+    monkeypatch.setattr(
+        pdf_extraction, "settings", settings.model_copy(update={"pdf_extraction_enabled": False})
+    )
+    assert await expand_pdf(pdf) == [pdf]
@@ -0,0 +1,39 @@
+"""Test the execution profiles selected by flow_options.mode."""
+
+from ai_simple_research_pipeline.documents.flow import UserInputDocument
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.profiles import MODE_PROFILES, TRUNCATION_MARKER, truncate_input
+
+
+def test_quick_profile_matches_field_defaults():
+    """Test that the default mode's profile equals the plain field defaults."""
+    assert ProjectFlowOptions().profile() == MODE_PROFILES["quick"]
+
+
+def test_mode_supplies_defaults_and_explicit_options_win():
+    """Test that a mode sets its profile values unless an option is given explicitly."""
+    options = ProjectFlowOptions(mode="full", small_model="gemini-2.5-flash-lite")
+
+    assert options.core_model == MODE_PROFILES["full"].core_model
+    assert options.report_mode == "sectioned"
+    assert options.small_model == "gemini-2.5-flash-lite"
+
+    test = ProjectFlowOptions(mode="test")
+    assert not test.full_report and not test.descriptions
+    assert test.max_input_chars == MODE_PROFILES["test"].max_input_chars
+
+
+def test_truncate_input_cuts_long_text_only():
+    """Test that text over the limit is cut deterministically and other inputs are kept."""
+    long_text = UserInputDocument.create(name="notes.md", content="word " * 100)
+    short_text = UserInputDocument.create(name="short.md", content="word")
+    pdf = UserInputDocument.create(name="deck.pdf", content=b"%PDF-1.4\n" + b"x" * 1000)
+
+    truncated = truncate_input(long_text, 50)
+
+    assert isinstance(truncated, UserInputDocument) and truncated.name == "notes.md"
+    assert truncated.text == ("word " * 100)[:50] + TRUNCATION_MARKER
+    assert truncated.sha256 == truncate_input(long_text, 50).sha256
+    assert truncate_input(short_text, 50) is short_text
+    assert truncate_input(pdf, 50) is pdf
+    assert truncate_input(long_text, 0) is long_text
@@ -0,0 +1,92 @@
+"""Test the adaptive LLM rate limiter."""
+
+import asyncio
+
+import pytest
+from ai_pipeline_core.exceptions import LLMError
+
+from ai_simple_research_pipeline import rate_limit
+from ai_simple_research_pipeline.rate_limit import RateLimiter, is_rate_limit_error
+from ai_simple_research_pipeline.telemetry import LLMUsage
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_wait_for_the_window(monkeypatch: pytest.MonkeyPatch):
+    """Test that a request beyond the rpm limit waits until the oldest grant expires."""
+    monkeypatch.setattr(rate_limit, "WINDOW_SECONDS", 0.2)
+    limiter = RateLimiter(limits={"model-a": {"rpm": 2}})
+
+    async def call() -> float:
+        async with limiter.request("model-a", prompt_tokens=100) as ticket:
+            ticket.usage = LLMUsage(prompt_tokens=100, completion_tokens=10)
+        return ticket.wait_seconds
+
+    waits = await asyncio.gather(call(), call(), call())
+
+    stats = limiter.stats()["model-a"]
+    assert waits[0] < 0.05 and waits[1] < 0.05 and waits[2] >= 0.15
+    assert stats.requests == 3 and stats.max_queue_depth >= 1 and stats.queue_depth == 0
+
+
+class ProviderError(Exception):
+    """Stand-in for an OpenAI-compatible API error with an HTTP status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+async def _throttled(limiter: RateLimiter, model: str) -> None:
+    """One call that fails like the framework does after a provider 429."""
+    with pytest.raises(LLMError):
+        async with limiter.request(model, prompt_tokens=1000):
+            try:
+                raise ProviderError(429)
+            except ProviderError as e:
+                raise LLMError("Exhausted all retry attempts for LLM generation.") from e
+
+
+async def _succeed(limiter: RateLimiter, model: str, delay: float = 0.0) -> None:
+    async with limiter.request(model, prompt_tokens=100) as ticket:
+        await asyncio.sleep(delay)
+        ticket.usage = LLMUsage(prompt_tokens=100, completion_tokens=10)
+
+
+def test_only_http_429_counts_as_a_rate_limit():
+    """Test that the status code decides, not a "429" somewhere in the message."""
+    try:
+        raise LLMError("retries exhausted") from ProviderError(429)
+    except LLMError as e:
+        assert is_rate_limit_error(e)
+    assert not is_rate_limit_error(ProviderError(500))
+    assert not is_rate_limit_error(ValueError("invoice 429 is missing"))
+
+
+@pytest.mark.asyncio
+async def test_learned_limits_grow_back_above_the_snapshot(monkeypatch: pytest.MonkeyPatch):
+    """Test that a limit learned from a quiet window is raised again by successful calls."""
+    monkeypatch.setattr(rate_limit, "WINDOW_SECONDS", 0.01)
+    limiter = RateLimiter(cooldown_seconds=0)
+
+    await _throttled(limiter, "model-b")
+    stats = limiter.stats()["model-b"]
+    assert stats.throttles == 1
+    assert stats.rpm_limit == 1 and stats.scale == 0.5
+
+    for _ in range(12):
+        await _succeed(limiter, "model-b")
+    stats = limiter.stats()["model-b"]
+    assert stats.scale == 1.0 and stats.rpm_limit > 1
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_back_off_without_learning_a_limit():
+    """Test that a stalled call lowers the scale but leaves an unlimited model unlimited."""
+    limiter = RateLimiter(stall_seconds=0)
+
+    await _succeed(limiter, "model-c")
+    await _succeed(limiter, "model-c", delay=0.05)
+
+    stats = limiter.stats()["model-c"]
+    assert stats.throttles == 1 and stats.scale == 0.5
+    assert stats.rpm_limit == 0 and stats.tpm_limit == 0
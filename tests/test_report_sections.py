@@ -0,0 +1,24 @@
+"""Test stitching of sectioned full reports."""
+
+from ai_simple_research_pipeline.flows.step_04_report.tasks import stitch_report_sections
+
+
+def test_stitch_report_sections_normalizes_heading_levels():
+    """Test that sections get one ## heading and nested headings fit levels 3-5."""
+    report = stitch_report_sections(
+        [
+            ("Executive summary", "## Executive summary\n\nAcme sells widgets."),
+            (
+                "Risks",
+                "# Market\nDemand is early.\n## Detail\n#### Deep\n```\n# not a heading\n```",
+            ),
+            ("Open questions", "  "),
+        ]
+    )
+
+    assert report == (
+        "## Executive summary\n\nAcme sells widgets.\n\n"
+        "## Risks\n\n### Market\nDemand is early.\n#### Detail\n##### Deep\n"
+        "```\n# not a heading\n```\n\n"
+        "## Open questions\n"
+    )
@@ -0,0 +1,96 @@
+"""Test the BM25 retrieval index over standardized Markdown."""
+
+from pathlib import Path
+
+import pytest
+from ai_pipeline_core import DocumentList
+
+from ai_simple_research_pipeline.documents.flow import (
+    RetrievalIndexDocument,
+    StandardizedFileDocument,
+)
+from ai_simple_research_pipeline.flows.step_02_standardization.standardization_flow import (
+    StandardizationFlowConfig,
+)
+from ai_simple_research_pipeline.retrieval import BM25Index, chunk_markdown, select_chunks
+
+DECK = """Acme builds widgets.
+
+## Market
+The widget market is worth 4 billion dollars and growing fast.
+
+## Team
+Two founders with prior exits lead a team of twelve engineers.
+"""
+
+FINANCIALS = """## Revenue
+Annual recurring revenue reached 2 million dollars with 80 percent gross margin.
+
+## Burn
+Monthly burn is 150 thousand dollars, giving 18 months of runway.
+"""
+
+
+def _index() -> BM25Index:
+    return BM25Index.build(
+        [
+            StandardizedFileDocument.create(name="pitch-deck.md", content=DECK),
+            StandardizedFileDocument.create(name="pitch-deck.yaml", content="title: Deck\n"),
+            StandardizedFileDocument.create(name="financials.md", content=FINANCIALS),
+        ]
+    )
+
+
+def test_chunk_markdown_splits_at_headings():
+    """Test that each heading starts a chunk and leading text gets its own chunk."""
+    chunks = chunk_markdown("pitch-deck.md", DECK)
+
+    assert [c.heading for c in chunks] == ["", "Market", "Team"]
+    assert chunks[1].text.startswith("## Market\n")
+
+
+def test_index_ranks_relevant_chunks_and_round_trips():
+    """Test that search ranks by BM25 and a saved index loads back identically."""
+    index = _index()
+
+    assert set(index.sources) == {"pitch-deck.md", "financials.md"}
+    assert index.search("founders team", k=1)[0][1].heading == "Team"
+    assert index.search("runway burn", k=1)[0][1].heading == "Burn"
+    assert index.search("unrelated", k=3) == []
+
+    loaded = BM25Index.from_document(index.to_document())
+    assert loaded is not None
+    assert loaded.search("runway burn", k=2) == index.search("runway burn", k=2)
+
+
+def test_select_chunks_round_robins_queries_within_budget():
+    """Test that every query gets its best chunk first and the budget is respected."""
+    index = _index()
+
+    both = select_chunks(index, ["market billion", "revenue margin"], top_k=2, token_budget=1000)
+    assert {c.heading for c in both} >= {"Market", "Revenue"}
+    assert [c.source for c in both] == sorted(c.source for c in both)
+
+    assert select_chunks(index, ["market billion"], top_k=2, token_budget=5) == []
+
+
+@pytest.mark.asyncio
+async def test_standardization_save_writes_the_index(tmp_path: Path):
+    """Test that saving standardized files also writes a loadable index over them."""
+    documents = DocumentList(
+        [
+            StandardizedFileDocument.create(name="pitch-deck.md", content=DECK),
+            StandardizedFileDocument.create(name="financials.md", content=FINANCIALS),
+        ]
+    )
+
+    await StandardizationFlowConfig.save_documents(str(tmp_path), documents)
+
+    index_dir = tmp_path / RetrievalIndexDocument.canonical_name()
+    saved = RetrievalIndexDocument.create(
+        name=RetrievalIndexDocument.FILES.INDEX,
+        content=(index_dir / RetrievalIndexDocument.FILES.INDEX).read_bytes(),
+    )
+    index = BM25Index.from_document(saved)
+    assert index is not None and set(index.sources) == {"pitch-deck.md", "financials.md"}
+    assert index.search("runway burn", k=1)[0][1].source == "financials.md"
@@ -0,0 +1,127 @@
+"""Test the map-reduce review over per-file candidate findings."""
+
+import importlib
+import json
+from typing import Any
+
+import pytest
+from ai_pipeline_core import AIMessages, DocumentList
+
+from ai_simple_research_pipeline.documents.flow import (
+    InitialSummaryDocument,
+    ReviewFindingDocument,
+    StandardizedFileDocument,
+)
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.flows import review_flow
+from ai_simple_research_pipeline.flows.step_03_review.tasks.extract_candidate_findings import (
+    CandidateFindings,
+)
+from ai_simple_research_pipeline.flows.step_03_review.tasks.generate_findings import (
+    Category,
+    Citation,
+    Findings,
+    Horizon,
+    Question,
+    Risk,
+    Severity,
+)
+
+extract_module = importlib.import_module(
+    "ai_simple_research_pipeline.flows.step_03_review.tasks.extract_candidate_findings"
+)
+reduce_module = importlib.import_module(
+    "ai_simple_research_pipeline.flows.step_03_review.tasks.reduce_findings"
+)
+
+
+def _risk(title: str, file: str) -> Risk:
+    return Risk(
+        id="R1",
+        title=title,
+        category=Category.TEAM,
+        severity=Severity.HIGH,
+        horizon=Horizon.SHORT,
+        description=f"{title}.",
+        evidence=[Citation(file=file, quote=f"{title} in {file}")],
+        mitigation=[],
+        confidence=0.8,
+    )
+
+
+def _question(text: str, file: str) -> Question:
+    return Question(
+        id="Q1",
+        question=text,
+        rationale="Diligence.",
+        expected_signal="An answer.",
+        evidence=[Citation(file=file, quote=text)],
+    )
+
+
+class StubLLM:
+    """Structured generation stand-in: per-file candidates, then the reduced findings."""
+
+    def __init__(self) -> None:
+        self.extracted: list[str] = []
+        self.pooled: dict[str, list[dict[str, Any]]] = {}
+
+    async def generate(
+        self,
+        model: str,
+        response_format: type[Any],
+        *,
+        context: AIMessages | None = None,
+        messages: AIMessages | str,
+    ) -> Any:
+        assert isinstance(messages, AIMessages)
+        prompt = messages.get_last_message_as_str()
+        if response_format is CandidateFindings:
+            assert context is not None
+            file = next(d.name for d in context if isinstance(d, StandardizedFileDocument))
+            self.extracted.append(file)
+            return CandidateFindings(
+                risks=[_risk("Key person dependency", file), _risk(f"Risk in {file}", file)],
+                questions=[_question("Who owns the IP?", file)],
+            )
+        assert response_format is Findings
+        candidates = prompt.split("<candidate_findings>")[1].split("</candidate_findings>")[0]
+        self.pooled = json.loads(candidates)
+        risks = [Risk.model_validate(r) for r in self.pooled["risks"]]
+        questions = [Question.model_validate(q) for q in self.pooled["questions"]]
+        return Findings.model_construct(risks=risks[:5], opportunities=[], questions=questions)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch: pytest.MonkeyPatch) -> StubLLM:
+    stub = StubLLM()
+    monkeypatch.setattr(extract_module, "cached_generate_structured", stub.generate)
+    monkeypatch.setattr(reduce_module, "cached_generate_structured", stub.generate)
+    return stub
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_review_deduplicates_candidates(stub_llm: StubLLM):
+    """Test that each file is extracted once and repeated candidates are merged before reduce."""
+    documents = DocumentList(
+        [
+            InitialSummaryDocument.create(
+                name=InitialSummaryDocument.FILES.INITIAL_SUMMARY, content="{}"
+            ),
+            StandardizedFileDocument.create(name="deck.md", content="# Deck"),
+            StandardizedFileDocument.create(name="deck.yaml", content="title: Deck"),
+            StandardizedFileDocument.create(name="notes.md", content="# Notes"),
+        ]
+    )
+    options = ProjectFlowOptions(findings_map_reduce_threshold=0)
+
+    outputs = await review_flow("acme", documents, options)
+
+    assert sorted(stub_llm.extracted) == ["deck.md", "notes.md"]
+    titles = [r["title"] for r in stub_llm.pooled["risks"]]
+    assert titles == ["Key person dependency", "Risk in deck.md", "Risk in notes.md"]
+    # The repeated risk keeps the evidence of both files
+    assert [c["file"] for c in stub_llm.pooled["risks"][0]["evidence"]] == ["deck.md", "notes.md"]
+    assert len(stub_llm.pooled["questions"]) == 1
+    risks = outputs.get_by(ReviewFindingDocument.FILES.RISKS)
+    assert [r["title"] for r in risks.as_json()["risks"]] == titles
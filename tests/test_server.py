@@ -0,0 +1,345 @@
+"""Test the Prefect middleware server helpers."""
+
+import asyncio
+import json
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from types import SimpleNamespace
+from typing import Any
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+from prefect.client.schemas.objects import FlowRun, State, StateType
+from prefect.exceptions import ObjectNotFound
+
+from ai_simple_research_pipeline.flows import FLOWS, summary_flow
+from ai_simple_research_pipeline.server import server
+from ai_simple_research_pipeline.server.metrics import (
+    LatencyHistogram,
+    MetricsMiddleware,
+    render_prometheus,
+    run_states,
+)
+from ai_simple_research_pipeline.server.run_events import RunEventHub
+from ai_simple_research_pipeline.server.server import (
+    PREFECT_READ_LIMIT,
+    DeploymentNameCache,
+    RunsQueryRequest,
+    TriggerRequest,
+    query_runs,
+    start_deployment_runs_batch,
+)
+
+
+class FakeClient:
+    def __init__(self, names: list[str]):
+        self.deployments = [SimpleNamespace(id=uuid4(), name=name) for name in names]
+        self.lookups = 0
+
+    async def read_deployments(self, *, deployment_filter, limit):
+        self.lookups += 1
+        names = deployment_filter.name.any_
+        return [d for d in self.deployments if d.name in names][:limit]
+
+
+class FakeRunsClient:
+    """Prefect client stand-in that, like the Prefect server, rejects reads above its limit."""
+
+    def __init__(self, runs: list[FlowRun]):
+        self.runs = runs
+        self.reads: list[int] = []
+
+    async def read_flow_runs(self, *, flow_run_filter, limit, deployment_filter=None):
+        assert limit <= PREFECT_READ_LIMIT, "Prefect answers 422"
+        self.reads.append(limit)
+        if flow_run_filter.id is not None:
+            ids = set(flow_run_filter.id.any_)
+            return [r for r in self.runs if r.id in ids][:limit]
+        keys = set(flow_run_filter.idempotency_key.any_)
+        return [r for r in self.runs if r.idempotency_key in keys][:limit]
+
+
+class FakeTriggerClient(FakeRunsClient):
+    """Creates runs like Prefect: a used idempotency key returns the earlier run."""
+
+    def __init__(self, runs: list[FlowRun]):
+        super().__init__(runs)
+        self.deployment = SimpleNamespace(id=uuid4(), name="report_flow")
+
+    async def read_deployments(self, *, deployment_filter, limit):
+        return [self.deployment]
+
+    async def create_flow_run_from_deployment(
+        self, *, deployment_id, parameters, tags, idempotency_key
+    ):
+        if parameters.get("fail"):
+            raise ValueError("invalid parameters")
+        for run in self.runs:
+            if idempotency_key and run.idempotency_key == idempotency_key:
+                return run
+        run = FlowRun(id=uuid4(), flow_id=uuid4(), name="run", idempotency_key=idempotency_key)
+        self.runs.append(run)
+        return run
+
+
+def _run(name: str, state_type: StateType) -> FlowRun:
+    return FlowRun(
+        id=uuid4(),
+        flow_id=uuid4(),
+        name=name,
+        state=State(type=state_type),
+        state_type=state_type,
+        state_name=state_type.value.title(),
+    )
+
+
+class FakeEventsClient:
+    """Serves one pipeline run and its subflow runs; a deleted run is not found."""
+
+    def __init__(self, run: FlowRun):
+        self.run: FlowRun | None = run
+        self.children: list[FlowRun] = []
+        self.flow_names: dict[UUID, str] = {}
+
+    async def read_flow_run(self, flow_run_id):
+        if self.run is None or self.run.id != flow_run_id:
+            raise ObjectNotFound(http_exc=Exception("404"))
+        return self.run
+
+    async def read_flow_runs(self, *, flow_run_filter):
+        return self.children
+
+    async def read_flow(self, flow_id):
+        return SimpleNamespace(name=self.flow_names[flow_id])
+
+    def start_subflow(self, flow: Any, state_type: StateType) -> None:
+        child = _run(flow.name, state_type)
+        self.flow_names[child.flow_id] = flow.name
+        self.children.append(child)
+
+    def finish(self, state_type: StateType) -> None:
+        assert self.run is not None
+        self.run = self.run.model_copy(
+            update={
+                "state": State(type=state_type),
+                "state_type": state_type,
+                "state_name": state_type.value.title(),
+            }
+        )
+
+
+def client_factory(client: Any) -> Callable[[], AbstractAsyncContextManager[Any]]:
+    @asynccontextmanager
+    async def fake_client() -> AsyncGenerator[Any]:
+        yield client
+
+    return fake_client
+
+
+def use_client(monkeypatch: pytest.MonkeyPatch, client: Any) -> None:
+    monkeypatch.setattr(server, "prefect_clients", SimpleNamespace(client=client_factory(client)))
+
+
+@pytest.mark.asyncio
+async def test_deployment_name_cache_hits_refreshes_and_rejects_unknown_names():
+    """Test that resolved names are cached, refreshable, and misses are not cached."""
+    client = FakeClient(["summary_flow", "dup", "dup"])
+    cache = DeploymentNameCache(ttl=60)
+
+    first = await cache.resolve(client, "summary_flow")  # type: ignore[arg-type]
+    assert await cache.resolve(client, "summary_flow") == first  # type: ignore[arg-type]
+    assert client.lookups == 1
+
+    client.deployments[0].id = uuid4()  # deployment recreated
+    refreshed = await cache.resolve(client, "summary_flow", refresh=True)  # type: ignore[arg-type]
+    assert refreshed == client.deployments[0].id != first
+
+    for name, code in (("missing", 404), ("missing", 404), ("dup", 409)):
+        with pytest.raises(HTTPException) as exc:
+            await cache.resolve(client, name)  # type: ignore[arg-type]
+        assert exc.value.status_code == code
+    assert client.lookups == 5
+
+
+def test_latency_histogram_buckets_and_quantiles():
+    """Test that observations land in cumulative buckets and quantiles use bucket bounds."""
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 2, "1": 3, "+Inf": 4}
+    assert snapshot["p50_seconds"] == 0.1
+    assert snapshot["p95_seconds"] is None
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_exports_route_status_and_run_states():
+    """Test that requests are exported per route template and status with run state counts."""
+
+    async def endpoint(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/runs/{flow_run_id}")
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(endpoint)
+    await middleware({"type": "http", "method": "GET", "path": "/runs/x"}, receive, send)
+    run_states.observe(uuid4(), "RUNNING")
+
+    text = render_prometheus(reconnects=2)
+    assert (
+        'middleware_http_requests_total{method="GET",route="/runs/{flow_run_id}",status="404"} 1'
+        in text
+    )
+    assert (
+        'middleware_http_request_duration_seconds_bucket{method="GET",'
+        'route="/runs/{flow_run_id}",le="+Inf"} 1' in text
+    )
+    assert "middleware_http_requests_in_flight 0" in text
+    assert "middleware_prefect_client_reconnects_total 2" in text
+    assert 'middleware_flow_runs{state="RUNNING"}' in text
+
+
+@pytest.mark.asyncio
+async def test_query_runs_projects_fields_and_lists_missing_ids(monkeypatch: pytest.MonkeyPatch):
+    """Test that runs come back projected, in request order, in reads of at most the limit."""
+    runs = [
+        FlowRun(id=uuid4(), flow_id=uuid4(), name=f"run-{i}", state_type=StateType.RUNNING)
+        for i in range(PREFECT_READ_LIMIT + 50)
+    ]
+    client = FakeRunsClient(runs)
+    use_client(monkeypatch, client)
+    unknown = uuid4()
+    ids = [r.id for r in reversed(runs)] + [unknown]
+
+    response = await query_runs(RunsQueryRequest(ids=ids, fields=["name", "state_type"]))
+
+    assert sorted(client.reads) == [51, PREFECT_READ_LIMIT]
+    assert [r["id"] for r in response.runs] == [str(r.id) for r in reversed(runs)]
+    assert response.runs[0] == {
+        "id": str(runs[-1].id),
+        "name": runs[-1].name,
+        "state_type": "RUNNING",
+    }
+    assert response.missing == [unknown]
+
+    with pytest.raises(HTTPException) as exc:
+        await query_runs(RunsQueryRequest(ids=ids[:1], fields=["no_such_field"]))
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_trigger_reports_each_item(monkeypatch: pytest.MonkeyPatch):
+    """Test that failures stay per item and reused idempotency keys are reported as existing."""
+    earlier = FlowRun(id=uuid4(), flow_id=uuid4(), name="earlier", idempotency_key="key-0")
+    client = FakeTriggerClient([earlier])
+    use_client(monkeypatch, client)
+    monkeypatch.setattr(server, "deployment_cache", DeploymentNameCache(ttl=60))
+    body = [TriggerRequest(idempotency_key=f"key-{i}") for i in range(PREFECT_READ_LIMIT + 10)]
+    body.append(TriggerRequest(idempotency_key="key-1"))  # repeats an earlier item
+    body.append(TriggerRequest(parameters={"fail": True}))
+
+    response = await start_deployment_runs_batch("report_flow", body)
+
+    assert response.deployment_id == client.deployment.id
+    assert (response.created, response.existing, response.failed) == (PREFECT_READ_LIMIT + 9, 2, 1)
+    first, second, *_, repeat, failed = response.results
+    assert (first.status, first.flow_run_id) == ("existing", earlier.id)
+    assert second.status == "created"
+    assert (repeat.status, repeat.flow_run_id) == ("existing", second.flow_run_id)
+    assert (failed.status, failed.index) == ("error", len(body) - 1)
+    assert failed.error == "invalid parameters"
+    assert sorted(client.reads) == [10, PREFECT_READ_LIMIT]
+
+
+@pytest.mark.asyncio
+async def test_run_event_hub_shares_one_poller_and_reports_step_progress():
+    """Test that listeners of a run share a poller whose events count every pipeline step."""
+    client = FakeEventsClient(_run("research_pipeline", StateType.RUNNING))
+    assert client.run is not None
+    hub = RunEventHub(client_factory(client), interval=0.01)
+    total = len(FLOWS)
+
+    async def next_event(queue: asyncio.Queue[dict[str, Any] | None]) -> Any:
+        return await asyncio.wait_for(queue.get(), timeout=5)
+
+    async with hub.subscribe(client.run.id) as first, hub.subscribe(client.run.id) as second:
+        assert len(hub.pollers) == 1
+        started = await next_event(first)
+        client.start_subflow(summary_flow, StateType.COMPLETED)
+        summarized = await next_event(first)
+        client.finish(StateType.COMPLETED)
+        completed = await next_event(first)
+        assert await next_event(first) is None
+        assert [await next_event(second) for _ in range(4)] == [
+            started,
+            summarized,
+            completed,
+            None,
+        ]
+
+    assert (started["step"], started["total_steps"], started["progress"]) == (0, total, 0)
+    assert summarized["current_flow"] == summary_flow.name
+    assert (summarized["step"], summarized["total_steps"]) == (1, total)
+    assert summarized["progress"] == round(1 / total, 2)
+    assert (completed["state_type"], completed["step"], completed["progress"]) == (
+        "COMPLETED",
+        total,
+        1,
+    )
+    assert hub.pollers == {}
+
+
+@pytest.mark.asyncio
+async def test_run_event_hub_ends_the_stream_of_a_deleted_run():
+    """Test that a run deleted while watched ends its events instead of being polled forever."""
+    client = FakeEventsClient(_run("research_pipeline", StateType.RUNNING))
+    assert client.run is not None
+    run_id = client.run.id
+    hub = RunEventHub(client_factory(client), interval=0.01)
+
+    async with hub.subscribe(run_id) as queue:
+        assert (await asyncio.wait_for(queue.get(), timeout=5) or {})["state_type"] == "RUNNING"
+        client.run = None
+        assert await asyncio.wait_for(queue.get(), timeout=5) is None
+
+    assert hub.pollers == {}
+
+
+@pytest.mark.asyncio
+async def test_run_events_endpoint_streams_status_then_end(monkeypatch: pytest.MonkeyPatch):
+    """Test the SSE stream of a finished run and the 404 for an unknown run."""
+    client = FakeEventsClient(_run("research_pipeline", StateType.RUNNING))
+    for flow in FLOWS:
+        client.start_subflow(flow, StateType.COMPLETED)
+    client.finish(StateType.COMPLETED)
+    assert client.run is not None
+    use_client(monkeypatch, client)
+    monkeypatch.setattr(server, "run_events", RunEventHub(client_factory(client), interval=0.01))
+
+    response = await server.stream_run_events(client.run.id)
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert response.media_type == "text/event-stream"
+    assert len(chunks) == 2 and chunks[1] == "event: end\ndata: {}\n\n"
+    event, data = str(chunks[0]).split("\n", 1)
+    assert event == "event: status"
+    status = json.loads(data.removeprefix("data: "))
+    assert status["flow_run_id"] == str(client.run.id)
+    assert status["current_flow"] == FLOWS[-1].name
+    assert (status["step"], status["total_steps"], status["progress"]) == (
+        len(FLOWS),
+        len(FLOWS),
+        1,
+    )
+
+    with pytest.raises(HTTPException) as not_found:
+        await server.stream_run_events(uuid4())
+    assert not_found.value.status_code == 404
@@ -0,0 +1,152 @@
+"""Test carry-over of unchanged files in the standardization flow."""
+
+import importlib
+from pathlib import Path
+
+import pytest
+from ai_pipeline_core import Document, DocumentList
+
+from ai_simple_research_pipeline.documents.flow import (
+    InitialSummaryDocument,
+    StandardizedFileDocument,
+    UserInputDocument,
+)
+from ai_simple_research_pipeline.flow_options import ProjectFlowOptions
+from ai_simple_research_pipeline.flows import standardization_flow
+from ai_simple_research_pipeline.flows.step_02_standardization.tasks.extract_metadata import (
+    StandardizedFileMetadata,
+    slugify,
+)
+
+flow_module = importlib.import_module(
+    "ai_simple_research_pipeline.flows.step_02_standardization.standardization_flow"
+)
+Config = flow_module.StandardizationFlowConfig
+
+
+class FakeTasks:
+    """Stand-ins for the LLM tasks that record which files they processed."""
+
+    def __init__(self) -> None:
+        self.processed: list[str] = []
+
+    async def extract_metadata(
+        self,
+        document: Document,
+        initial_summary: Document,
+        model: str,
+        project_name: str,
+        parts: list[Document] | None = None,
+        options_fingerprint: str = "",
+    ) -> StandardizedFileDocument:
+        self.processed.append(document.name)
+        metadata = StandardizedFileMetadata(
+            title=document.name,
+            original_filename=document.name,
+            doc_type="other",
+            language_detected="en",
+            summary_improved="Summary.",
+            key_claims=[],
+            provenance_notes="Test.",
+            source_sha256=document.sha256,
+            model=model,
+            options_fingerprint=options_fingerprint,
+        )
+        return StandardizedFileDocument.create(
+            name=f"{slugify(document.name)}.yaml", content=metadata
+        )
+
+    async def standardize_content(
+        self,
+        document: Document,
+        metadata: Document,
+        model: str,
+        project_name: str,
+        parts: list[Document] | None = None,
+    ) -> StandardizedFileDocument:
+        return StandardizedFileDocument.create(
+            name=f"{slugify(document.name)}.md", content=f"# {document.name}\n\nBy {model}.\n"
+        )
+
+
+@pytest.fixture
+def tasks(monkeypatch: pytest.MonkeyPatch) -> FakeTasks:
+    fake = FakeTasks()
+    monkeypatch.setattr(flow_module, "extract_metadata", fake.extract_metadata)
+    monkeypatch.setattr(flow_module, "standardize_content", fake.standardize_content)
+    return fake
+
+
+def _write_input(project: Path, name: str, content: str) -> None:
+    directory = project / UserInputDocument.canonical_name()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(content)
+
+
+async def _run(project: Path, options: ProjectFlowOptions) -> DocumentList:
+    documents = await Config.load_documents(str(project))
+    outputs = await standardization_flow("acme", documents, options)
+    await Config.save_documents(str(project), outputs)
+    return outputs
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    _write_input(tmp_path, "deck.md", "# Deck\n\nAcme builds widgets.")
+    _write_input(tmp_path, "notes.md", "# Notes\n\nTwo founders.")
+    summary_dir = tmp_path / InitialSummaryDocument.canonical_name()
+    summary_dir.mkdir()
+    (summary_dir / InitialSummaryDocument.FILES.INITIAL_SUMMARY).write_text("{}")
+    return tmp_path
+
+
+def _stored(project: Path) -> list[str]:
+    directory = project / StandardizedFileDocument.canonical_name()
+    return sorted(p.name for p in directory.iterdir() if p.suffix in (".md", ".yaml"))
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_are_carried_over(project: Path, tasks: FakeTasks):
+    """Test that a rerun over unchanged files reuses every output without LLM calls."""
+    options = ProjectFlowOptions()
+    first = await _run(project, options)
+    assert sorted(tasks.processed) == ["deck.md", "notes.md"]
+
+    tasks.processed.clear()
+    second = await _run(project, options)
+    assert tasks.processed == []
+    assert [d.sha256 for d in second] == [d.sha256 for d in first]
+
+
+@pytest.mark.asyncio
+async def test_changed_files_and_options_are_processed_again(project: Path, tasks: FakeTasks):
+    """Test that only a changed file is redone, and every file when the model changes."""
+    options = ProjectFlowOptions()
+    await _run(project, options)
+
+    tasks.processed.clear()
+    _write_input(project, "notes.md", "# Notes\n\nThree founders.")
+    await _run(project, options)
+    assert tasks.processed == ["notes.md"]
+
+    tasks.processed.clear()
+    await _run(project, ProjectFlowOptions(small_model="gemini-2.5-flash"))
+    assert sorted(tasks.processed) == ["deck.md", "notes.md"]
+
+    tasks.processed.clear()
+    await _run(project, ProjectFlowOptions(small_model="gemini-2.5-flash", max_input_chars=10))
+    assert sorted(tasks.processed) == ["deck.md", "notes.md"]
+
+
+@pytest.mark.asyncio
+async def test_outputs_of_removed_files_are_deleted(project: Path, tasks: FakeTasks):
+    """Test that saving drops the standardized outputs of a removed input file."""
+    options = ProjectFlowOptions()
+    await _run(project, options)
+    assert _stored(project) == ["deck.md", "deck.yaml", "notes.md", "notes.yaml"]
+
+    (project / UserInputDocument.canonical_name() / "notes.md").unlink()
+    outputs = await _run(project, options)
+
+    assert sorted(d.name for d in outputs) == ["deck.md", "deck.yaml"]
+    assert _stored(project) == ["deck.md", "deck.yaml"]
@@ -0,0 +1,50 @@
+"""Test the status webhook dispatcher."""
+
+from typing import Any
+
+import pytest
+
+from ai_simple_research_pipeline.status_webhooks import StatusDispatcher
+
+
+class RecordingDispatcher(StatusDispatcher):
+    def __init__(self, *, batch: bool = False, failures: int = 0):
+        super().__init__("http://example.com/status", batch=batch)
+        self.batch_window = 0.01
+        self.backoff = 0.001
+        self.max_attempts = 2
+        self.failures = failures
+        self.posted: list[Any] = []
+
+    async def _post(self, body: Any) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("receiver unavailable")
+        self.posted.append(body)
+
+
+def _status(flow_run_id: str, state: str) -> dict[str, Any]:
+    return {"flow_run_id": flow_run_id, "data": {"state": {"type": state}}}
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_coalesces_states_of_the_same_flow_run():
+    """Test that only the latest queued state per flow run is sent, in order."""
+    async with RecordingDispatcher() as dispatcher:
+        dispatcher.enqueue(_status("a", "RUNNING"))
+        dispatcher.enqueue(_status("b", "RUNNING"))
+        dispatcher.enqueue(_status("a", "COMPLETED"))
+
+    assert dispatcher.posted == [_status("b", "RUNNING"), _status("a", "COMPLETED")]
+    assert dispatcher.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_and_keeps_retrying_terminal_states():
+    """Test that a failed batch drops running states but still delivers terminal ones."""
+    async with RecordingDispatcher(batch=True, failures=2) as dispatcher:
+        dispatcher.enqueue(_status("a", "RUNNING"))
+        dispatcher.enqueue(_status("b", "FAILED"))
+
+    assert dispatcher.posted == [{"statuses": [_status("b", "FAILED")]}]
+    assert dispatcher.dropped == 1
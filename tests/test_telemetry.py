@@ -0,0 +1,38 @@
+"""Test the per-task LLM usage ledger."""
+
+from types import SimpleNamespace
+
+from ai_simple_research_pipeline.telemetry import LLMUsage, RunLedger, response_usage
+
+
+def test_response_usage_reads_tokens_and_cost():
+    """Test that usage, cached prompt tokens and cost are read from a response."""
+    response = SimpleNamespace(
+        usage=SimpleNamespace(
+            prompt_tokens=120,
+            completion_tokens=30,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=100),
+            cost=0.002,
+        )
+    )
+    assert response_usage(response) == LLMUsage(
+        prompt_tokens=120, completion_tokens=30, cached_tokens=100, cost=0.002
+    )
+    assert response_usage(SimpleNamespace(usage=None)) == LLMUsage()
+
+
+def test_ledger_totals_keep_cost_of_live_calls_only():
+    """Test that cached calls keep their tokens but add no cost to the run."""
+    ledger = RunLedger()
+    usage = LLMUsage(prompt_tokens=100, completion_tokens=10, cost=0.01)
+    ledger.record("model-a", usage, 1.5, cached=False)
+    ledger.record("model-a", usage, 0.01, cached=True)
+
+    totals = ledger.metrics().totals
+    assert totals.calls == 2 and totals.cached_calls == 1
+    assert totals.prompt_tokens == 200
+    assert totals.cost == 0.01
+    assert totals.max_latency_seconds == 1.5
+
+    ledger.reset()
+    assert ledger.metrics().totals.calls == 0